@@ -85,6 +85,37 @@ resource "aws_api_gateway_integration" "users_get" {
   passthrough_behavior    = "WHEN_NO_MATCH"
 }
 
+# Effective permissions resources: /users/{id}/permissions
+resource "aws_api_gateway_resource" "user" {
+  rest_api_id = aws_api_gateway_rest_api.directory_service.id
+  parent_id   = aws_api_gateway_resource.users.id
+  path_part   = "{id}"
+}
+
+resource "aws_api_gateway_resource" "user_permissions" {
+  rest_api_id = aws_api_gateway_rest_api.directory_service.id
+  parent_id   = aws_api_gateway_resource.user.id
+  path_part   = "permissions"
+}
+
+resource "aws_api_gateway_method" "user_permissions_get" {
+  rest_api_id      = aws_api_gateway_rest_api.directory_service.id
+  resource_id      = aws_api_gateway_resource.user_permissions.id
+  http_method      = "GET"
+  authorization    = "NONE"
+  api_key_required = true
+}
+
+resource "aws_api_gateway_integration" "user_permissions_get" {
+  rest_api_id             = aws_api_gateway_rest_api.directory_service.id
+  resource_id             = aws_api_gateway_resource.user_permissions.id
+  http_method             = aws_api_gateway_method.user_permissions_get.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.directory_service.invoke_arn
+  passthrough_behavior    = "WHEN_NO_MATCH"
+}
+
 # Admin POST methods
 resource "aws_api_gateway_method" "admin_permissions_post" {
   rest_api_id      = aws_api_gateway_rest_api.directory_service.id
@@ -223,6 +254,188 @@ resource "aws_api_gateway_integration" "admin_contacts_delete" {
   uri                     = aws_lambda_function.directory_service.invoke_arn
 }
 
+# Group roster resources
+resource "aws_api_gateway_resource" "groups" {
+  rest_api_id = aws_api_gateway_rest_api.directory_service.id
+  parent_id   = aws_api_gateway_resource.v1.id
+  path_part   = "groups"
+}
+
+resource "aws_api_gateway_method" "groups_get" {
+  rest_api_id      = aws_api_gateway_rest_api.directory_service.id
+  resource_id      = aws_api_gateway_resource.groups.id
+  http_method      = "GET"
+  authorization    = "NONE"
+  api_key_required = true
+}
+
+resource "aws_api_gateway_integration" "groups_get" {
+  rest_api_id             = aws_api_gateway_rest_api.directory_service.id
+  resource_id             = aws_api_gateway_resource.groups.id
+  http_method             = aws_api_gateway_method.groups_get.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.directory_service.invoke_arn
+  passthrough_behavior    = "WHEN_NO_MATCH"
+}
+
+resource "aws_api_gateway_resource" "group" {
+  rest_api_id = aws_api_gateway_rest_api.directory_service.id
+  parent_id   = aws_api_gateway_resource.groups.id
+  path_part   = "{name}"
+}
+
+resource "aws_api_gateway_resource" "group_roster" {
+  rest_api_id = aws_api_gateway_rest_api.directory_service.id
+  parent_id   = aws_api_gateway_resource.group.id
+  path_part   = "roster"
+}
+
+resource "aws_api_gateway_method" "group_roster_get" {
+  rest_api_id      = aws_api_gateway_rest_api.directory_service.id
+  resource_id      = aws_api_gateway_resource.group_roster.id
+  http_method      = "GET"
+  authorization    = "NONE"
+  api_key_required = true
+}
+
+resource "aws_api_gateway_integration" "group_roster_get" {
+  rest_api_id             = aws_api_gateway_rest_api.directory_service.id
+  resource_id             = aws_api_gateway_resource.group_roster.id
+  http_method             = aws_api_gateway_method.group_roster_get.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.directory_service.invoke_arn
+  passthrough_behavior    = "WHEN_NO_MATCH"
+}
+
+# Snapshot resource
+resource "aws_api_gateway_resource" "snapshot" {
+  rest_api_id = aws_api_gateway_rest_api.directory_service.id
+  parent_id   = aws_api_gateway_resource.v1.id
+  path_part   = "snapshot"
+}
+
+resource "aws_api_gateway_method" "snapshot_get" {
+  rest_api_id      = aws_api_gateway_rest_api.directory_service.id
+  resource_id      = aws_api_gateway_resource.snapshot.id
+  http_method      = "GET"
+  authorization    = "NONE"
+  api_key_required = true
+}
+
+resource "aws_api_gateway_integration" "snapshot_get" {
+  rest_api_id             = aws_api_gateway_rest_api.directory_service.id
+  resource_id             = aws_api_gateway_resource.snapshot.id
+  http_method             = aws_api_gateway_method.snapshot_get.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.directory_service.invoke_arn
+  passthrough_behavior    = "WHEN_NO_MATCH"
+}
+
+# Change feed resource
+resource "aws_api_gateway_resource" "changes" {
+  rest_api_id = aws_api_gateway_rest_api.directory_service.id
+  parent_id   = aws_api_gateway_resource.v1.id
+  path_part   = "changes"
+}
+
+resource "aws_api_gateway_method" "changes_get" {
+  rest_api_id      = aws_api_gateway_rest_api.directory_service.id
+  resource_id      = aws_api_gateway_resource.changes.id
+  http_method      = "GET"
+  authorization    = "NONE"
+  api_key_required = true
+}
+
+resource "aws_api_gateway_integration" "changes_get" {
+  rest_api_id             = aws_api_gateway_rest_api.directory_service.id
+  resource_id             = aws_api_gateway_resource.changes.id
+  http_method             = aws_api_gateway_method.changes_get.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.directory_service.invoke_arn
+  passthrough_behavior    = "WHEN_NO_MATCH"
+}
+
+# Admin batch resource
+resource "aws_api_gateway_resource" "admin_batch" {
+  rest_api_id = aws_api_gateway_rest_api.directory_service.id
+  parent_id   = aws_api_gateway_resource.admin.id
+  path_part   = "batch"
+}
+
+resource "aws_api_gateway_method" "admin_batch_post" {
+  rest_api_id      = aws_api_gateway_rest_api.directory_service.id
+  resource_id      = aws_api_gateway_resource.admin_batch.id
+  http_method      = "POST"
+  authorization    = "NONE"
+  api_key_required = true
+}
+
+resource "aws_api_gateway_integration" "admin_batch_post" {
+  rest_api_id             = aws_api_gateway_rest_api.directory_service.id
+  resource_id             = aws_api_gateway_resource.admin_batch.id
+  http_method             = aws_api_gateway_method.admin_batch_post.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.directory_service.invoke_arn
+}
+
+# Admin group resources: /admin/groups and /admin/groups/{name}/members
+resource "aws_api_gateway_resource" "admin_groups" {
+  rest_api_id = aws_api_gateway_rest_api.directory_service.id
+  parent_id   = aws_api_gateway_resource.admin.id
+  path_part   = "groups"
+}
+
+resource "aws_api_gateway_method" "admin_groups_post" {
+  rest_api_id      = aws_api_gateway_rest_api.directory_service.id
+  resource_id      = aws_api_gateway_resource.admin_groups.id
+  http_method      = "POST"
+  authorization    = "NONE"
+  api_key_required = true
+}
+
+resource "aws_api_gateway_integration" "admin_groups_post" {
+  rest_api_id             = aws_api_gateway_rest_api.directory_service.id
+  resource_id             = aws_api_gateway_resource.admin_groups.id
+  http_method             = aws_api_gateway_method.admin_groups_post.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.directory_service.invoke_arn
+}
+
+resource "aws_api_gateway_resource" "admin_group" {
+  rest_api_id = aws_api_gateway_rest_api.directory_service.id
+  parent_id   = aws_api_gateway_resource.admin_groups.id
+  path_part   = "{name}"
+}
+
+resource "aws_api_gateway_resource" "admin_group_members" {
+  rest_api_id = aws_api_gateway_rest_api.directory_service.id
+  parent_id   = aws_api_gateway_resource.admin_group.id
+  path_part   = "members"
+}
+
+resource "aws_api_gateway_method" "admin_group_members_put" {
+  rest_api_id      = aws_api_gateway_rest_api.directory_service.id
+  resource_id      = aws_api_gateway_resource.admin_group_members.id
+  http_method      = "PUT"
+  authorization    = "NONE"
+  api_key_required = true
+}
+
+resource "aws_api_gateway_integration" "admin_group_members_put" {
+  rest_api_id             = aws_api_gateway_rest_api.directory_service.id
+  resource_id             = aws_api_gateway_resource.admin_group_members.id
+  http_method             = aws_api_gateway_method.admin_group_members_put.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.directory_service.invoke_arn
+}
+
 # Add v1 base path
 resource "aws_api_gateway_resource" "v1" {
   rest_api_id = aws_api_gateway_rest_api.directory_service.id
@@ -291,6 +504,56 @@ resource "aws_api_gateway_integration" "docs_get" {
   uri                     = aws_lambda_function.directory_service.invoke_arn
 }
 
+# Authorization decision resource
+resource "aws_api_gateway_resource" "authorize" {
+  rest_api_id = aws_api_gateway_rest_api.directory_service.id
+  parent_id   = aws_api_gateway_resource.v1.id
+  path_part   = "authorize"
+}
+
+resource "aws_api_gateway_method" "authorize_get" {
+  rest_api_id      = aws_api_gateway_rest_api.directory_service.id
+  resource_id      = aws_api_gateway_resource.authorize.id
+  http_method      = "GET"
+  authorization    = "NONE"
+  api_key_required = true
+}
+
+resource "aws_api_gateway_integration" "authorize_get" {
+  rest_api_id             = aws_api_gateway_rest_api.directory_service.id
+  resource_id             = aws_api_gateway_resource.authorize.id
+  http_method             = aws_api_gateway_method.authorize_get.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.directory_service.invoke_arn
+  passthrough_behavior    = "WHEN_NO_MATCH"
+}
+
+# Prefix search resource
+resource "aws_api_gateway_resource" "search" {
+  rest_api_id = aws_api_gateway_rest_api.directory_service.id
+  parent_id   = aws_api_gateway_resource.v1.id
+  path_part   = "search"
+}
+
+resource "aws_api_gateway_method" "search_get" {
+  rest_api_id      = aws_api_gateway_rest_api.directory_service.id
+  resource_id      = aws_api_gateway_resource.search.id
+  http_method      = "GET"
+  authorization    = "NONE"
+  api_key_required = true
+}
+
+resource "aws_api_gateway_integration" "search_get" {
+  rest_api_id             = aws_api_gateway_rest_api.directory_service.id
+  resource_id             = aws_api_gateway_resource.search.id
+  http_method             = aws_api_gateway_method.search_get.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.directory_service.invoke_arn
+  passthrough_behavior    = "WHEN_NO_MATCH"
+}
+
 # Enable CORS for the API Gateway
 resource "aws_api_gateway_resource" "cors" {
   rest_api_id = aws_api_gateway_rest_api.directory_service.id
@@ -315,6 +578,7 @@ resource "aws_api_gateway_integration" "cors" {
       statusCode = 200
     })
   }
+  content_handling = "CONVERT_TO_TEXT"
 }
 
 resource "aws_api_gateway_method_response" "cors" {
@@ -337,10 +601,11 @@ resource "aws_api_gateway_integration_response" "cors" {
   status_code = aws_api_gateway_method_response.cors.status_code
 
   response_parameters = {
-    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Api-Key,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'",
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Api-Key,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,If-None-Match'",
     "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS,POST,PUT,DELETE'",
     "method.response.header.Access-Control-Allow-Origin"  = "'*'"
   }
+  content_handling = "CONVERT_TO_TEXT"
 }
 
 # Add OPTIONS method to permissions endpoint
@@ -361,6 +626,7 @@ resource "aws_api_gateway_integration" "permissions_options" {
       statusCode = 200
     })
   }
+  content_handling = "CONVERT_TO_TEXT"
 }
 
 resource "aws_api_gateway_method_response" "permissions_options" {
@@ -383,10 +649,11 @@ resource "aws_api_gateway_integration_response" "permissions_options" {
   status_code = aws_api_gateway_method_response.permissions_options.status_code
 
   response_parameters = {
-    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Api-Key'",
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Api-Key,If-None-Match'",
     "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'",
     "method.response.header.Access-Control-Allow-Origin"  = "'*'"
   }
+  content_handling = "CONVERT_TO_TEXT"
 }
 
 resource "aws_api_gateway_method_response" "permissions_get" {
@@ -420,6 +687,7 @@ resource "aws_api_gateway_integration" "users_options" {
       statusCode = 200
     })
   }
+  content_handling = "CONVERT_TO_TEXT"
 }
 
 resource "aws_api_gateway_method_response" "users_options" {
@@ -442,10 +710,11 @@ resource "aws_api_gateway_integration_response" "users_options" {
   status_code = aws_api_gateway_method_response.users_options.status_code
 
   response_parameters = {
-    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Api-Key'",
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Api-Key,If-None-Match'",
     "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'",
     "method.response.header.Access-Control-Allow-Origin"  = "'*'"
   }
+  content_handling = "CONVERT_TO_TEXT"
 }
 
 resource "aws_api_gateway_method_response" "users_get" {
@@ -468,7 +737,7 @@ resource "aws_api_gateway_integration_response" "users_get" {
   status_code = aws_api_gateway_method_response.users_get.status_code
 
   response_parameters = {
-    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Api-Key'",
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Api-Key,If-None-Match'",
     "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'",
     "method.response.header.Access-Control-Allow-Origin"  = "'*'"
   }
@@ -492,6 +761,7 @@ resource "aws_api_gateway_integration" "contacts_options" {
       statusCode = 200
     })
   }
+  content_handling = "CONVERT_TO_TEXT"
 }
 
 resource "aws_api_gateway_method_response" "contacts_options" {
@@ -514,10 +784,11 @@ resource "aws_api_gateway_integration_response" "contacts_options" {
   status_code = aws_api_gateway_method_response.contacts_options.status_code
 
   response_parameters = {
-    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Api-Key'",
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Api-Key,If-None-Match'",
     "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'",
     "method.response.header.Access-Control-Allow-Origin"  = "'*'"
   }
+  content_handling = "CONVERT_TO_TEXT"
 }
 
 resource "aws_api_gateway_method_response" "contacts_get" {
@@ -540,7 +811,7 @@ resource "aws_api_gateway_integration_response" "contacts_get" {
   status_code = aws_api_gateway_method_response.contacts_get.status_code
 
   response_parameters = {
-    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Api-Key'",
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Api-Key,If-None-Match'",
     "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'",
     "method.response.header.Access-Control-Allow-Origin"  = "'*'"
   }
@@ -553,7 +824,7 @@ resource "aws_api_gateway_integration_response" "permissions_get" {
   status_code = "200"
 
   response_parameters = {
-    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Api-Key'",
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Api-Key,If-None-Match'",
     "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'",
     "method.response.header.Access-Control-Allow-Origin"  = "'*'"
   }
@@ -36,6 +36,9 @@ resource "aws_iam_role_policy" "lambda_dynamodb" {
           "dynamodb:GetItem",
           "dynamodb:PutItem",
           "dynamodb:DeleteItem",
+          "dynamodb:UpdateItem",
+          "dynamodb:BatchWriteItem",
+          "dynamodb:BatchGetItem",
           "dynamodb:Query",
           "dynamodb:Scan"
         ]
@@ -43,6 +46,10 @@ resource "aws_iam_role_policy" "lambda_dynamodb" {
           aws_dynamodb_table.group_permissions.arn,
           aws_dynamodb_table.user_groups.arn,
           aws_dynamodb_table.contact_information.arn,
+          aws_dynamodb_table.directory_metadata.arn,
+          aws_dynamodb_table.directory_changes.arn,
+          aws_dynamodb_table.group_summaries.arn,
+          aws_dynamodb_table.directory_search.arn,
           "${aws_dynamodb_table.group_permissions.arn}/index/*",
           "${aws_dynamodb_table.user_groups.arn}/index/*"
         ]
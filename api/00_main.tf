@@ -98,10 +98,92 @@ resource "aws_dynamodb_table" "contact_information" {
   }
 }
 
+# Small bookkeeping items such as the directory revision used for cache invalidation
+resource "aws_dynamodb_table" "directory_metadata" {
+  name           = "directory-metadata"
+  billing_mode   = "PAY_PER_REQUEST"
+  hash_key       = "name"
+
+  attribute {
+    name = "name"
+    type = "S"
+  }
+
+  tags = {
+    Environment = var.environment
+  }
+}
+
+# Ordered log of directory writes, one item per revision
+resource "aws_dynamodb_table" "directory_changes" {
+  name           = "directory-changes"
+  billing_mode   = "PAY_PER_REQUEST"
+  hash_key       = "log"
+  range_key      = "revision"
+
+  attribute {
+    name = "log"
+    type = "S"
+  }
+
+  attribute {
+    name = "revision"
+    type = "N"
+  }
+
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  tags = {
+    Environment = var.environment
+  }
+}
+
+# One summary item per group (member and permission counts, contact types) for the group catalog
+resource "aws_dynamodb_table" "group_summaries" {
+  name           = "group-summaries"
+  billing_mode   = "PAY_PER_REQUEST"
+  hash_key       = "group_name"
+
+  attribute {
+    name = "group_name"
+    type = "S"
+  }
+
+  tags = {
+    Environment = var.environment
+  }
+}
+
+# Prefix search entries, partitioned by kind and first letter and sorted by lowercased name
+resource "aws_dynamodb_table" "directory_search" {
+  name           = "directory-search"
+  billing_mode   = "PAY_PER_REQUEST"
+  hash_key       = "bucket"
+  range_key      = "term"
+
+  attribute {
+    name = "bucket"
+    type = "S"
+  }
+
+  attribute {
+    name = "term"
+    type = "S"
+  }
+
+  tags = {
+    Environment = var.environment
+  }
+}
+
 # Lambda deployment package
 resource "null_resource" "lambda_zip" {
   triggers = {
     lambda_file = filemd5("${path.module}/lambda_function.py")
+    storage_file = filemd5("${path.module}/storage.py")
     requirements = filemd5("${path.module}/requirements.txt")
     build_script = filemd5("${path.module}/build_lambda.sh")
   }
@@ -133,6 +215,12 @@ resource "aws_lambda_function" "directory_service" {
       GROUP_PERMISSIONS_TABLE = aws_dynamodb_table.group_permissions.name
       USER_GROUPS_TABLE      = aws_dynamodb_table.user_groups.name
       CONTACT_INFO_TABLE     = aws_dynamodb_table.contact_information.name
+      DIRECTORY_META_TABLE   = aws_dynamodb_table.directory_metadata.name
+      DIRECTORY_CHANGES_TABLE = aws_dynamodb_table.directory_changes.name
+      GROUP_SUMMARY_TABLE     = aws_dynamodb_table.group_summaries.name
+      SEARCH_INDEX_TABLE      = aws_dynamodb_table.directory_search.name
+      POWERTOOLS_SERVICE_NAME = "directory-service"
+      METRICS_NAMESPACE       = "DirectoryService"
     }
   }
 
@@ -149,6 +237,11 @@ resource "aws_api_gateway_rest_api" "directory_service" {
     types = ["REGIONAL"]
   }
 
+  # Lets the Lambda return gzip encoded (base64) bodies such as /v1/snapshot.
+  # The MOCK OPTIONS integrations set content_handling to CONVERT_TO_TEXT so
+  # their mapping templates still apply.
+  binary_media_types = ["*/*"]
+
   policy = jsonencode({
     Version = "2012-10-17"
     Statement = [
@@ -202,7 +295,27 @@ resource "aws_api_gateway_deployment" "directory_service" {
       aws_api_gateway_method.users_get.id,
       aws_api_gateway_integration.users_get.id,
       aws_api_gateway_method.users_options.id,
-      aws_api_gateway_integration.users_options.id
+      aws_api_gateway_integration.users_options.id,
+      aws_api_gateway_method.authorize_get.id,
+      aws_api_gateway_integration.authorize_get.id,
+      aws_api_gateway_method.admin_batch_post.id,
+      aws_api_gateway_integration.admin_batch_post.id,
+      aws_api_gateway_method.group_roster_get.id,
+      aws_api_gateway_integration.group_roster_get.id,
+      aws_api_gateway_method.groups_get.id,
+      aws_api_gateway_integration.groups_get.id,
+      aws_api_gateway_method.snapshot_get.id,
+      aws_api_gateway_integration.snapshot_get.id,
+      aws_api_gateway_method.changes_get.id,
+      aws_api_gateway_integration.changes_get.id,
+      aws_api_gateway_method.search_get.id,
+      aws_api_gateway_integration.search_get.id,
+      aws_api_gateway_method.admin_group_members_put.id,
+      aws_api_gateway_integration.admin_group_members_put.id,
+      aws_api_gateway_method.admin_groups_post.id,
+      aws_api_gateway_integration.admin_groups_post.id,
+      aws_api_gateway_method.user_permissions_get.id,
+      aws_api_gateway_integration.user_permissions_get.id
     ]))
   }
 
@@ -216,7 +329,17 @@ resource "aws_api_gateway_deployment" "directory_service" {
     aws_api_gateway_integration.contacts_get,
     aws_api_gateway_integration.admin_contacts_post,
     aws_api_gateway_integration.admin_contacts_delete,
-    aws_api_gateway_integration.docs_get
+    aws_api_gateway_integration.docs_get,
+    aws_api_gateway_integration.authorize_get,
+    aws_api_gateway_integration.admin_batch_post,
+    aws_api_gateway_integration.group_roster_get,
+    aws_api_gateway_integration.groups_get,
+    aws_api_gateway_integration.snapshot_get,
+    aws_api_gateway_integration.changes_get,
+    aws_api_gateway_integration.search_get,
+    aws_api_gateway_integration.admin_group_members_put,
+    aws_api_gateway_integration.admin_groups_post,
+    aws_api_gateway_integration.user_permissions_get
   ]
 
   lifecycle {
@@ -20,5 +20,10 @@ output "dynamodb_tables" {
   value = {
     group_permissions = aws_dynamodb_table.group_permissions.name
     user_groups      = aws_dynamodb_table.user_groups.name
+    contact_information = aws_dynamodb_table.contact_information.name
+    directory_metadata  = aws_dynamodb_table.directory_metadata.name
+    directory_changes   = aws_dynamodb_table.directory_changes.name
+    group_summaries     = aws_dynamodb_table.group_summaries.name
+    directory_search    = aws_dynamodb_table.directory_search.name
   }
 } 
\ No newline at end of file
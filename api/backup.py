@@ -0,0 +1,422 @@
+"""
+Back up and restore the directory tables as gzip compressed NDJSON.
+
+export scans group-permissions, user-groups and contact-information with
+parallel segmented scans and streams each page to the file as it arrives, so
+memory stays at a few pages however large the tables are. import reads such a
+file back through concurrent BatchWriteItem calls, slows down while DynamoDB
+throttles, and keeps a checkpoint so an interrupted restore carries on where
+it stopped when run again with the same arguments.
+
+    python backup.py export --output directory.ndjson.gz --segments 16
+    python backup.py import --input directory.ndjson.gz --checkpoint restore.json --workers 16
+
+The first line of a backup describes it, every following line is one item as
+{"table": "permissions" | "users" | "contacts", "item": {...}}, and the last
+line holds the item counts. Tables go by the names the batch endpoint uses, so
+a backup restores into differently named tables through the usual *_TABLE
+variables. import only puts items; restore into empty tables for an exact
+copy. Afterwards it rebuilds the group summaries and search index and bumps
+the directory revision, which sends /v1/changes readers back to /v1/snapshot.
+"""
+import argparse
+import gzip
+import io
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+# Must be set before lambda_function is imported
+os.environ.setdefault('POWERTOOLS_TRACE_DISABLED', 'true')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('ROUTE_METRICS', 'false')
+# Every worker thread holds a DynamoDB connection while its call is in flight
+os.environ.setdefault('DYNAMODB_MAX_POOL_CONNECTIONS', '64')
+
+import lambda_function  # noqa: E402
+
+BACKUP_FORMAT = 'directory-backup'
+BACKUP_VERSION = 1
+SCAN_PAGE_SIZE = 1000
+PROGRESS_SECONDS = 10
+CHECKPOINT_SECONDS = 5
+# Adaptive backoff shared by the import workers
+BACKOFF_MIN_SECONDS = 0.05
+BACKOFF_MAX_SECONDS = 20.0
+IMPORT_MAX_ATTEMPTS = 30
+
+
+def backup_tables(names: Optional[List[str]] = None) -> Dict[str, str]:
+    """Tables to back up, by the name used in backups, as batch_tables() names them"""
+    tables = {name: spec['table'] for name, spec in lambda_function.batch_tables().items()}
+    if names:
+        unknown = set(names) - set(tables)
+        if unknown:
+            raise ValueError(f"unknown tables: {', '.join(sorted(unknown))}; choose from {', '.join(tables)}")
+        tables = {name: tables[name] for name in names}
+    return tables
+
+
+def json_default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def progress(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+
+def open_output(path: str) -> Tuple[io.TextIOWrapper, Optional[str]]:
+    """Text stream gzip compressing into path ('-' for stdout), plus the partial file to rename when done"""
+    if path == '-':
+        raw = gzip.GzipFile(fileobj=sys.stdout.buffer, mode='wb', compresslevel=6)
+        return io.TextIOWrapper(raw, encoding='utf-8'), None
+    partial = path + '.partial'
+    return io.TextIOWrapper(gzip.open(partial, 'wb', compresslevel=6), encoding='utf-8'), partial
+
+
+def open_input(path: str) -> io.TextIOWrapper:
+    raw = gzip.GzipFile(fileobj=sys.stdin.buffer, mode='rb') if path == '-' else gzip.open(path, 'rb')
+    return io.TextIOWrapper(raw, encoding='utf-8')
+
+
+def export(output: str, tables: Dict[str, str], segments: int, workers: int) -> Dict:
+    """
+    Stream every item of tables into a backup.
+
+    Each table is scanned in segments pages at a time on workers threads. The
+    pages go through a bounded queue to the one thread writing the file, so a
+    slow disk holds the scans back instead of piling pages up in memory.
+    """
+    revision = lambda_function.read_revision(consistent=True)
+    pages: queue.Queue = queue.Queue(maxsize=workers * 2)
+    stop = threading.Event()
+
+    def offer(entry) -> bool:
+        while not stop.is_set():
+            try:
+                pages.put(entry, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def scan_segment(name: str, table_name: str, segment: int) -> None:
+        try:
+            table = lambda_function.get_table(table_name)
+            kwargs = {'Segment': segment, 'TotalSegments': segments, 'Limit': SCAN_PAGE_SIZE}
+            while True:
+                response = table.scan(**kwargs)
+                if response['Items'] and not offer((name, response['Items'])):
+                    return
+                if 'LastEvaluatedKey' not in response:
+                    break
+                kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+            offer((name, None))
+        except Exception as e:
+            offer((name, e))
+
+    stream, partial = open_output(output)
+    counts = {name: 0 for name in tables}
+    started = last_report = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scan') as executor:
+            try:
+                stream.write(json.dumps({
+                    'format': BACKUP_FORMAT,
+                    'version': BACKUP_VERSION,
+                    'created_at': datetime.now(timezone.utc).isoformat(),
+                    'revision': revision,
+                    'tables': list(tables)
+                }) + '\n')
+                for name, table_name in tables.items():
+                    for segment in range(segments):
+                        executor.submit(scan_segment, name, table_name, segment)
+
+                remaining = len(tables) * segments
+                while remaining:
+                    name, items = pages.get()
+                    if items is None:
+                        remaining -= 1
+                        continue
+                    if isinstance(items, Exception):
+                        raise items
+                    for item in items:
+                        stream.write(json.dumps({'table': name, 'item': item}, default=json_default) + '\n')
+                    counts[name] += len(items)
+                    if time.monotonic() - last_report >= PROGRESS_SECONDS:
+                        last_report = time.monotonic()
+                        progress(f"exported {sum(counts.values())} items in {last_report - started:.0f}s")
+            finally:
+                # Unblocks and ends the scans when the export stops early
+                stop.set()
+
+        stream.write(json.dumps({'counts': counts}) + '\n')
+        stream.close()
+    except BaseException:
+        stream.close()
+        if partial:
+            os.remove(partial)
+        raise
+    if partial:
+        os.replace(partial, output)
+
+    if lambda_function.read_revision(consistent=True) != revision:
+        progress(f"warning: the directory changed during the export; writes after revision {revision} may be partly included")
+    return {
+        'output': output,
+        'revision': revision,
+        'counts': counts,
+        'seconds': round(time.monotonic() - started, 2)
+    }
+
+
+class Throttle:
+    """
+    Pause shared by all import workers. It doubles whenever DynamoDB throttles
+    or leaves items unprocessed and decays as batches go through, so the
+    workers together settle near the rate the tables can take.
+    """
+
+    def __init__(self):
+        self.delay = 0.0
+        self.throttles = 0
+        self._lock = threading.Lock()
+
+    def throttled(self) -> None:
+        with self._lock:
+            self.throttles += 1
+            self.delay = min(BACKOFF_MAX_SECONDS, max(BACKOFF_MIN_SECONDS, self.delay * 2))
+
+    def succeeded(self) -> None:
+        with self._lock:
+            self.delay = self.delay * 0.9 if self.delay > BACKOFF_MIN_SECONDS else 0.0
+
+    def pause(self) -> None:
+        delay = self.delay
+        if delay:
+            time.sleep(random.uniform(delay / 2, delay))
+
+
+def write_batch(requests: Dict[str, List[Dict]], throttle: Throttle) -> None:
+    """Put one batch of up to 25 items, retrying unprocessed items and throttled calls"""
+    pending = requests
+    for _ in range(IMPORT_MAX_ATTEMPTS):
+        throttle.pause()
+        try:
+            response = lambda_function.get_storage().batch_write_item(RequestItems=pending)
+        except Exception as e:
+            if getattr(e, 'response', {}).get('Error', {}).get('Code') not in lambda_function.THROTTLING_ERRORS:
+                raise
+            throttle.throttled()
+            continue
+        pending = response.get('UnprocessedItems') or {}
+        if not pending:
+            throttle.succeeded()
+            return
+        throttle.throttled()
+    raise RuntimeError(f'{sum(len(items) for items in pending.values())} items still unprocessed after {IMPORT_MAX_ATTEMPTS} attempts')
+
+
+class Checkpoint:
+    """
+    How many lines of a backup are known to be written, kept in a JSON file.
+
+    Batches finish out of order, so the checkpoint only moves past a batch
+    once every batch before it has finished too.
+    """
+
+    def __init__(self, path: Optional[str], backup: Dict):
+        self.path = path
+        self.backup = {'created_at': backup.get('created_at'), 'revision': backup.get('revision')}
+        self.line = 0
+        self.items = 0
+        self.saved_at = time.monotonic()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            if state.get('backup') != self.backup:
+                raise ValueError(f'{path} is the checkpoint of another backup; remove it to start over')
+            self.line = state['line']
+            self.items = state['items']
+
+    def advance(self, line: int, items: int) -> None:
+        self.line = line
+        self.items += items
+        if time.monotonic() - self.saved_at >= CHECKPOINT_SECONDS:
+            self.save()
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with open(self.path + '.tmp', 'w') as f:
+            json.dump({
+                'backup': self.backup,
+                'line': self.line,
+                'items': self.items,
+                'saved_at': datetime.now(timezone.utc).isoformat()
+            }, f)
+        os.replace(self.path + '.tmp', self.path)
+        self.saved_at = time.monotonic()
+
+    def remove(self) -> None:
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def read_backup(stream: io.TextIOWrapper) -> Tuple[Dict, Iterator[Tuple[int, str]]]:
+    """The backup's header and an iterator over its numbered lines after it"""
+    header = json.loads(stream.readline() or '{}')
+    if header.get('format') != BACKUP_FORMAT:
+        raise ValueError('not a directory backup')
+    if header.get('version') != BACKUP_VERSION:
+        raise ValueError(f"backup version {header.get('version')} is not supported")
+    return header, enumerate(stream, start=1)
+
+
+def restore(source: str, tables: Dict[str, str], workers: int, checkpoint_path: Optional[str], rebuild: bool) -> Dict:
+    """
+    Put every item of a backup into tables.
+
+    Items are grouped into BatchWriteItem calls of 25 with at most two batches
+    per worker in flight; lines before the checkpoint are skipped unparsed.
+    """
+    stream = open_input(source)
+    header, lines = read_backup(stream)
+    checkpoint = Checkpoint(checkpoint_path, header)
+    resumed_from = checkpoint.items
+    throttle = Throttle()
+    # (line after the batch, items in it, its future), in the order submitted
+    in_flight: Deque[Tuple[int, int, Future]] = deque()
+    counts = {name: 0 for name in tables}
+    trailer = None
+    started = last_report = time.monotonic()
+
+    def settle(block: bool) -> None:
+        """Wait for a batch when too many are in flight, then advance the checkpoint past finished ones"""
+        if block:
+            wait([future for _, _, future in in_flight], return_when=FIRST_COMPLETED)
+        while in_flight and in_flight[0][2].done():
+            line, size, future = in_flight[0]
+            # A failed batch raises here and stays first, so the checkpoint never passes it
+            future.result()
+            in_flight.popleft()
+            checkpoint.advance(line, size)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='write') as executor:
+        try:
+            batch, batch_size = {}, 0
+            number = checkpoint.line
+            for number, line in lines:
+                if number <= checkpoint.line:
+                    continue
+                entry = json.loads(line, parse_float=Decimal)
+                if 'counts' in entry:
+                    trailer = entry['counts']
+                    continue
+                if entry['table'] not in tables:
+                    continue
+                batch.setdefault(tables[entry['table']], []).append({'PutRequest': {'Item': entry['item']}})
+                batch_size += 1
+                counts[entry['table']] += 1
+                if batch_size == lambda_function.BATCH_WRITE_SIZE:
+                    in_flight.append((number, batch_size, executor.submit(write_batch, batch, throttle)))
+                    batch, batch_size = {}, 0
+                    settle(len(in_flight) >= workers * 2)
+
+                if time.monotonic() - last_report >= PROGRESS_SECONDS:
+                    last_report = time.monotonic()
+                    progress(f"imported {checkpoint.items} items in {last_report - started:.0f}s"
+                             f" (backoff {throttle.delay:.2f}s, {throttle.throttles} throttled calls)")
+
+            if batch:
+                in_flight.append((number, batch_size, executor.submit(write_batch, batch, throttle)))
+            while in_flight:
+                settle(True)
+            checkpoint.line = number
+        except BaseException:
+            for _, _, future in in_flight:
+                future.cancel()
+            # Record the batches that did finish before giving up
+            while in_flight and in_flight[0][2].done() and not in_flight[0][2].cancelled() \
+                    and in_flight[0][2].exception() is None:
+                line, size, _ = in_flight.popleft()
+                checkpoint.line, checkpoint.items = line, checkpoint.items + size
+            checkpoint.save()
+            raise
+        finally:
+            stream.close()
+
+    if trailer is None:
+        checkpoint.save()
+        raise RuntimeError('the backup ends before its item counts; it was cut short, so the restore is incomplete')
+    if not resumed_from and any(trailer.get(name, 0) != count for name, count in counts.items()):
+        checkpoint.save()
+        raise RuntimeError(f'the backup holds {trailer} items but {counts} were read from it')
+    checkpoint.remove()
+
+    if rebuild:
+        # The items went straight into storage, so the derived tables are rebuilt
+        # and the revision moved for caches and change log readers
+        lambda_function.rebuild_group_summaries()
+        lambda_function.rebuild_search_index()
+        lambda_function.bump_revision()
+    return {
+        'input': source,
+        'backup_revision': header.get('revision'),
+        'resumed_after_items': resumed_from,
+        'counts': counts,
+        'throttled_calls': throttle.throttles,
+        'seconds': round(time.monotonic() - started, 2)
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = commands.add_parser('export', help='write the tables to a backup')
+    export_parser.add_argument('--output', required=True, help="backup file, or '-' for stdout")
+    export_parser.add_argument('--segments', type=int, default=8, help='parallel scan segments per table')
+    export_parser.add_argument('--workers', type=int, default=16, help='threads running segment scans')
+
+    import_parser = commands.add_parser('import', help='put the items of a backup into the tables')
+    import_parser.add_argument('--input', required=True, help="backup file, or '-' for stdin")
+    import_parser.add_argument('--workers', type=int, default=16, help='threads writing batches')
+    import_parser.add_argument('--checkpoint', help='progress file; rerun with the same one to resume')
+    import_parser.add_argument('--no-rebuild', action='store_true',
+                               help='skip rebuilding the group summaries and search index afterwards')
+
+    for command in (export_parser, import_parser):
+        command.add_argument('--tables', help='comma separated subset of permissions, users and contacts')
+    args = parser.parse_args(argv)
+
+    try:
+        tables = backup_tables(lambda_function.split_list_param(args.tables))
+    except ValueError as e:
+        parser.error(str(e))
+    if args.workers < 1 or getattr(args, 'segments', 1) < 1:
+        parser.error('--workers and --segments must be at least 1')
+
+    if args.command == 'export':
+        report = export(args.output, tables, args.segments, args.workers)
+    else:
+        if args.checkpoint and args.input == '-':
+            parser.error('--checkpoint needs a backup file to read again; it cannot resume from stdin')
+        report = restore(args.input, tables, args.workers, args.checkpoint, not args.no_rebuild)
+    progress(json.dumps(report, indent=2, sort_keys=True))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Benchmark the Directory Service routes against a synthetic directory.
+
+Builds a directory of the requested size in the storage backend (the local
+SQLite stand-in unless STORAGE_BACKEND is set otherwise), drives every route
+through lambda_handler with API Gateway style events, and prints a JSON
+report with p50/p99 latency, storage calls and items read per request.
+
+    python benchmark.py --users 10000 --groups 1000 --permissions 50000 > bench.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+# Must be set before lambda_function is imported
+os.environ.setdefault('STORAGE_BACKEND', 'sqlite')
+os.environ.setdefault('POWERTOOLS_TRACE_DISABLED', 'true')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+# Keep the EMF metric lines out of the JSON report on stdout
+os.environ.setdefault('ROUTE_METRICS', 'false')
+
+import lambda_function  # noqa: E402
+
+ACTIONS = ['deploy', 'ProductionApproval', 'read', 'write', 'admin', 'rollback']
+CONTACT_TYPES = ['slack', 'email', 'pagerduty']
+
+
+class SlowTable:
+    """Wraps a Table, or the backend itself, so every call first sleeps for a simulated round trip"""
+
+    def __init__(self, target, latency: float):
+        self._target = target
+        self._latency = latency
+
+    def Table(self, name: str) -> 'SlowTable':
+        return SlowTable(self._target.Table(name), self._latency)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if not callable(attribute):
+            return attribute
+
+        def slowed(*args, **kwargs):
+            time.sleep(self._latency)
+            return attribute(*args, **kwargs)
+        return slowed
+
+
+class UsageRecorder:
+    """
+    Keeps the RequestUsage of the last request lambda_handler answered.
+
+    lambda_handler already meters every storage call through MeteredStorage,
+    so the report reads its numbers instead of counting the calls again.
+    """
+
+    def __init__(self):
+        self.usage = lambda_function.RequestUsage()
+        self._emit = lambda_function.emit_route_metrics
+        lambda_function.emit_route_metrics = self.emit
+
+    def emit(self, route: str, latency_ms: float, usage, response: Dict) -> None:
+        self.usage = usage
+        self._emit(route, latency_ms, usage, response)
+
+
+class Context:
+    """Minimal LambdaContext for calling lambda_handler directly"""
+    function_name = 'directory-service-benchmark'
+    memory_limit_in_mb = 512
+    invoked_function_arn = 'arn:aws:lambda:us-east-1:000000000000:function:directory-service-benchmark'
+    aws_request_id = 'benchmark'
+
+    def get_remaining_time_in_millis(self) -> int:
+        return 30000
+
+
+def populate(rng: random.Random, users: int, groups: int, permissions: int, services: int) -> Dict[str, List[str]]:
+    """Write a synthetic directory straight into storage and return the names used"""
+    group_names = [f'group-{i:05d}' for i in range(groups)]
+    user_ids = [f'user-{i:06d}@example.com' for i in range(users)]
+    service_names = [f'service-{i:04d}' for i in range(services)]
+
+    requests = []
+    for user_id in user_ids:
+        for group_name in rng.sample(group_names, min(len(group_names), rng.randint(1, 3))):
+            requests.append((lambda_function.USER_GROUPS_TABLE, {'PutRequest': {
+                'Item': lambda_function.membership_record({'user_id': user_id, 'group_name': group_name})
+            }}))
+        requests.append((lambda_function.CONTACT_INFO_TABLE, {'PutRequest': {
+            'Item': lambda_function.contact_record({'target': user_id, 'type': 'slack', 'data': '@' + user_id.split('@')[0]})
+        }}))
+    for group_name in group_names:
+        for contact_type in CONTACT_TYPES[:2]:
+            requests.append((lambda_function.CONTACT_INFO_TABLE, {'PutRequest': {
+                'Item': lambda_function.contact_record({'target': group_name, 'type': contact_type, 'data': f'#{group_name}'})
+            }}))
+
+    seen = set()
+    while len(seen) < permissions:
+        roll = rng.random()
+        # A small share of wildcard grants, as in real directories
+        service = 'all' if roll < 0.01 else rng.choice(service_names)
+        action = 'all' if 0.01 <= roll < 0.06 else rng.choice(ACTIONS)
+        key = (rng.choice(group_names), service, action)
+        if key in seen:
+            continue
+        seen.add(key)
+        requests.append((lambda_function.GROUP_PERMISSIONS_TABLE, {'PutRequest': {
+            'Item': lambda_function.permission_record({'group_name': key[0], 'service': service, 'action': action})
+        }}))
+
+    failures = lambda_function.run_batch_write(requests)
+    if failures:
+        raise RuntimeError(f'{len(failures)} items could not be written')
+    # The rows went straight into storage, so the group summaries and search index are built in one pass
+    lambda_function.rebuild_group_summaries()
+    lambda_function.rebuild_search_index()
+    return {'users': user_ids, 'groups': group_names, 'services': service_names}
+
+
+def routes(names: Dict[str, List[str]], rng: random.Random) -> Dict[str, Callable[[], Dict]]:
+    """Route name -> function producing a fresh API Gateway event for that route"""
+    user = lambda: rng.choice(names['users'])
+    group = lambda: rng.choice(names['groups'])
+    service = lambda: rng.choice(names['services'])
+    action = lambda: rng.choice(ACTIONS)
+
+    def get(path: str, params: Dict = None) -> Dict:
+        return {
+            'httpMethod': 'GET',
+            'path': path,
+            'resource': path,
+            'queryStringParameters': params,
+            'multiValueQueryStringParameters': {k: [v] for k, v in (params or {}).items()} or None,
+            'headers': {'Accept': 'application/json', 'x-api-key': 'benchmark'},
+            'body': None,
+            'isBase64Encoded': False
+        }
+
+    return {
+        'permissions_page': lambda: get('/v1/permissions', {'limit': '100'}),
+        'permissions_by_group': lambda: get('/v1/permissions', {'group_name': group()}),
+        'permissions_by_service': lambda: get('/v1/permissions', {'service': service()}),
+        'permissions_by_service_action': lambda: get('/v1/permissions', {'service': service(), 'action': action()}),
+        'users_page': lambda: get('/v1/users', {'limit': '100'}),
+        'users_by_user': lambda: get('/v1/users', {'user_id': user()}),
+        'users_by_group': lambda: get('/v1/users', {'group_name': group()}),
+        'contacts_by_target': lambda: get('/v1/contacts', {'target': group()}),
+        'contacts_multi_target': lambda: get('/v1/contacts', {'target': ','.join(user() for _ in range(10)), 'type': 'slack'}),
+        'authorize': lambda: get('/v1/authorize', {'user_id': user(), 'service': service(), 'action': action()}),
+        'user_permissions': lambda: get(f'/v1/users/{user()}/permissions'),
+        'groups': lambda: get('/v1/groups'),
+        'search_users': lambda: get('/v1/search', {'prefix': user()[:7], 'kind': 'user'}),
+        'search_groups': lambda: get('/v1/search', {'prefix': group()[:8], 'kind': 'group', 'limit': '20'}),
+        'group_roster': lambda: get(f'/v1/groups/{group()}/roster', {'contact_type': 'slack'}),
+        'changes': lambda: get('/v1/changes', {'since': '0', 'limit': '100'}),
+        'docs': lambda: get('/v1/docs'),
+    }
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(round(fraction * (len(ordered) - 1)))]
+
+
+def run(route_events: Dict[str, Callable[[], Dict]], iterations: int, recorder: UsageRecorder) -> Dict[str, Dict]:
+    context = Context()
+    report = {}
+    for name, make_event in route_events.items():
+        latencies, calls, items, capacity, statuses = [], [], [], [], {}
+        for _ in range(iterations):
+            event = make_event()
+            started = time.perf_counter()
+            response = lambda_function.lambda_handler(event, context)
+            latencies.append((time.perf_counter() - started) * 1000)
+            calls.append(recorder.usage.calls)
+            items.append(recorder.usage.items_scanned)
+            capacity.append(recorder.usage.read_units + recorder.usage.write_units)
+            status = str(response['statusCode'])
+            statuses[status] = statuses.get(status, 0) + 1
+        report[name] = {
+            'requests': iterations,
+            'p50_ms': round(percentile(latencies, 0.50), 3),
+            'p99_ms': round(percentile(latencies, 0.99), 3),
+            'mean_ms': round(sum(latencies) / iterations, 3),
+            'storage_calls_per_request': round(sum(calls) / iterations, 2),
+            'items_read_per_request': round(sum(items) / iterations, 2),
+            'capacity_units_per_request': round(sum(capacity) / iterations, 2),
+            'status_codes': statuses
+        }
+    return report
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--groups', type=int, default=1000)
+    parser.add_argument('--permissions', type=int, default=50000)
+    parser.add_argument('--services', type=int, default=500)
+    parser.add_argument('--iterations', type=int, default=200, help='requests per route')
+    parser.add_argument('--routes', help='comma separated subset of routes to run')
+    parser.add_argument('--latency-ms', type=float, default=0.0,
+                        help='simulated DynamoDB round trip added to every storage call')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--cache', action='store_true', help='leave the warm-container read cache on')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args(argv)
+
+    if not args.cache:
+        lambda_function.read_cache.ttl = 0
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    names = populate(rng, args.users, args.groups, args.permissions, args.services)
+    populate_seconds = time.perf_counter() - started
+
+    if args.latency_ms:
+        lambda_function.use_storage(SlowTable(lambda_function.get_storage().target, args.latency_ms / 1000))
+    recorder = UsageRecorder()
+
+    route_events = routes(names, rng)
+    if args.routes:
+        wanted = args.routes.split(',')
+        unknown = set(wanted) - set(route_events)
+        if unknown:
+            parser.error(f"unknown routes: {', '.join(sorted(unknown))}")
+        route_events = {name: route_events[name] for name in wanted}
+
+    report = {
+        'config': {
+            'storage_backend': os.environ['STORAGE_BACKEND'],
+            'users': args.users,
+            'groups': args.groups,
+            'permissions': args.permissions,
+            'services': args.services,
+            'iterations': args.iterations,
+            'latency_ms': args.latency_ms,
+            'seed': args.seed,
+            'cache': args.cache,
+            'populate_seconds': round(populate_seconds, 2)
+        },
+        'routes': run(route_events, args.iterations, recorder),
+        'init': lambda_function.init_report
+    }
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
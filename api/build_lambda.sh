@@ -4,8 +4,8 @@
 rm -rf package
 mkdir -p package
 
-# Copy lambda function
-cp lambda_function.py package/
+# Copy lambda function and its local modules
+cp lambda_function.py storage.py package/
 
 # Install dependencies
 python -m pip install --upgrade pip
@@ -1,175 +1,927 @@
+import base64
+import binascii
+import contextvars
+import functools
+import gzip
+import hashlib
 import json
 import os
-from typing import Dict, List, Optional
+import random
+import re
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
-import boto3
-from aws_lambda_powertools import Logger, Tracer
+# Start of the init phase as far as the init report is concerned
+_init_started = time.perf_counter()
+
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.metrics import MetricUnit
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
+# LAZY_INIT=false builds the storage client and table handles during init,
+# which suits provisioned concurrency; by default they are built on first use
+LAZY_INIT = os.environ.get('LAZY_INIT', 'true').lower() != 'false'
+TRACING_ENABLED = os.environ.get('TRACING_ENABLED', 'false').lower() == 'true'
+# ROUTE_METRICS=false stops the per-request metric lines, e.g. for local tools writing to stdout
+ROUTE_METRICS_ENABLED = os.environ.get('ROUTE_METRICS', 'true').lower() != 'false'
+API_VERSION = os.environ.get('API_VERSION', '1.0.0')
+
+class NoopTracer:
+    """Stands in for the powertools Tracer when X-Ray tracing is off"""
+
+    @staticmethod
+    def capture_lambda_handler(func: Callable) -> Callable:
+        return func
+
+    @staticmethod
+    def capture_method(func: Callable) -> Callable:
+        return func
+
+    @staticmethod
+    def put_annotation(key: str, value: Any) -> None:
+        pass
+
 logger = Logger()
-tracer = Tracer()
-dynamodb = boto3.resource('dynamodb')
+metrics = Metrics(namespace=os.environ.get('METRICS_NAMESPACE', 'DirectoryService'))
+if TRACING_ENABLED:
+    # Building a Tracer imports the X-Ray SDK, which dominates cold starts
+    from aws_lambda_powertools import Tracer
+    tracer = Tracer()
+else:
+    tracer = NoopTracer()
+
+# Startup timings, logged once alongside the first request a container serves
+init_report = {
+    'lazy_init': LAZY_INIT,
+    'tracing': TRACING_ENABLED,
+    'module_ms': None,
+    'storage_ms': None,
+    'first_request_ms': None
+}
 
 # Table names will be set via environment variables
 GROUP_PERMISSIONS_TABLE = os.environ.get('GROUP_PERMISSIONS_TABLE', 'group-permissions')
 USER_GROUPS_TABLE = os.environ.get('USER_GROUPS_TABLE', 'user-groups')
+CONTACT_INFO_TABLE = os.environ.get('CONTACT_INFO_TABLE', 'contact-information')
+DIRECTORY_META_TABLE = os.environ.get('DIRECTORY_META_TABLE', 'directory-metadata')
+DIRECTORY_CHANGES_TABLE = os.environ.get('DIRECTORY_CHANGES_TABLE', 'directory-changes')
+GROUP_SUMMARY_TABLE = os.environ.get('GROUP_SUMMARY_TABLE', 'group-summaries')
+SEARCH_INDEX_TABLE = os.environ.get('SEARCH_INDEX_TABLE', 'directory-search')
+
+# Key schema of every table as (hash key, range key), plus its global secondary
+# indexes. Mirrors 00_main.tf; the local storage backend builds its tables from it.
+TABLE_SCHEMAS = {
+    GROUP_PERMISSIONS_TABLE: {
+        'key': ('group_name', 'service_action'),
+        'indexes': {
+            'ServiceActionIndex': ('service_action', None),
+            'ServiceIndex': ('service', 'action')
+        }
+    },
+    USER_GROUPS_TABLE: {
+        'key': ('user_id', 'group_name'),
+        'indexes': {
+            'GroupNameIndex': ('group_name', None)
+        }
+    },
+    CONTACT_INFO_TABLE: {
+        'key': ('target', 'type')
+    },
+    DIRECTORY_META_TABLE: {
+        'key': ('name', None)
+    },
+    DIRECTORY_CHANGES_TABLE: {
+        'key': ('log', 'revision')
+    },
+    GROUP_SUMMARY_TABLE: {
+        'key': ('group_name', None)
+    },
+    SEARCH_INDEX_TABLE: {
+        'key': ('bucket', 'term')
+    }
+}
+
+# Connection pool size of each thread's DynamoDB resource. A thread makes one
+# call at a time, so botocore's default of 10 leaves plenty of room
+DYNAMODB_MAX_POOL_CONNECTIONS = int(os.environ.get('DYNAMODB_MAX_POOL_CONNECTIONS', '10'))
+
+def create_storage():
+    """
+    Build the storage backend named by STORAGE_BACKEND.
+
+    'dynamodb' (the default) is the boto3 service resource, one per thread.
+    'sqlite' is the local stand-in from storage.py, kept at SQLITE_PATH (in
+    memory by default), for running and profiling the handlers without AWS.
+    """
+    backend = os.environ.get('STORAGE_BACKEND', 'dynamodb')
+    if backend == 'sqlite':
+        import storage
+        return storage.SQLiteBackend(os.environ.get('SQLITE_PATH', ':memory:'), TABLE_SCHEMAS), storage.ConditionalCheckFailedException
+    if backend == 'dynamodb':
+        import boto3
+        from botocore.config import Config
+        resource = ThreadLocalResource(boto3.session.Session(), Config(max_pool_connections=DYNAMODB_MAX_POOL_CONNECTIONS))
+        return resource, resource.exceptions.ConditionalCheckFailedException
+    raise ValueError(f"Unknown STORAGE_BACKEND {backend}")
+
+class ThreadLocalResource:
+    """
+    Stands in for the boto3 DynamoDB resource, which is not thread-safe, by
+    building one per thread from a shared session.
+
+    The exception classes come from one low-level client built up front, so
+    no resource is built on the importing thread. Resources from the same
+    session share those classes, so a ConditionalCheckFailedException raised
+    on any thread is caught by them. Everything else, meta included, goes to
+    the calling thread's resource, whose client serializes plain values for
+    transact_write.
+
+    Each thread's resource and its Table objects live in one thread-local slot,
+    freed when the thread ends. The request and fan-out pools keep their
+    threads for the life of the process, so the resources held are bounded by
+    their size: FANOUT_WORKERS plus the invoking thread in Lambda, and
+    SERVER_THREADS more under server.py.
+    """
+
+    def __init__(self, session, config):
+        self._session = session
+        self._config = config
+        self._local = threading.local()
+        # Sessions are not thread-safe either, so build from them one at a time
+        self._lock = threading.Lock()
+        with self._lock:
+            self.exceptions = session.client('dynamodb', config=config).exceptions
+
+    def resource(self):
+        """Return this thread's resource, building it on first use"""
+        resource = getattr(self._local, 'resource', None)
+        if resource is None:
+            with self._lock:
+                resource = self._session.resource('dynamodb', config=self._config)
+            self._local.resource = resource
+            self._local.tables = {}
+        return resource
+
+    def thread_table(self, name: str):
+        """Return the Table for name on this thread's resource"""
+        resource = self.resource()
+        table = self._local.tables.get(name)
+        if table is None:
+            table = self._local.tables[name] = resource.Table(name)
+        return table
+
+    def Table(self, name: str) -> 'ThreadLocalTable':
+        return ThreadLocalTable(self, name)
+
+    def __getattr__(self, name: str):
+        return getattr(self.resource(), name)
+
+class ThreadLocalTable:
+    """A Table handle that can be cached and shared, resolving to a Table on the calling thread's resource"""
+
+    def __init__(self, owner: ThreadLocalResource, name: str):
+        self._owner = owner
+        self.name = name
+
+    def __getattr__(self, name: str):
+        return getattr(self._owner.thread_table(self.name), name)
+
+class ConditionalCheckFailedException(Exception):
+    """Placeholder until get_storage() swaps in the backend's own exception class"""
+
+# DynamoDB service resource (or a stand-in offering the same Table API) and
+# the Table handles built from it, shared by every invocation in a container;
+# for DynamoDB each thread resolves these to its own boto3 resource
+_storage = None
+_tables: Dict[str, Any] = {}
+
+def get_storage():
+    """Return the storage backend, building it on first use"""
+    global _storage, ConditionalCheckFailedException
+    if _storage is None:
+        started = time.perf_counter()
+        backend, ConditionalCheckFailedException = create_storage()
+        _storage = MeteredStorage(backend)
+        init_report['storage_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return _storage
+
+def use_storage(backend, conditional_check_failed=None) -> None:
+    """Swap in a different storage backend, e.g. an instrumented one"""
+    global _storage, ConditionalCheckFailedException
+    _storage = MeteredStorage(backend)
+    if conditional_check_failed is not None:
+        ConditionalCheckFailedException = conditional_check_failed
+    _tables.clear()
+
+def get_table(name: str):
+    """Return the cached Table handle for a table name"""
+    table = _tables.get(name)
+    if table is None:
+        table = _tables[name] = get_storage().Table(name)
+    return table
+
+# Storage calls that consume capacity, and so are metered
+READ_OPERATIONS = frozenset(['get_item', 'query', 'scan', 'batch_get_item', 'transact_get_items'])
+WRITE_OPERATIONS = frozenset(['put_item', 'delete_item', 'update_item', 'batch_write_item', 'transact_write_items'])
+THROTTLING_ERRORS = frozenset(['ProvisionedThroughputExceededException', 'ThrottlingException', 'RequestLimitExceeded'])
+
+class RequestUsage:
+    """DynamoDB usage accumulated over one request, including its fan-out threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.throttles = 0
+        self.retries = 0
+        self.items_scanned = 0
+        self.items_returned = 0
+        self.read_units = 0.0
+        self.write_units = 0.0
+        self.storage_ms = 0.0
+
+    def record(self, operation: str, response: Dict, elapsed_ms: float, error: Optional[Exception] = None) -> None:
+        if 'Items' in response:
+            returned = response.get('Count', len(response['Items']))
+            scanned = response.get('ScannedCount', returned)
+        elif 'Responses' in response:
+            returned = scanned = sum(len(items) for items in response['Responses'].values())
+        else:
+            returned = scanned = 1 if 'Item' in response else 0
+
+        capacity = response.get('ConsumedCapacity') or []
+        if isinstance(capacity, dict):
+            capacity = [capacity]
+        units = sum(float(entry.get('CapacityUnits', 0)) for entry in capacity)
+        error_code = getattr(error, 'response', {}).get('Error', {}).get('Code')
+
+        with self._lock:
+            self.calls += 1
+            self.throttles += error_code in THROTTLING_ERRORS
+            self.retries += response.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+            self.items_scanned += scanned
+            self.items_returned += returned
+            if operation in READ_OPERATIONS:
+                self.read_units += units
+            else:
+                self.write_units += units
+            self.storage_ms += elapsed_ms
+
+# Usage of the request being handled; parallel_map carries it into worker threads
+_request_usage: contextvars.ContextVar = contextvars.ContextVar('request_usage', default=None)
+
+class MeteredStorage:
+    """
+    Wraps the storage backend, or one of its tables, so every DynamoDB call
+    asks for its consumed capacity and is recorded against the current request
+    """
+
+    def __init__(self, target):
+        self.target = target
+
+    def Table(self, name: str) -> 'MeteredStorage':
+        return MeteredStorage(self.target.Table(name))
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.target, name)
+        if name not in READ_OPERATIONS and name not in WRITE_OPERATIONS:
+            return attribute
+
+        @functools.wraps(attribute)
+        def metered(**kwargs):
+            kwargs.setdefault('ReturnConsumedCapacity', 'TOTAL')
+            usage = _request_usage.get()
+            started = time.perf_counter()
+            response, error = {}, None
+            try:
+                response = attribute(**kwargs)
+                return response
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                if usage is not None:
+                    usage.record(name, response, (time.perf_counter() - started) * 1000, error)
+
+        return metered
 
 CORS_HEADERS = {
     'Access-Control-Allow-Origin': '*',
     'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
-    'Access-Control-Allow-Headers': 'Content-Type,X-Api-Key'
+    'Access-Control-Allow-Headers': 'Content-Type,X-Api-Key,If-None-Match',
+    'Access-Control-Expose-Headers': 'ETag,X-Directory-Revision'
+}
+
+# Pagination settings for list endpoints
+PAGINATION_PARAMS = ('limit', 'cursor')
+MAX_PAGE_LIMIT = int(os.environ.get('MAX_PAGE_LIMIT', '1000'))
+
+def encode_cursor(last_evaluated_key: Optional[Dict]) -> Optional[str]:
+    """Wrap a DynamoDB LastEvaluatedKey in an opaque continuation token"""
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(last_evaluated_key, sort_keys=True, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Dict:
+    """Unwrap a continuation token back into an ExclusiveStartKey"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, binascii.Error, UnicodeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(key, dict) or not key:
+        raise ValueError('Invalid cursor')
+    return key
+
+def parse_page_params(params: Optional[Dict]) -> Tuple[Optional[int], Optional[Dict]]:
+    """Read the limit/cursor query parameters, raising ValueError if they are malformed"""
+    params = params or {}
+    limit = None
+    start_key = None
+
+    if params.get('limit') is not None:
+        try:
+            limit = int(params['limit'])
+        except ValueError:
+            raise ValueError('limit must be an integer')
+        if limit < 1 or limit > MAX_PAGE_LIMIT:
+            raise ValueError(f'limit must be between 1 and {MAX_PAGE_LIMIT}')
+
+    if params.get('cursor'):
+        start_key = decode_cursor(params['cursor'])
+
+    return limit, start_key
+
+def strip_listing_params(params: Optional[Dict]) -> Dict:
+    """Return the query parameters without the pagination and fields controls"""
+    return {k: v for k, v in (params or {}).items() if k not in PAGINATION_PARAMS and k != 'fields'}
+
+def is_paged(params: Optional[Dict]) -> bool:
+    """True when the caller asked for a single page rather than the full listing"""
+    return any((params or {}).get(p) is not None for p in PAGINATION_PARAMS)
+
+def read_items(operation, limit: Optional[int] = None, start_key: Optional[Dict] = None, **kwargs) -> Tuple[List[Dict], Optional[Dict]]:
+    """
+    Run a table scan or query and follow LastEvaluatedKey.
+
+    With no limit every page is read and the complete result is returned. With a
+    limit a single page is read and its LastEvaluatedKey is handed back so the
+    caller can continue from there.
+    """
+    if start_key:
+        kwargs['ExclusiveStartKey'] = start_key
+
+    if limit is not None:
+        response = operation(Limit=limit, **kwargs)
+        return response.get('Items', []), response.get('LastEvaluatedKey')
+
+    items = []
+    while True:
+        response = operation(**kwargs)
+        items.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return items, None
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+# Attributes the fields= parameter may name, per table
+FIELD_ATTRIBUTES = {
+    GROUP_PERMISSIONS_TABLE: ('group_name', 'service', 'action', 'service_action'),
+    CONTACT_INFO_TABLE: ('target', 'type', 'data')
 }
 
+def parse_fields(params: Optional[Dict], table_name: str) -> Optional[List[str]]:
+    """Read the fields= parameter, raising ValueError for attributes the table does not have"""
+    fields = split_list_param((params or {}).get('fields'))
+    if not fields:
+        return None
+    allowed = FIELD_ATTRIBUTES[table_name]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields {', '.join(unknown)}; choose from {', '.join(allowed)}")
+    return fields
+
+def projection(fields: Optional[List[str]], *needed: str) -> Dict:
+    """
+    ProjectionExpression arguments that read only the requested attributes, plus
+    any the handler needs itself. Every name goes through a placeholder because
+    attributes such as type and data are DynamoDB reserved words.
+    """
+    if not fields:
+        return {}
+    names = list(dict.fromkeys([*fields, *needed]))
+    return {
+        'ProjectionExpression': ', '.join(f'#f{i}' for i in range(len(names))),
+        'ExpressionAttributeNames': {f'#f{i}': name for i, name in enumerate(names)}
+    }
+
+def trim_fields(items: List[Dict], fields: Optional[List[str]]) -> List[Dict]:
+    """Drop attributes that were only read for the handler's own use"""
+    if not fields:
+        return items
+    return [{field: item[field] for field in fields if field in item} for item in items]
+
+def page_merged(items: List[Dict], key: str, limit: Optional[int], start_key: Optional[Dict]) -> Tuple[List[Dict], Optional[Dict]]:
+    """
+    Cut one page from a result merged from several queries, which has no single
+    LastEvaluatedKey to continue from. The page is taken in order of the key
+    attribute and the cursor carries the last key returned.
+    """
+    items = sorted(items, key=lambda item: item[key])
+    if start_key:
+        after = start_key.get(key)
+        if not isinstance(after, str):
+            raise ValueError('Invalid cursor')
+        items = [item for item in items if item[key] > after]
+    if limit is None or len(items) <= limit:
+        return items, None
+    return items[:limit], {key: items[limit - 1][key]}
+
+def list_response(items: List[Dict], last_key: Optional[Dict], paged: bool) -> Dict:
+    """Build a listing response; paged requests get an items/next_cursor envelope"""
+    if paged:
+        body = {'items': items, 'next_cursor': encode_cursor(last_key)}
+    else:
+        body = items
+    return {
+        'statusCode': 200,
+        'body': json.dumps(body)
+    }
+
+def bad_request(message: str) -> Dict:
+    """Build a 400 response"""
+    return {
+        'statusCode': 400,
+        'body': json.dumps({'error': message})
+    }
+
+# Warm-container read cache. Entries expire after CACHE_TTL_SECONDS and are
+# dropped as soon as the directory revision moves; the revision item itself is
+# re-read at most every REVISION_CHECK_SECONDS.
+CACHE_TTL_SECONDS = float(os.environ.get('CACHE_TTL_SECONDS', '60'))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '256'))
+REVISION_CHECK_SECONDS = float(os.environ.get('REVISION_CHECK_SECONDS', '5'))
+REVISION_KEY = {'name': 'revision'}
+
+class ResponseCache:
+    """Size-bounded LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value) -> None:
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+# Change log: one item per write, keyed by the revision that write produced
+CHANGE_LOG_KEY = 'directory'
+CHANGE_RETENTION_DAYS = int(os.environ.get('CHANGE_RETENTION_DAYS', '30'))
+
+read_cache = ResponseCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+_revision_state = {'revision': None, 'checked_at': 0.0}
+
+def read_revision(consistent: bool = False) -> int:
+    """Read the directory revision item"""
+    response = get_table(DIRECTORY_META_TABLE).get_item(Key=REVISION_KEY, ConsistentRead=consistent)
+    return int(response.get('Item', {}).get('revision', 0))
+
+def get_revision() -> Optional[int]:
+    """Return the directory revision, re-reading it when the last check is stale"""
+    now = time.monotonic()
+    if now - _revision_state['checked_at'] < REVISION_CHECK_SECONDS:
+        return _revision_state['revision']
+
+    try:
+        revision = read_revision()
+    except Exception as e:
+        logger.warning(f"Error reading directory revision: {e}")
+        return _revision_state['revision']
+
+    if revision != _revision_state['revision']:
+        read_cache.clear()
+    _revision_state.update(revision=revision, checked_at=now)
+    return revision
+
+def bump_revision(count: int = 1) -> Optional[int]:
+    """Record directory writes so every warm container drops its cached reads; returns the new revision"""
+    read_cache.clear()
+    try:
+        response = get_table(DIRECTORY_META_TABLE).update_item(
+            Key=REVISION_KEY,
+            UpdateExpression='ADD revision :count',
+            ExpressionAttributeValues={':count': count},
+            ReturnValues='UPDATED_NEW'
+        )
+        revision = int(response['Attributes']['revision'])
+        _revision_state.update(revision=revision, checked_at=time.monotonic())
+        return revision
+    except Exception as e:
+        # The write itself succeeded; other containers catch up within the TTL
+        logger.warning(f"Error bumping directory revision: {e}")
+        return None
+
+def record_changes(changes: List[Tuple[str, str, Dict]]) -> None:
+    """
+    Bump the revision once per change and append the changes to the change log.
+
+    Each change is (op, table, item) where op is put or delete, table is
+    permissions, users or contacts, and item is the written item or deleted key.
+    Change N is logged under revision N, so the log is ordered the same way as
+    the revision counter.
+    """
+    if not changes:
+        return
+    revision = bump_revision(len(changes))
+    if revision is None:
+        logger.error(f"Directory revision not bumped; {len(changes)} changes missing from the change log")
+        return
+
+    now = datetime.now(timezone.utc)
+    expires_at = int(now.timestamp()) + CHANGE_RETENTION_DAYS * 86400
+    first = revision - len(changes) + 1
+    requests = [
+        (DIRECTORY_CHANGES_TABLE, {'PutRequest': {'Item': {
+            'log': CHANGE_LOG_KEY,
+            'revision': first + offset,
+            'op': op,
+            'table': table,
+            'item': item,
+            'changed_at': now.isoformat(),
+            'expires_at': expires_at
+        }}})
+        for offset, (op, table, item) in enumerate(changes)
+    ]
+    failures = run_batch_write(requests)
+    if failures:
+        logger.error(f"Error appending to the change log: {len(failures)} of {len(changes)} changes not written")
+
+def record_change(op: str, table: str, item: Dict) -> None:
+    """Bump the revision and log a single change"""
+    record_changes([(op, table, item)])
+
+# Cleared by a handler whose response must not outlive the request, see skip_cache
+_response_cacheable: contextvars.ContextVar = contextvars.ContextVar('response_cacheable', default=True)
+
+def skip_cache() -> None:
+    """Keep the response the current cached_read handler is building out of the cache"""
+    _response_cacheable.set(False)
+
+def cached_read(func: Callable[[Optional[Dict]], Dict]) -> Callable[[Optional[Dict]], Dict]:
+    """Serve successful GET handler responses from the warm-container cache"""
+    @functools.wraps(func)
+    def wrapper(params: Optional[Dict]) -> Dict:
+        if read_cache.ttl <= 0:
+            return func(params)
+
+        get_revision()
+        key = (func.__name__, json.dumps(params or {}, sort_keys=True))
+        response = read_cache.get(key)
+        if response is None:
+            token = _response_cacheable.set(True)
+            try:
+                response = func(params)
+                cacheable = _response_cacheable.get()
+            finally:
+                _response_cacheable.reset(token)
+            if cacheable and response.get('statusCode') == 200:
+                read_cache.put(key, response)
+        return dict(response)
+
+    return wrapper
+
+# Shared worker pool for handlers that issue several independent DynamoDB calls
+FANOUT_WORKERS = int(os.environ.get('FANOUT_WORKERS', '8'))
+_executor = None
+_pool_thread = threading.local()
+
+def _mark_pool_thread() -> None:
+    _pool_thread.active = True
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the process-wide worker pool, creating it on first use"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, initializer=_mark_pool_thread)
+    return _executor
+
+def parallel_map(func: Callable[[Any], Any], values: Iterable) -> List:
+    """
+    Run func over values on the shared pool, returning results in input order.
+
+    Called from a task already running on the pool, it runs func inline: a
+    worker waiting on tasks queued behind it on the same bounded pool can
+    leave every worker waiting and the pool deadlocked.
+    """
+    values = list(values)
+    if len(values) <= 1 or getattr(_pool_thread, 'active', False):
+        return [func(value) for value in values]
+    # Each task runs in a copy of the caller's context so storage calls are metered against this request
+    context = contextvars.copy_context()
+    return list(get_executor().map(lambda value: context.copy().run(func, value), values))
+
+def split_list_param(value: Optional[str]) -> List[str]:
+    """Split a comma separated query parameter, dropping blanks and repeats"""
+    return list(dict.fromkeys(v.strip() for v in (value or '').split(',') if v.strip()))
+
+def normalize_path(path: str) -> str:
+    """Collapse empty segments so /v1//permissions/ and /v1/permissions route alike"""
+    return '/' + '/'.join(part for part in path.split('/') if part)
+
 def handle_request(http_method: str, path: str, event: Dict) -> Dict:
-    """Handle incoming API Gateway requests"""
-    # Extract path parts, removing empty strings
-    path_parts = [p for p in path.split('/') if p]
-    
-    # Validate path has at least v1 prefix
-    if not path_parts or path_parts[0] != 'v1':
+    """
+    Dispatch an API Gateway request through the routing table.
+
+    API Gateway hands over the path already decoded. An event that also carries
+    rawPath, as server.py's do, is routed on that instead so an encoded / stays
+    inside its path parameter, and the parameters are decoded when bound.
+    """
+    methods, path_values = router.match(normalize_path(event.get('rawPath') or path))
+    if not methods:
         return {
             'statusCode': 404,
-            'headers': CORS_HEADERS,  # Add CORS headers
-            'body': json.dumps({'error': 'Invalid path - must start with /v1'})
+            'body': json.dumps({'error': f'No route for {path}'})
         }
-    
-    # Remove v1 prefix
-    path_parts = path_parts[1:]
-    
-    # Handle documentation endpoint
-    if path_parts and path_parts[0] == 'docs':
-        if http_method == 'GET':
-            docs_response = generate_openapi_docs()
-            docs_response['headers'] = CORS_HEADERS  # Add CORS headers
-            return docs_response
-    
-    # Handle admin routes
-    if path_parts and path_parts[0] == 'admin':
-        if len(path_parts) < 2:
-            return {
-                'statusCode': 404,
-                'headers': CORS_HEADERS,  # Add CORS headers
-                'body': json.dumps({'error': 'Invalid admin path'})
-            }
-        admin_response = handle_admin_route(path_parts[1], http_method, event)
-        admin_response['headers'] = CORS_HEADERS  # Add CORS headers
-        return admin_response
-    
-    # Handle public routes
-    if not path_parts:
+
+    route = methods.get(http_method)
+    if route is None:
         return {
-            'statusCode': 404,
-            'headers': CORS_HEADERS,  # Add CORS headers
-            'body': json.dumps({'error': 'Invalid path'})
+            'statusCode': 405,
+            'headers': {'Allow': ', '.join(sorted(methods) + ['OPTIONS'])},
+            'body': json.dumps({'error': f'{http_method} is not allowed on {path}'})
         }
-        
-    if path_parts[0] == 'permissions':
-        if http_method == 'GET':
-            return get_permissions(event.get('queryStringParameters'))
-    elif path_parts[0] == 'users':
-        if http_method == 'GET':
-            params = event.get('queryStringParameters', {})
-            if params is None:
-                params = {}
-            response = get_user_groups(params)
-            response['headers'] = CORS_HEADERS  # Add CORS headers
-            return response
-    elif path_parts[0] == 'contacts':
-        if http_method == 'GET':
-            contacts_response = get_contact(event.get('queryStringParameters'))
-            contacts_response['headers'] = CORS_HEADERS  # Add CORS headers
-            return contacts_response
-            
-    return {
-        'statusCode': 404,
-        'headers': CORS_HEADERS,  # Add CORS headers
-        'body': json.dumps({'error': 'Invalid path or method'})
-    }
+
+    try:
+        request = route.bind(event, path_values)
+    except ValueError as e:
+        return bad_request(str(e))
+    return route.handler(request)
+
+def request_header(event: Dict, name: str) -> Optional[str]:
+    """Read a request header without regard to case"""
+    name = name.lower()
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+def compute_etag(body: str) -> str:
+    """Strong ETag derived from the response body"""
+    return '"' + hashlib.sha256(body.encode('utf-8')).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True when an If-None-Match header names the given ETag"""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(',')]
+    # Weak comparison is what If-None-Match calls for, so ignore any W/ prefix
+    return '*' in candidates or etag in (c[2:] if c.startswith('W/') else c for c in candidates)
+
+# Responses at least this large are gzip encoded for clients that accept it
+GZIP_MIN_BYTES = int(os.environ.get('GZIP_MIN_BYTES', '1024'))
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """True when an Accept-Encoding header allows gzip (and does not rule it out with q=0)"""
+    for coding in (accept_encoding or '').lower().split(','):
+        name, _, parameters = coding.strip().partition(';')
+        if name.strip() in ('gzip', '*'):
+            quality = parameters.strip()
+            if not quality.startswith('q='):
+                return True
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+    return False
+
+def compress_response(event: Dict, response: Dict) -> Dict:
+    """
+    Gzip a large successful response when the client accepts it.
+
+    The compressed body gets its own ETag, derived from the plain one. When the
+    client already holds that version the body is left alone so that
+    apply_conditional_get can answer 304 without compressing anything.
+    """
+    body = response.get('body') or ''
+    headers = response.get('headers', {})
+    if (response.get('statusCode') != 200 or response.get('isBase64Encoded')
+            or 'Content-Encoding' in headers or len(body) < GZIP_MIN_BYTES):
+        return response
+
+    headers = {**headers, 'Vary': 'Accept-Encoding'}
+    response['headers'] = headers
+    if not accepts_gzip(request_header(event, 'Accept-Encoding')):
+        return response
+
+    etag = headers.get('ETag') or compute_etag(body)
+    headers['ETag'] = etag[:-1] + '-gzip"'
+    if event.get('httpMethod') == 'GET' and etag_matches(request_header(event, 'If-None-Match'), headers['ETag']):
+        return response
+
+    headers['Content-Encoding'] = 'gzip'
+    response['isBase64Encoded'] = True
+    response['body'] = base64.b64encode(gzip.compress(body.encode('utf-8'), compresslevel=6)).decode('ascii')
+    return response
+
+def apply_conditional_get(event: Dict, response: Dict) -> Dict:
+    """Tag successful GET responses with an ETag and answer 304 when the client already has them"""
+    if event.get('httpMethod') != 'GET' or response.get('statusCode') != 200:
+        return response
+
+    headers = response.get('headers', {})
+    etag = headers.get('ETag') or compute_etag(response.get('body') or '')
+    response['headers'] = {**headers, 'ETag': etag}
+    if etag_matches(request_header(event, 'If-None-Match'), etag):
+        return {
+            'statusCode': 304,
+            'headers': response['headers'],
+            'body': ''
+        }
+    return response
+
+def report_init(func: Callable[[Dict, LambdaContext], Dict]) -> Callable[[Dict, LambdaContext], Dict]:
+    """Log the init report once, timing the first request along with it"""
+    @functools.wraps(func)
+    def wrapper(event: Dict, context: LambdaContext) -> Dict:
+        if init_report['first_request_ms'] is not None:
+            return func(event, context)
+
+        started = time.perf_counter()
+        try:
+            return func(event, context)
+        finally:
+            init_report['first_request_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            logger.info('Init report', extra={'init_report': init_report})
+
+    return wrapper
+
+def route_label(event: Dict) -> str:
+    """Name a request is metered under: its route template, so raw paths never become dimensions"""
+    methods, _ = router.match(normalize_path(event.get('path') or ''))
+    route = methods.get(event.get('httpMethod'))
+    return f"{event.get('httpMethod')} {route.template if route else 'unmatched'}"
+
+_metrics_lock = threading.Lock()
+
+def emit_route_metrics(route: str, latency_ms: float, usage: RequestUsage, response: Dict) -> None:
+    """Write one request's metrics as a CloudWatch Embedded Metric Format log line"""
+    if not ROUTE_METRICS_ENABLED:
+        return
+    body = response.get('body') or ''
+    response_bytes = len(body) if response.get('isBase64Encoded') else len(body.encode('utf-8'))
+    # The powertools metric set is shared, so build and flush it under one lock
+    with _metrics_lock:
+        metrics.add_dimension(name='route', value=route)
+        metrics.add_metric(name='Latency', unit=MetricUnit.Milliseconds, value=latency_ms)
+        metrics.add_metric(name='StorageTime', unit=MetricUnit.Milliseconds, value=usage.storage_ms)
+        metrics.add_metric(name='DynamoDBCalls', unit=MetricUnit.Count, value=usage.calls)
+        metrics.add_metric(name='DynamoDBRetries', unit=MetricUnit.Count, value=usage.retries)
+        metrics.add_metric(name='DynamoDBThrottles', unit=MetricUnit.Count, value=usage.throttles)
+        metrics.add_metric(name='ItemsScanned', unit=MetricUnit.Count, value=usage.items_scanned)
+        metrics.add_metric(name='ItemsReturned', unit=MetricUnit.Count, value=usage.items_returned)
+        metrics.add_metric(name='ReadCapacityUnits', unit=MetricUnit.Count, value=usage.read_units)
+        metrics.add_metric(name='WriteCapacityUnits', unit=MetricUnit.Count, value=usage.write_units)
+        metrics.add_metric(name='ResponseBytes', unit=MetricUnit.Bytes, value=response_bytes)
+        metrics.add_metadata(key='status_code', value=response.get('statusCode'))
+        metrics.flush_metrics()
+
+def record_route_metrics(func: Callable[[Dict, LambdaContext], Dict]) -> Callable[[Dict, LambdaContext], Dict]:
+    """Meter the storage calls a request makes and emit per-route metrics once it is answered"""
+    @functools.wraps(func)
+    def wrapper(event: Dict, context: LambdaContext) -> Dict:
+        route = route_label(event)
+        tracer.put_annotation(key='route', value=route)
+        usage = RequestUsage()
+        token = _request_usage.set(usage)
+        started = time.perf_counter()
+        try:
+            response = func(event, context)
+        finally:
+            _request_usage.reset(token)
+        emit_route_metrics(route, (time.perf_counter() - started) * 1000, usage, response)
+        return response
+
+    return wrapper
 
 @tracer.capture_lambda_handler
 @logger.inject_lambda_context
+@report_init
+@record_route_metrics
 def lambda_handler(event: Dict, context: LambdaContext) -> Dict:
     """
     Main Lambda handler for the Directory Service
     """
     # Handle OPTIONS requests first
     if event['httpMethod'] == 'OPTIONS':
-        return {
+        response = {
             'statusCode': 200,
-            'headers': CORS_HEADERS,
             'body': ''
         }
-    
-    try:
-        http_method = event['httpMethod']
-        path = event['path']
-        
-        # Common response headers
-        headers = {
-            'Content-Type': 'application/json',
-            'X-API-Version': os.environ.get('API_VERSION', '1.0.0')
-        }
-        
-        response = handle_request(http_method, path, event)
-        response['headers'] = {**response.get('headers', {}), **headers}
-        
-        # Ensure CORS headers are added to the response
-        if 'headers' not in response:
-            response['headers'] = {}
-        response['headers'].update(CORS_HEADERS)
-        
-        return response
-        
-    except Exception as e:
-        logger.exception('Error processing request')
-        return {
-            'statusCode': 500,
-            'headers': CORS_HEADERS,
-            'body': json.dumps({'error': str(e)})
-        }
+    else:
+        try:
+            http_method = event['httpMethod']
+            path = event['path']
 
-def handle_admin_route(path: str, http_method: str, event: Dict) -> Dict:
-    """Handle admin routes that require API key"""
-    if path == 'permissions':
-        if http_method == 'POST':
-            return create_permission(json.loads(event['body']))
-        elif http_method == 'DELETE':
-            return delete_permission(event['queryStringParameters'])
-    elif path == 'users':
-        if http_method == 'POST':
-            return assign_user_to_group(json.loads(event['body']))
-        elif http_method == 'DELETE':
-            return remove_user_from_group(event['queryStringParameters'])
-    elif path == 'contacts':
-        if http_method == 'POST':
-            return create_contact(json.loads(event['body']))
-        elif http_method == 'DELETE':
-            return delete_contact(event['queryStringParameters'])
-    
+            # Common response headers
+            headers = {
+                'Content-Type': 'application/json',
+                'X-API-Version': API_VERSION
+            }
+
+            response = handle_request(http_method, path, event)
+            response = apply_conditional_get(event, compress_response(event, response))
+            response['headers'] = {**response.get('headers', {}), **headers}
+
+        except Exception as e:
+            logger.exception('Error processing request')
+            response = {
+                'statusCode': 500,
+                'body': json.dumps({'error': str(e)})
+            }
+
+    # The one place CORS headers are added, whatever the outcome
+    response['headers'] = {**response.get('headers', {}), **CORS_HEADERS}
+    return response
+
+def parse_body(event: Dict):
+    """Decode a JSON request body, including ones API Gateway passed through as base64"""
+    body = event.get('body') or ''
+    if event.get('isBase64Encoded'):
+        body = base64.b64decode(body).decode('utf-8')
+    return json.loads(body)
+
+def permission_record(body: Dict) -> Dict:
+    """Build a group-permissions item"""
     return {
-        'statusCode': 400,
-        'body': json.dumps({'error': 'Invalid admin path or method'})
+        'group_name': body['group_name'],
+        'service_action': f"{body['service']}#{body['action']}",
+        'service': body['service'],
+        'action': body['action']
     }
 
+def membership_record(body: Dict) -> Dict:
+    """Build a user-groups item"""
+    return {
+        'user_id': body['user_id'],
+        'group_name': body['group_name']
+    }
+
+def contact_record(body: Dict) -> Dict:
+    """Build a contact-information item"""
+    return {
+        'target': body['target'],
+        'type': body['type'],
+        'data': body['data']
+    }
+
+def permission_key(body: Dict) -> Dict:
+    """Build a group-permissions key from service_action or service and action"""
+    service_action = body.get('service_action') or f"{body['service']}#{body['action']}"
+    return {'group_name': body['group_name'], 'service_action': service_action}
+
 def create_permission(body: Dict) -> Dict:
     """Create a new permission for a group"""
-    table = dynamodb.Table(GROUP_PERMISSIONS_TABLE)
+    table = get_table(GROUP_PERMISSIONS_TABLE)
     
     try:
         table.put_item(
-            Item={
-                'group_name': body['group_name'],
-                'service_action': f"{body['service']}#{body['action']}",
-                'service': body['service'],
-                'action': body['action']
-            },
+            Item=permission_record(body),
             ConditionExpression='attribute_not_exists(group_name) AND attribute_not_exists(service_action)'
         )
+        record_change('put', 'permissions', permission_record(body))
+        update_derived_items([('put', 'permissions', permission_record(body))])
         return {
             'statusCode': 201,
             'body': json.dumps({'message': 'Permission created successfully'})
         }
-    except boto3.client('dynamodb').exceptions.ConditionalCheckFailedException:
+    except ConditionalCheckFailedException:
         return {
             'statusCode': 409,
             'body': json.dumps({'error': 'Permission already exists'})
@@ -181,151 +933,289 @@ def create_permission(body: Dict) -> Dict:
             'body': json.dumps({'error': str(e)})
         }
 
+def wildcard_rules(service: str, action: str) -> List[Tuple[str, str]]:
+    """(rule, service_action) pairs that grant service/action, most specific first"""
+    rules = [
+        ('exact', f"{service}#{action}"),
+        ('service#all', f"{service}#all"),
+        ('all#action', f"all#{action}"),
+        ('all#all', "all#all"),
+    ]
+    # Drop repeats when the caller itself asks about 'all'
+    seen = set()
+    unique_rules = []
+    for rule, key in rules:
+        if key not in seen:
+            seen.add(key)
+            unique_rules.append((rule, key))
+    return unique_rules
+
+def wildcard_service_actions(service: str, action: str) -> List[str]:
+    """service_action keys that grant service/action, most specific first"""
+    return [key for _, key in wildcard_rules(service, action)]
+
+def query_service_action(table, service_action: str, fields: Optional[List[str]] = None) -> List[Dict]:
+    """Get every permission row for a service_action from ServiceActionIndex, reading group_name plus fields"""
+    items, _ = read_items(
+        table.query,
+        IndexName='ServiceActionIndex',
+        KeyConditionExpression='service_action = :service_action',
+        ExpressionAttributeValues={':service_action': service_action},
+        **projection(fields, 'group_name')
+    )
+    return items
+
+def unique_by_group(items: List[Dict]) -> List[Dict]:
+    """Remove duplicates based on group_name, keeping the first (most specific) row"""
+    seen = set()
+    unique_items = []
+    for item in items:
+        if item['group_name'] not in seen:
+            seen.add(item['group_name'])
+            unique_items.append(item)
+    return unique_items
+
+def merged_permissions_response(items: List[Dict], fields: Optional[List[str]], limit: Optional[int],
+                                start_key: Optional[Dict], paged: bool) -> Dict:
+    """List permissions gathered from several index queries, a page by group name if asked"""
+    if paged:
+        try:
+            items, last_key = page_merged(items, 'group_name', limit, start_key)
+        except ValueError as e:
+            return bad_request(str(e))
+    else:
+        last_key = None
+    return list_response(trim_fields(items, fields), last_key, paged)
+
+@cached_read
 def get_permissions(params: Optional[Dict]) -> Dict:
     """Get permissions based on query parameters"""
-    table = dynamodb.Table(GROUP_PERMISSIONS_TABLE)
+    table = get_table(GROUP_PERMISSIONS_TABLE)
+
+    try:
+        limit, start_key = parse_page_params(params)
+        fields = parse_fields(params, GROUP_PERMISSIONS_TABLE)
+    except ValueError as e:
+        return bad_request(str(e))
+    paged = is_paged(params)
+    params = strip_listing_params(params)
 
     try:
         if not params:
             # Return all permissions
-            response = table.scan()
-            return {
-                'statusCode': 200,
-                'body': json.dumps(response['Items'])
-            }
+            items, last_key = read_items(table.scan, limit, start_key, **projection(fields))
+            return list_response(items, last_key, paged)
 
         if 'group_name' in params:
-            response = table.query(
+            items, last_key = read_items(
+                table.query, limit, start_key,
                 KeyConditionExpression='group_name = :group_name',
-                ExpressionAttributeValues={':group_name': params['group_name']}
+                ExpressionAttributeValues={':group_name': params['group_name']},
+                **projection(fields)
             )
+            return list_response(items, last_key, paged)
         elif 'action' in params and 'service' in params:
-            responses = []
-            service_action = f"{params['service']}#{params['action']}"
-            service_action_all = f"{params['service']}#all"
-            all_services_action = f"all#{params['action']}"
-            all_all = f"all#all"
-            
-            # Query for exact match
-            exact_match = table.query(
-                IndexName='ServiceActionIndex',
-                KeyConditionExpression='service_action = :service_action',
-                ExpressionAttributeValues={
-                    ':service_action': service_action
-                }
-            )
-            responses.extend(exact_match.get('Items', []))
-
-            # Query for service entries with action='all'
-            exact_match = table.query(
-                IndexName='ServiceActionIndex',
-                KeyConditionExpression='service_action = :service_action',
-                ExpressionAttributeValues={
-                    ':service_action': service_action_all
-                }
-            )
-            responses.extend(exact_match.get('Items', []))
-            
-            # Query for action entservice='all'
-            all_service = table.scan(
-                FilterExpression='service = :all_service',
-                ExpressionAttributeValues={
-                    ':all_service': all_services_action
-                }
-            )
-            responses.extend(all_service.get('Items', []))
-            
-            # Query for service_action='all#all'
-            all_action = table.query(
-                IndexName='ServiceActionIndex',
-                KeyConditionExpression='service_action = :all_action',
-                ExpressionAttributeValues={
-                    ':all_action': all_all
-                }
+            # Exact match first, then service#all, all#action and all#all. Every
+            # variant is a service_action value, so each one is a key lookup on
+            # ServiceActionIndex rather than a scan. The lookups run concurrently
+            # and come back in rule order for the de-duplication below.
+            results = parallel_map(
+                lambda service_action: query_service_action(table, service_action, fields),
+                wildcard_service_actions(params['service'], params['action'])
             )
-            responses.extend(all_action.get('Items', []))
-            
-            # Remove duplicates based on group_name
-            seen = set()
-            unique_responses = []
-            for item in responses:
-                if item['group_name'] not in seen:
-                    seen.add(item['group_name'])
-                    unique_responses.append(item)
-            
-            return {
-                'statusCode': 200,
-                'headers': CORS_HEADERS,
-                'body': json.dumps(unique_responses)
-            }
+            responses = [item for items in results for item in items]
+            return merged_permissions_response(unique_by_group(responses), fields, limit, start_key, paged)
 
         elif 'service' in params:
-            responses = []
-
-            # Query for specific service
-            service_match = table.query(
-                IndexName='ServiceIndex',
-                KeyConditionExpression='service = :service',
-                ExpressionAttributeValues={':service': params['service']}
-            )
-            responses.extend(service_match.get('Items', []))
-
-            # Query for service='all'
-            all_service = table.scan(
-                FilterExpression='service = :all_service',
-                ExpressionAttributeValues={
-                    ':all_service': 'all'
-                }
-            )
-            responses.extend(all_service.get('Items', []))
+            # Query for specific service and for service='all' on the same index, concurrently
+            def query_service(service: str) -> List[Dict]:
+                items, _ = read_items(
+                    table.query,
+                    IndexName='ServiceIndex',
+                    KeyConditionExpression='service = :service',
+                    ExpressionAttributeValues={':service': service},
+                    **projection(fields, 'group_name')
+                )
+                return items
 
-            # Remove duplicates based on group_name
-            seen = set()
-            unique_responses = []
-            for item in responses:
-                if item['group_name'] not in seen:
-                    seen.add(item['group_name'])
-                    unique_responses.append(item)
-
-            return {
-                'statusCode': 200,
-                'headers': CORS_HEADERS,
-                'body': json.dumps(unique_responses)
-            }
+            results = parallel_map(query_service, dict.fromkeys([params['service'], 'all']))
+            responses = [item for items in results for item in items]
+            return merged_permissions_response(unique_by_group(responses), fields, limit, start_key, paged)
 
         else:
             return {
                 'statusCode': 400,
                 'body': json.dumps({'error': 'Invalid query parameters. Use group_name, service_action with service, or service'})
             }
-
-        return {
-            'statusCode': 200,
-            'body': json.dumps(response['Items'])
-        }
     except Exception as e:
         logger.error(f"Error getting permissions: {e}")
         return {
             'statusCode': 500,
-            'headers': CORS_HEADERS,
             'body': json.dumps({'error': str(e)})
         }
 
-def delete_permission(params: Optional[Dict]) -> Dict:
-    """Delete a permission for a group"""
-    if not params or 'group_name' not in params or 'service_action' not in params:
+def authorize(params: Optional[Dict]) -> Dict:
+    """Decide whether a user may perform an action on a service"""
+    if not params or 'user_id' not in params or 'service' not in params or 'action' not in params:
         return {
             'statusCode': 400,
-            'body': json.dumps({'error': 'group_name and service_action are required'})
+            'body': json.dumps({'error': 'user_id, service and action are required'})
         }
 
-    table = dynamodb.Table(GROUP_PERMISSIONS_TABLE)
+    user_id = params['user_id']
+    service = params['service']
+    action = params['action']
 
     try:
-        # Use delete_item with ReturnValues to check if item existed
-        response = table.delete_item(
-            Key={
-                'group_name': params['group_name'],
+        def user_groups() -> List[Dict]:
+            memberships, _ = read_items(
+                get_table(USER_GROUPS_TABLE).query,
+                KeyConditionExpression='user_id = :user_id',
+                ExpressionAttributeValues={':user_id': user_id}
+            )
+            return memberships
+
+        # The user's groups and the grants for every matching rule are
+        # independent lookups, so all of them go out at once
+        table = get_table(GROUP_PERMISSIONS_TABLE)
+        rules = wildcard_rules(service, action)
+        lookups = [user_groups] + [
+            functools.partial(query_service_action, table, service_action, ['group_name'])
+            for _, service_action in rules
+        ]
+        memberships, *grants = parallel_map(lambda lookup: lookup(), lookups)
+        groups = {item['group_name'] for item in memberships}
+
+        decision = {
+            'allowed': False,
+            'user_id': user_id,
+            'service': service,
+            'action': action,
+            'group_name': None,
+            'rule': None,
+            'service_action': None
+        }
+
+        # Walk the rules from most to least specific and stop at the first
+        # one granted to any of the user's groups
+        for (rule, service_action), granted in zip(rules, grants):
+            match = next((item for item in granted if item['group_name'] in groups), None)
+            if match:
+                decision.update({
+                    'allowed': True,
+                    'group_name': match['group_name'],
+                    'rule': rule,
+                    'service_action': service_action
+                })
+                break
+
+        return {
+            'statusCode': 200,
+            'body': json.dumps(decision)
+        }
+    except Exception as e:
+        logger.error(f"Error authorizing user: {e}")
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'error': str(e)})
+        }
+
+def grant_rule(service: str, action: str) -> str:
+    """Name of the wildcard_rules rule a grant on service/action matches as"""
+    if service == 'all':
+        return 'all#all' if action == 'all' else 'all#action'
+    return 'service#all' if action == 'all' else 'exact'
+
+@cached_read
+def get_user_permissions(params: Dict) -> Dict:
+    """
+    Get everything a user may do: the permissions of all their groups, one
+    entry per service/action with the groups granting it.
+
+    Each entry names the rule it grants by and, when one of the user's wider
+    grants also covers it, the service_action of those grants, most specific
+    first, as authorize would walk them.
+    """
+    user_id = params['user_id']
+    services = split_list_param(params.get('service'))
+
+    try:
+        memberships, _ = read_items(
+            get_table(USER_GROUPS_TABLE).query,
+            KeyConditionExpression='user_id = :user_id',
+            ExpressionAttributeValues={':user_id': user_id}
+        )
+        groups = sorted({item['group_name'] for item in memberships})
+        if not groups:
+            return {
+                'statusCode': 404,
+                'body': json.dumps({'error': 'User not found'})
+            }
+
+        # One partition per group, all queried at once
+        table = get_table(GROUP_PERMISSIONS_TABLE)
+
+        def group_permissions(group_name: str) -> List[Dict]:
+            items, _ = read_items(
+                table.query,
+                KeyConditionExpression='group_name = :group_name',
+                ExpressionAttributeValues={':group_name': group_name},
+                **projection(['service', 'action'], 'group_name')
+            )
+            return items
+
+        grants = {}
+        for items in parallel_map(group_permissions, groups):
+            for item in items:
+                if services and item['service'] not in services and item['service'] != 'all':
+                    continue
+                grants.setdefault((item['service'], item['action']), []).append(item['group_name'])
+
+        permissions = []
+        for (service, action), granted_by in sorted(grants.items()):
+            key = f"{service}#{action}"
+            permissions.append({
+                'service': service,
+                'action': action,
+                'service_action': key,
+                'rule': grant_rule(service, action),
+                'groups': sorted(set(granted_by)),
+                'covered_by': [
+                    service_action for _, service_action in wildcard_rules(service, action)
+                    if service_action != key and tuple(service_action.split('#', 1)) in grants
+                ]
+            })
+
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'user_id': user_id,
+                'groups': groups,
+                'permissions': permissions
+            })
+        }
+    except Exception as e:
+        logger.error(f"Error getting user permissions: {e}")
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'error': str(e)})
+        }
+
+def delete_permission(params: Optional[Dict]) -> Dict:
+    """Delete a permission for a group"""
+    if not params or 'group_name' not in params or 'service_action' not in params:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': 'group_name and service_action are required'})
+        }
+
+    table = get_table(GROUP_PERMISSIONS_TABLE)
+
+    try:
+        # Use delete_item with ReturnValues to check if item existed
+        response = table.delete_item(
+            Key={
+                'group_name': params['group_name'],
                 'service_action': params['service_action']
             },
             ReturnValues='ALL_OLD'  # This will return the deleted item if it existed
@@ -338,6 +1228,11 @@ def delete_permission(params: Optional[Dict]) -> Dict:
                 'body': json.dumps({'error': 'Permission not found'})
             }
 
+        record_change('delete', 'permissions', {
+            'group_name': params['group_name'],
+            'service_action': params['service_action']
+        })
+        update_derived_items([('delete', 'permissions', response['Attributes'])])
         return {
             'statusCode': 200,
             'body': json.dumps({'message': 'Permission deleted successfully'})
@@ -351,21 +1246,20 @@ def delete_permission(params: Optional[Dict]) -> Dict:
 
 def assign_user_to_group(body: Dict) -> Dict:
     """Assign a user to a group"""
-    table = dynamodb.Table(USER_GROUPS_TABLE)
+    table = get_table(USER_GROUPS_TABLE)
     
     try:
         table.put_item(
-            Item={
-                'user_id': body['user_id'],
-                'group_name': body['group_name']
-            },
+            Item=membership_record(body),
             ConditionExpression='attribute_not_exists(user_id) AND attribute_not_exists(group_name)'
         )
+        record_change('put', 'users', membership_record(body))
+        update_derived_items([('put', 'users', membership_record(body))])
         return {
             'statusCode': 201,
             'body': json.dumps({'message': 'User assigned to group successfully'})
         }
-    except boto3.client('dynamodb').exceptions.ConditionalCheckFailedException:
+    except ConditionalCheckFailedException:
         return {
             'statusCode': 409,
             'body': json.dumps({'error': 'User is already assigned to this group'})
@@ -377,40 +1271,38 @@ def assign_user_to_group(body: Dict) -> Dict:
             'body': json.dumps({'error': str(e)})
         }
 
+@cached_read
 def get_user_groups(params: Optional[Dict]) -> Dict:
     """Get groups for a user"""
-    table = dynamodb.Table(USER_GROUPS_TABLE)
-    
+    table = get_table(USER_GROUPS_TABLE)
+
+    try:
+        limit, start_key = parse_page_params(params)
+    except ValueError as e:
+        return bad_request(str(e))
+    paged = is_paged(params)
+
     try:
         if params is None:
             params = {}
             
-        if not params:
+        if not strip_listing_params(params):
             # Return all users and their groups
-            response = table.scan()
-            items = response.get('Items', [])  # Use get() with default empty list
-            return {
-                'statusCode': 200,
-                'headers': CORS_HEADERS,  # Add CORS headers
-                'body': json.dumps(items)
-            }
+            items, last_key = read_items(table.scan, limit, start_key)
+            return list_response(items, last_key, paged)
         
         if 'user_id' in params:
-            response = table.query(
+            items, last_key = read_items(
+                table.query, limit, start_key,
                 KeyConditionExpression='user_id = :user_id',
                 ExpressionAttributeValues={':user_id': params['user_id']}
             )
-            return {
-                'statusCode': 200,
-                'headers': CORS_HEADERS,
-                'body': json.dumps(response.get('Items', []))
-            }
+            return list_response(items, last_key, paged)
         elif 'group_name' in params:
             return get_users_by_group(params)
         else:
             return {
                 'statusCode': 400,
-                'headers': CORS_HEADERS,
                 'body': json.dumps({'error': 'Invalid parameters'})
             }
             
@@ -418,7 +1310,6 @@ def get_user_groups(params: Optional[Dict]) -> Dict:
         logger.error(f"Error getting user groups: {e}")
         return {
             'statusCode': 500,
-            'headers': CORS_HEADERS,
             'body': json.dumps({'error': str(e)})
         }
 
@@ -430,15 +1321,23 @@ def remove_user_from_group(params: Optional[Dict]) -> Dict:
             'body': json.dumps({'error': 'user_id and group_name are required'})
         }
     
-    table = dynamodb.Table(USER_GROUPS_TABLE)
+    table = get_table(USER_GROUPS_TABLE)
     
     try:
-        table.delete_item(
+        response = table.delete_item(
             Key={
                 'user_id': params['user_id'],
                 'group_name': params['group_name']
-            }
+            },
+            ReturnValues='ALL_OLD'
         )
+        # Only a membership that existed is logged and moves the group's member count and the search index
+        if 'Attributes' in response:
+            record_change('delete', 'users', {
+                'user_id': params['user_id'],
+                'group_name': params['group_name']
+            })
+            update_derived_items([('delete', 'users', response['Attributes'])])
         return {
             'statusCode': 200,
             'body': json.dumps({'message': 'User removed from group successfully'})
@@ -458,7 +1357,7 @@ def get_permissions_by_service_action(params: Optional[Dict]) -> Dict:
             'body': json.dumps({'error': 'service_action is required'})
         }
     
-    table = dynamodb.Table(GROUP_PERMISSIONS_TABLE)
+    table = get_table(GROUP_PERMISSIONS_TABLE)
     service_action = params['service_action']
     
     try:
@@ -486,7 +1385,7 @@ def get_permissions_by_service(params: Optional[Dict]) -> Dict:
             'body': json.dumps({'error': 'service is required'})
         }
     
-    table = dynamodb.Table(GROUP_PERMISSIONS_TABLE)
+    table = get_table(GROUP_PERMISSIONS_TABLE)
     service = params['service']
     
     try:
@@ -514,21 +1413,112 @@ def get_users_by_group(params: Optional[Dict]) -> Dict:
             'body': json.dumps({'error': 'group_name is required'})
         }
     
-    table = dynamodb.Table(USER_GROUPS_TABLE)
+    table = get_table(USER_GROUPS_TABLE)
     group_name = params['group_name']
+
+    try:
+        limit, start_key = parse_page_params(params)
+    except ValueError as e:
+        return bad_request(str(e))
     
     try:
-        response = table.query(
+        items, last_key = read_items(
+            table.query, limit, start_key,
             IndexName='GroupNameIndex',
             KeyConditionExpression='group_name = :group_name',
             ExpressionAttributeValues={':group_name': group_name}
         )
+        return list_response(items, last_key, is_paged(params))
+    except Exception as e:
+        logger.error(f"Error getting users by group: {e}")
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'error': str(e)})
+        }
+
+def group_has_permissions(group_name: str) -> bool:
+    """
+    Whether a group holds any permissions. Its summary usually says; summaries
+    are updated best-effort, so without one the permissions are read directly.
+    """
+    summary = get_table(GROUP_SUMMARY_TABLE).get_item(Key={'group_name': group_name}).get('Item')
+    if summary and summary.get('permission_count', 0) > 0:
+        return True
+    response = get_table(GROUP_PERMISSIONS_TABLE).query(
+        KeyConditionExpression='group_name = :group_name',
+        ExpressionAttributeValues={':group_name': group_name},
+        Limit=1,
+        **projection(['group_name'])
+    )
+    return bool(response.get('Items'))
+
+def group_exists(group_name: str) -> bool:
+    """
+    Whether a group has any members or permissions, read from those tables
+    rather than the best-effort summary. The permissions are read consistently;
+    memberships can only be read through the eventually consistent GroupNameIndex.
+    """
+    permissions = get_table(GROUP_PERMISSIONS_TABLE).query(
+        KeyConditionExpression='group_name = :group_name',
+        ExpressionAttributeValues={':group_name': group_name},
+        ConsistentRead=True,
+        Limit=1,
+        **projection(['group_name'])
+    )
+    if permissions.get('Items'):
+        return True
+    members = get_table(USER_GROUPS_TABLE).query(
+        IndexName='GroupNameIndex',
+        KeyConditionExpression='group_name = :group_name',
+        ExpressionAttributeValues={':group_name': group_name},
+        Limit=1,
+        **projection(['group_name'])
+    )
+    return bool(members.get('Items'))
+
+@cached_read
+def get_group_roster(params: Dict) -> Dict:
+    """Get a group's contacts plus each member and their contacts"""
+    group_name = params['group_name']
+    contact_types = split_list_param(params.get('contact_type'))
+
+    try:
+        members, _ = read_items(
+            get_table(USER_GROUPS_TABLE).query,
+            IndexName='GroupNameIndex',
+            KeyConditionExpression='group_name = :group_name',
+            ExpressionAttributeValues={':group_name': group_name}
+        )
+        user_ids = list(dict.fromkeys(member['user_id'] for member in members))
+
+        contacts = fetch_contacts(
+            get_table(CONTACT_INFO_TABLE),
+            [group_name] + [user_id for user_id in user_ids if user_id != group_name],
+            contact_types
+        )
+        if not user_ids and not contacts and not group_has_permissions(group_name):
+            return {
+                'statusCode': 404,
+                'body': json.dumps({'error': 'Group not found'})
+            }
+
+        by_target = {}
+        for contact in contacts:
+            by_target.setdefault(contact['target'], []).append(contact)
+
         return {
             'statusCode': 200,
-            'body': json.dumps(response['Items'])
+            'body': json.dumps({
+                'group_name': group_name,
+                'contacts': by_target.get(group_name, []),
+                'members': [
+                    {'user_id': user_id, 'contacts': by_target.get(user_id, [])}
+                    for user_id in user_ids
+                ]
+            })
         }
     except Exception as e:
-        logger.error(f"Error getting users by group: {e}")
+        logger.error(f"Error getting group roster: {e}")
         return {
             'statusCode': 500,
             'body': json.dumps({'error': str(e)})
@@ -536,25 +1526,23 @@ def get_users_by_group(params: Optional[Dict]) -> Dict:
 
 def create_contact(body: Dict) -> Dict:
     """Create or update contact information"""
-    table = dynamodb.Table(os.environ['CONTACT_INFO_TABLE'])
+    table = get_table(CONTACT_INFO_TABLE)
     
     try:
         table.put_item(
-            Item={
-                'target': body['target'],
-                'type': body['type'],
-                'data': body['data']
-            },
+            Item=contact_record(body),
             ConditionExpression='attribute_not_exists(target) AND attribute_not_exists(#type)',
             ExpressionAttributeNames={
                 '#type': 'type'
             }
         )
+        record_change('put', 'contacts', contact_record(body))
+        update_derived_items([('put', 'contacts', contact_record(body))])
         return {
             'statusCode': 201,
             'body': json.dumps({'message': 'Contact information created successfully'})
         }
-    except boto3.client('dynamodb').exceptions.ConditionalCheckFailedException:
+    except ConditionalCheckFailedException:
         return {
             'statusCode': 409,
             'body': json.dumps({'error': 'Contact information already exists for this target and type'})
@@ -566,27 +1554,69 @@ def create_contact(body: Dict) -> Dict:
             'body': json.dumps({'error': str(e)})
         }
 
+def fetch_contacts(table, targets: List[str], types: List[str], fields: Optional[List[str]] = None) -> List[Dict]:
+    """Get the contacts of several targets, optionally limited to some types and attributes"""
+    if types:
+        # Every key is known, so fetch them all with BatchGetItem
+        keys = [{'target': target, 'type': contact_type} for target in targets for contact_type in types]
+        return run_batch_get(table.name, keys, fields)
+
+    # Types are unknown, so query each target's partition concurrently
+    def query_target(target: str) -> List[Dict]:
+        target_items, _ = read_items(
+            table.query,
+            KeyConditionExpression='target = :target',
+            ExpressionAttributeValues={':target': target},
+            **projection(fields)
+        )
+        return target_items
+
+    return [item for target_items in parallel_map(query_target, targets) for item in target_items]
+
+def get_contacts_for_targets(table, targets: List[str], types: List[str], fields: Optional[List[str]] = None) -> Dict:
+    """Look up contacts for several targets in one go"""
+    if len(targets) * max(len(types), 1) > MAX_LOOKUP_KEYS:
+        return bad_request(f'At most {MAX_LOOKUP_KEYS} target/type combinations are allowed per request')
+
+    items = fetch_contacts(table, targets, types, fields)
+    return {
+        'statusCode': 200,
+        'body': json.dumps(items)
+    }
+
+@cached_read
 def get_contact(params: Optional[Dict]) -> Dict:
     """Get contact information by target"""
-    table = dynamodb.Table(os.environ['CONTACT_INFO_TABLE'])
+    table = get_table(CONTACT_INFO_TABLE)
+
+    try:
+        limit, start_key = parse_page_params(params)
+        fields = parse_fields(params, CONTACT_INFO_TABLE)
+    except ValueError as e:
+        return bad_request(str(e))
     
     try:
         if not params or 'target' not in params:
             # Return all contacts
-            response = table.scan()
-            return {
-                'statusCode': 200,
-                'body': json.dumps(response['Items'])
-            }
+            items, last_key = read_items(table.scan, limit, start_key, **projection(fields))
+            return list_response(items, last_key, is_paged(params))
         
-        target = params['target']
-        if 'type' in params:
+        targets = split_list_param(params['target'])
+        types = split_list_param(params.get('type'))
+        if not targets:
+            return bad_request('target must name at least one target')
+        if len(targets) > 1 or len(types) > 1:
+            return get_contacts_for_targets(table, targets, types, fields)
+
+        target = targets[0]
+        if types:
             # Query for specific target and type
             response = table.get_item(
                 Key={
                     'target': target,
-                    'type': params['type']
-                }
+                    'type': types[0]
+                },
+                **projection(fields)
             )
             if 'Item' not in response:
                 return {
@@ -600,19 +1630,18 @@ def get_contact(params: Optional[Dict]) -> Dict:
             }
         else:
             # Query all types for target
-            response = table.query(
+            items, last_key = read_items(
+                table.query, limit, start_key,
                 KeyConditionExpression='target = :target',
-                ExpressionAttributeValues={':target': target}
+                ExpressionAttributeValues={':target': target},
+                **projection(fields)
             )
-            if not response['Items']:
+            if not items and not start_key:
                 return {
                     'statusCode': 404,
                     'body': json.dumps({'error': 'Contact information not found'})
                 }
-            return {
-                'statusCode': 200,
-                'body': json.dumps(response['Items'])
-            }
+            return list_response(items, last_key, is_paged(params))
     except Exception as e:
         logger.error(f"Error getting contact information: {e}")
         return {
@@ -628,15 +1657,22 @@ def delete_contact(params: Optional[Dict]) -> Dict:
             'body': json.dumps({'error': 'target and type are required'})
         }
     
-    table = dynamodb.Table(os.environ['CONTACT_INFO_TABLE'])
+    table = get_table(CONTACT_INFO_TABLE)
     
     try:
-        table.delete_item(
+        response = table.delete_item(
             Key={
                 'target': params['target'],
                 'type': params['type']
-            }
+            },
+            ReturnValues='ALL_OLD'
         )
+        if 'Attributes' in response:
+            record_change('delete', 'contacts', {
+                'target': params['target'],
+                'type': params['type']
+            })
+            update_derived_items([('delete', 'contacts', response['Attributes'])])
         return {
             'statusCode': 200,
             'body': json.dumps({'message': 'Contact information deleted successfully'})
@@ -648,13 +1684,1314 @@ def delete_contact(params: Optional[Dict]) -> Dict:
             'body': json.dumps({'error': str(e)})
         }
 
-def generate_openapi_docs() -> Dict:
-    """Generate OpenAPI documentation"""
-    openapi_spec = {
+# Bulk admin writes
+BATCH_WRITE_SIZE = 25  # DynamoDB BatchWriteItem limit
+BATCH_MAX_OPERATIONS = int(os.environ.get('BATCH_MAX_OPERATIONS', '1000'))
+BATCH_MAX_ATTEMPTS = int(os.environ.get('BATCH_MAX_ATTEMPTS', '6'))
+BATCH_BACKOFF_SECONDS = float(os.environ.get('BATCH_BACKOFF_SECONDS', '0.05'))
+
+def batch_tables() -> Dict[str, Dict]:
+    """Tables the batch endpoint can write to, keyed by the name used in requests"""
+    return {
+        'permissions': {
+            'table': GROUP_PERMISSIONS_TABLE,
+            'item': permission_record,
+            'key': permission_key
+        },
+        'users': {
+            'table': USER_GROUPS_TABLE,
+            'item': membership_record,
+            'key': lambda body: {'user_id': body['user_id'], 'group_name': body['group_name']}
+        },
+        'contacts': {
+            'table': CONTACT_INFO_TABLE,
+            'item': contact_record,
+            'key': lambda body: {'target': body['target'], 'type': body['type']}
+        }
+    }
+
+BATCH_GET_SIZE = 100  # DynamoDB BatchGetItem limit
+MAX_LOOKUP_KEYS = int(os.environ.get('MAX_LOOKUP_KEYS', '500'))
+
+def run_batch_get(table_name: str, keys: List[Dict], fields: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Fetch items by key through BatchGetItem in chunks of 100, chunks running concurrently.
+
+    UnprocessedKeys are retried with jittered exponential backoff. Items are
+    returned in the order of the keys that found them; missing keys are skipped.
+    With fields, only those attributes are read and returned.
+    """
+    key_names = tuple(keys[0]) if keys else ()
+
+    def identity(attributes: Dict) -> Tuple:
+        return tuple(attributes[name] for name in key_names)
+
+    def fetch_chunk(chunk: List[Dict]) -> List[Dict]:
+        items = []
+        pending = {table_name: {'Keys': chunk, **projection(fields, *key_names)}}
+        attempt = 0
+        while pending:
+            response = get_storage().batch_get_item(RequestItems=pending)
+            items.extend(response.get('Responses', {}).get(table_name, []))
+
+            pending = response.get('UnprocessedKeys') or {}
+            if not pending:
+                break
+
+            attempt += 1
+            if attempt >= BATCH_MAX_ATTEMPTS:
+                raise RuntimeError('BatchGetItem keys left unprocessed after retries')
+            time.sleep(random.uniform(0, BATCH_BACKOFF_SECONDS * (2 ** attempt)))
+        return items
+
+    chunks = [keys[start:start + BATCH_GET_SIZE] for start in range(0, len(keys), BATCH_GET_SIZE)]
+    found = {}
+    for items in parallel_map(fetch_chunk, chunks):
+        for item in items:
+            found[identity(item)] = item
+
+    return trim_fields([found[identity(key)] for key in keys if identity(key) in found], fields)
+
+def write_request_identity(table_name: str, request: Dict) -> Tuple:
+    """Identify a PutRequest/DeleteRequest by table and key so retries can be matched back"""
+    if 'PutRequest' in request:
+        attributes = request['PutRequest']['Item']
+    else:
+        attributes = request['DeleteRequest']['Key']
+    key_names = [name for name in TABLE_SCHEMAS[table_name]['key'] if name]
+    return (table_name,) + tuple(attributes[name] for name in key_names)
+
+def existing_rows(requests: List[Tuple[str, Dict]], table_names: Iterable[str]) -> set:
+    """Identities of the write requests on table_names whose item is already stored"""
+    found = set()
+    for table_name in table_names:
+        key_names = [name for name in TABLE_SCHEMAS[table_name]['key'] if name]
+        keys = []
+        for request_table, request in requests:
+            if request_table == table_name:
+                attributes = request['PutRequest']['Item'] if 'PutRequest' in request else request['DeleteRequest']['Key']
+                keys.append({name: attributes[name] for name in key_names})
+        if keys:
+            found.update((table_name,) + tuple(item[name] for name in key_names)
+                         for item in run_batch_get(table_name, keys, key_names))
+    return found
+
+def run_batch_write(requests: List[Tuple[str, Dict]]) -> Dict[Tuple, str]:
+    """
+    Send write requests through BatchWriteItem in chunks of 25.
+
+    UnprocessedItems are retried with jittered exponential backoff. Returns the
+    error for every request that could not be written, keyed by its identity.
+    """
+    failures = {}
+    for start in range(0, len(requests), BATCH_WRITE_SIZE):
+        pending = {}
+        for table_name, request in requests[start:start + BATCH_WRITE_SIZE]:
+            pending.setdefault(table_name, []).append(request)
+
+        attempt = 0
+        while pending:
+            try:
+                response = get_storage().batch_write_item(RequestItems=pending)
+            except Exception as e:
+                logger.error(f"Error in batch write: {e}")
+                for table_name, table_requests in pending.items():
+                    for request in table_requests:
+                        failures[write_request_identity(table_name, request)] = str(e)
+                break
+
+            pending = response.get('UnprocessedItems') or {}
+            if not pending:
+                break
+
+            attempt += 1
+            if attempt >= BATCH_MAX_ATTEMPTS:
+                for table_name, table_requests in pending.items():
+                    for request in table_requests:
+                        failures[write_request_identity(table_name, request)] = 'Unprocessed after retries'
+                break
+            time.sleep(random.uniform(0, BATCH_BACKOFF_SECONDS * (2 ** attempt)))
+
+    return failures
+
+def batch_write(body: Dict) -> Dict:
+    """Apply a mixed list of put/delete operations across the directory tables"""
+    operations = body.get('operations') if isinstance(body, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': 'operations must be a non-empty list'})
+        }
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': f'At most {BATCH_MAX_OPERATIONS} operations are allowed per request'})
+        }
+
+    tables = batch_tables()
+    results = []
+    requests = []
+    identities = {}
+    changes = {}
+
+    for index, operation in enumerate(operations):
+        result = {'index': index, 'status': 'ok'}
+        results.append(result)
+        try:
+            spec = tables[operation['table']]
+            if operation['op'] == 'put':
+                payload = spec['item'](operation['item'])
+                request = {'PutRequest': {'Item': payload}}
+            elif operation['op'] == 'delete':
+                payload = spec['key'](operation['item'])
+                request = {'DeleteRequest': {'Key': payload}}
+            else:
+                raise ValueError(f"Unknown op {operation['op']}")
+        except (KeyError, TypeError, ValueError) as e:
+            result.update(status='invalid', error=f"Invalid operation: {e}")
+            continue
+
+        identity = write_request_identity(spec['table'], request)
+        # BatchWriteItem rejects a request that touches the same key twice
+        if identity in identities:
+            result.update(status='invalid', error=f"Duplicate of operation {identities[identity]}")
+            continue
+        identities[identity] = index
+        changes[index] = (operation['op'], operation['table'], payload)
+        requests.append((spec['table'], request))
+
+    # Puts may overwrite and deletes may miss, so look up which rows exist to
+    # know how the group summaries and search index move
+    existing = existing_rows(requests, (USER_GROUPS_TABLE, GROUP_PERMISSIONS_TABLE, CONTACT_INFO_TABLE))
+    failures = run_batch_write(requests)
+    for identity, index in identities.items():
+        if identity in failures:
+            results[index].update(status='failed', error=failures[identity])
+
+    succeeded = sum(1 for result in results if result['status'] == 'ok')
+    applied = sorted((index, identity) for identity, index in identities.items() if results[index]['status'] == 'ok')
+    # A delete that found no row changed nothing, so it is not logged either
+    record_changes([
+        changes[index] for index, identity in applied
+        if changes[index][0] == 'put' or identity in existing
+    ])
+    update_derived_items([
+        changes[index] for index, identity in applied
+        if (identity in existing) == (changes[index][0] == 'delete')
+    ])
+
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'results': results
+        })
+    }
+
+MAX_GROUP_MEMBERS = int(os.environ.get('MAX_GROUP_MEMBERS', '10000'))
+
+def set_group_members(group_name: str, body: Dict, dry_run: bool = False) -> Dict:
+    """
+    Make a group's membership match a desired member list.
+
+    The current members come from one GroupNameIndex query; only the
+    difference is written, through BatchWriteItem, so a sync that changes
+    nothing costs a single read. With dry_run the difference is reported but
+    not applied.
+    """
+    members = body.get('members') if isinstance(body, dict) else None
+    if not isinstance(members, list) or not all(isinstance(member, str) and member for member in members):
+        return bad_request('members must be a list of user ids')
+    if len(members) > MAX_GROUP_MEMBERS:
+        return bad_request(f'At most {MAX_GROUP_MEMBERS} members are allowed per group')
+
+    try:
+        current, _ = read_items(
+            get_table(USER_GROUPS_TABLE).query,
+            IndexName='GroupNameIndex',
+            KeyConditionExpression='group_name = :group_name',
+            ExpressionAttributeValues={':group_name': group_name}
+        )
+        current_ids = {item['user_id'] for item in current}
+        desired_ids = set(members)
+        added = sorted(desired_ids - current_ids)
+        removed = sorted(current_ids - desired_ids)
+
+        failed = []
+        if not dry_run:
+            changes = [('put', 'users', membership_record({'user_id': user_id, 'group_name': group_name}))
+                       for user_id in added]
+            changes += [('delete', 'users', {'user_id': user_id, 'group_name': group_name}) for user_id in removed]
+            failures = run_batch_write([
+                (USER_GROUPS_TABLE, {'PutRequest': {'Item': item}} if op == 'put' else {'DeleteRequest': {'Key': item}})
+                for op, _, item in changes
+            ])
+            applied = []
+            for change in changes:
+                error = failures.get((USER_GROUPS_TABLE, change[2]['user_id'], group_name))
+                if error:
+                    failed.append({'user_id': change[2]['user_id'], 'op': change[0], 'error': error})
+                else:
+                    applied.append(change)
+            record_changes(applied)
+            update_derived_items(applied)
+            added = [item['user_id'] for op, _, item in applied if op == 'put']
+            removed = [item['user_id'] for op, _, item in applied if op == 'delete']
+
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'group_name': group_name,
+                'dry_run': dry_run,
+                'added': added,
+                'removed': removed,
+                'unchanged': len(current_ids & desired_ids),
+                'failed': failed
+            })
+        }
+    except Exception as e:
+        logger.error(f"Error setting group members: {e}")
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'error': str(e)})
+        }
+
+TRANSACT_WRITE_SIZE = 100  # DynamoDB TransactWriteItems limit
+RETRYABLE_CANCELLATIONS = frozenset(['TransactionConflict', 'ThrottlingError', 'ProvisionedThroughputExceeded'])
+
+def transact_write(actions: List[Dict]) -> None:
+    """
+    Run one TransactWriteItems call over Put/Delete actions written with plain
+    Python values, as the Table API takes them.
+
+    Only the client offers transactions on DynamoDB; the one behind the boto3
+    resource serializes plain values the same way Table calls do. Cancellations
+    caused only by conflicting transactions or throttling are retried with
+    jittered exponential backoff.
+    """
+    backend = get_storage()
+    if hasattr(backend.target, 'meta'):
+        backend = MeteredStorage(backend.target.meta.client)
+    call = functools.partial(backend.transact_write_items, TransactItems=actions)
+
+    attempt = 0
+    while True:
+        try:
+            call()
+            return
+        except Exception as e:
+            reasons = getattr(e, 'response', {}).get('CancellationReasons') or []
+            codes = {reason.get('Code') for reason in reasons} - {'None'}
+            attempt += 1
+            if not codes or not codes <= RETRYABLE_CANCELLATIONS or attempt >= BATCH_MAX_ATTEMPTS:
+                raise
+            time.sleep(random.uniform(0, BATCH_BACKOFF_SECONDS * (2 ** attempt)))
+
+def cancellation_reasons(error: Exception) -> Optional[List[Dict]]:
+    """CancellationReasons of a cancelled transaction, or None for any other error"""
+    response = getattr(error, 'response', {})
+    if response.get('Error', {}).get('Code') != 'TransactionCanceledException':
+        return None
+    return response.get('CancellationReasons') or []
+
+def provision_group(body: Dict) -> Dict:
+    """
+    Create a group with its members, contacts and permissions.
+
+    Every item is put on the condition that it does not exist yet, in
+    TransactWriteItems calls of up to 100 items, each all or nothing. Should a
+    later call be cancelled, the items written by the earlier ones are deleted
+    again, so a failed request leaves nothing behind.
+    """
+    def strings(value: Any) -> bool:
+        return isinstance(value, str) and bool(value)
+
+    def objects_of(value: Any, *fields: str) -> bool:
+        return isinstance(value, list) and all(
+            isinstance(entry, dict) and all(strings(entry.get(field)) for field in fields) for entry in value
+        )
+
+    if not isinstance(body, dict) or not strings(body.get('group_name')):
+        return bad_request('group_name must be a non-empty string')
+    group_name = body['group_name']
+    members = body.get('members', [])
+    contacts = body.get('contacts', [])
+    permissions = body.get('permissions', [])
+    if not isinstance(members, list) or not all(strings(member) for member in members):
+        return bad_request('members must be a list of user ids')
+    if not objects_of(contacts, 'type', 'data'):
+        return bad_request('contacts must be a list of objects with type and data')
+    if not objects_of(permissions, 'service', 'action'):
+        return bad_request('permissions must be a list of objects with service and action')
+
+    items = (
+        [('users', membership_record({'user_id': user_id, 'group_name': group_name}))
+         for user_id in dict.fromkeys(members)]
+        + [('contacts', contact_record({**contact, 'target': group_name})) for contact in contacts]
+        + [('permissions', permission_record({**permission, 'group_name': group_name})) for permission in permissions]
+    )
+    if not items:
+        return bad_request('A group needs at least one member, contact or permission')
+    if len(items) > BATCH_MAX_OPERATIONS:
+        return bad_request(f'At most {BATCH_MAX_OPERATIONS} members, contacts and permissions are allowed per request')
+
+    tables = batch_tables()
+    keys = [tables[table]['key'](item) for table, item in items]
+    if len({(table, tuple(key.values())) for (table, _), key in zip(items, keys)}) < len(items):
+        return bad_request('The group definition lists the same member, contact or permission twice')
+
+    try:
+        if group_exists(group_name):
+            return {
+                'statusCode': 409,
+                'body': json.dumps({'error': f'Group {group_name} already exists'})
+            }
+
+        def put(table: str, item: Dict) -> Dict:
+            spec = tables[table]
+            return {'Put': {
+                'TableName': spec['table'],
+                'Item': item,
+                'ConditionExpression': 'attribute_not_exists(#key)',
+                'ExpressionAttributeNames': {'#key': TABLE_SCHEMAS[spec['table']]['key'][0]}
+            }}
+
+        written = []
+        for start in range(0, len(items), TRANSACT_WRITE_SIZE):
+            chunk = items[start:start + TRANSACT_WRITE_SIZE]
+            try:
+                transact_write([put(table, item) for table, item in chunk])
+            except Exception as e:
+                if written:
+                    # Undo the chunks already committed so the group is not left half made
+                    for undo in range(0, len(written), TRANSACT_WRITE_SIZE):
+                        transact_write([
+                            {'Delete': {'TableName': tables[table]['table'], 'Key': key}}
+                            for table, key in written[undo:undo + TRANSACT_WRITE_SIZE]
+                        ])
+                reasons = cancellation_reasons(e)
+                if reasons is None:
+                    raise
+                conflicts = [
+                    {'table': table, 'item': item}
+                    for (table, item), reason in zip(chunk, reasons) if reason.get('Code') == 'ConditionalCheckFailed'
+                ]
+                return {
+                    'statusCode': 409,
+                    'body': json.dumps({'error': 'Some of the group\'s items already exist', 'conflicts': conflicts})
+                }
+            written.extend((table, key) for (table, _), key in zip(chunk, keys[start:start + TRANSACT_WRITE_SIZE]))
+
+        changes = [('put', table, item) for table, item in items]
+        record_changes(changes)
+        update_derived_items(changes)
+        return {
+            'statusCode': 201,
+            'body': json.dumps({
+                'group_name': group_name,
+                'members': sum(1 for table, _ in items if table == 'users'),
+                'contacts': sum(1 for table, _ in items if table == 'contacts'),
+                'permissions': sum(1 for table, _ in items if table == 'permissions'),
+                'transactions': -(-len(items) // TRANSACT_WRITE_SIZE)
+            })
+        }
+    except Exception as e:
+        logger.error(f"Error provisioning group: {e}")
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'error': str(e)})
+        }
+
+CHANGES_DEFAULT_LIMIT = 100
+CHANGE_GAP_GRACE_SECONDS = 60
+
+def change_entry(item: Dict) -> Dict:
+    """Shape a change log item for the API"""
+    return {
+        'revision': int(item['revision']),
+        'op': item['op'],
+        'table': item['table'],
+        'item': item['item'],
+        'changed_at': item['changed_at']
+    }
+
+@cached_read
+def get_changes(params: Optional[Dict]) -> Dict:
+    """Get the directory changes made after a revision, oldest first"""
+    params = params or {}
+    try:
+        since = int(params['since'])
+        limit = int(params.get('limit', CHANGES_DEFAULT_LIMIT))
+    except (KeyError, ValueError):
+        return bad_request('since must be a revision number and limit an integer')
+    if since < 0 or limit < 1 or limit > MAX_PAGE_LIMIT:
+        return bad_request(f'since must be 0 or more and limit between 1 and {MAX_PAGE_LIMIT}')
+
+    try:
+        items, last_key = read_items(
+            get_table(DIRECTORY_CHANGES_TABLE).query, limit,
+            KeyConditionExpression='#log = :log AND revision > :since',
+            ExpressionAttributeNames={'#log': 'log'},
+            ExpressionAttributeValues={':log': CHANGE_LOG_KEY, ':since': since},
+            ConsistentRead=True
+        )
+        changes = [change_entry(item) for item in items]
+        has_more = last_key is not None
+
+        # Revisions are consecutive. A recent hole is a concurrent write that
+        # has bumped the revision but not landed its entry yet, so stop the
+        # page there. An old hole means entries expired or were never written
+        # and the caller cannot catch up from the log alone.
+        expected = since + 1
+        for position, change in enumerate(changes):
+            if change['revision'] != expected:
+                changed_at = datetime.fromisoformat(change['changed_at'])
+                if (datetime.now(timezone.utc) - changed_at).total_seconds() < CHANGE_GAP_GRACE_SECONDS:
+                    changes = changes[:position]
+                    has_more = True
+                    # The missing entry lands without moving the revision, so a cached page would stay short
+                    skip_cache()
+                    break
+                return {
+                    'statusCode': 410,
+                    'body': json.dumps({
+                        'error': f'Changes after revision {expected - 1} are no longer available; reload from /v1/snapshot',
+                        'missing_revision': expected
+                    })
+                }
+            expected += 1
+
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'changes': changes,
+                'next_since': changes[-1]['revision'] if changes else since,
+                'has_more': has_more
+            })
+        }
+    except Exception as e:
+        logger.error(f"Error getting changes: {e}")
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'error': str(e)})
+        }
+
+# Full-directory snapshot
+SNAPSHOT_SEGMENTS = int(os.environ.get('SNAPSHOT_SEGMENTS', '4'))
+SNAPSHOT_MAX_ATTEMPTS = 3
+_snapshot_cache = {}
+
+def scan_tables(table_names: List[str], total_segments: int = SNAPSHOT_SEGMENTS) -> List[List[Dict]]:
+    """Read whole tables with parallel segmented scans, every segment of every table in one fan-out"""
+    def scan_segment(entry: Tuple[str, int]) -> List[Dict]:
+        table_name, segment = entry
+        items, _ = read_items(
+            get_table(table_name).scan,
+            Segment=segment,
+            TotalSegments=total_segments,
+            ConsistentRead=True
+        )
+        return items
+
+    segments = parallel_map(scan_segment, [(name, segment) for name in table_names for segment in range(total_segments)])
+    return [
+        [item for items in segments[index:index + total_segments] for item in items]
+        for index in range(0, len(segments), total_segments)
+    ]
+
+def build_snapshot() -> Dict:
+    """
+    Read permissions, memberships and contacts into one document.
+
+    The revision is read before and after the scans; if a write landed in
+    between, the scans are repeated so the document matches its revision.
+    """
+    tables = [
+        ('permissions', GROUP_PERMISSIONS_TABLE),
+        ('memberships', USER_GROUPS_TABLE),
+        ('contacts', CONTACT_INFO_TABLE)
+    ]
+    for _ in range(SNAPSHOT_MAX_ATTEMPTS):
+        revision = read_revision(consistent=True)
+        # Segments of all three tables run on the shared pool together
+        contents = scan_tables([table_name for _, table_name in tables])
+        if read_revision(consistent=True) == revision:
+            break
+    else:
+        raise RuntimeError('Directory kept changing while the snapshot was taken')
+
+    snapshot = {
+        'revision': revision,
+        'generated_at': datetime.now(timezone.utc).isoformat()
+    }
+    for (name, _), items in zip(tables, contents):
+        snapshot[name] = items
+
+    body = json.dumps(snapshot)
+    return {
+        'revision': revision,
+        'body': body,
+        'gzip': base64.b64encode(gzip.compress(body.encode('utf-8'))).decode('ascii')
+    }
+
+def get_snapshot(accept_encoding: Optional[str]) -> Dict:
+    """Get the whole directory as one document, reusing the last one until the revision moves"""
+    try:
+        revision = get_revision()
+        snapshot = _snapshot_cache.get('snapshot')
+        if snapshot is None or revision is None or snapshot['revision'] != revision:
+            snapshot = build_snapshot()
+            _snapshot_cache['snapshot'] = snapshot
+    except Exception as e:
+        logger.error(f"Error building snapshot: {e}")
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'error': str(e)})
+        }
+
+    # The encoding follows Accept-Encoding, so caches must key on it too
+    headers = {'X-Directory-Revision': str(snapshot['revision']), 'Vary': 'Accept-Encoding'}
+    if accepts_gzip(accept_encoding):
+        return {
+            'statusCode': 200,
+            'headers': {
+                **headers,
+                'Content-Encoding': 'gzip',
+                'ETag': f'"snapshot-{snapshot["revision"]}-gzip"'
+            },
+            'isBase64Encoded': True,
+            'body': snapshot['gzip']
+        }
+    return {
+        'statusCode': 200,
+        'headers': {**headers, 'ETag': f'"snapshot-{snapshot["revision"]}"'},
+        'body': snapshot['body']
+    }
+
+# Group catalog. One summary item per group keeps its member and permission
+# counts and contact types, so listing groups reads one item per group rather
+# than every membership row.
+def update_group_summaries(changes: List[Tuple[str, str, Dict]]) -> None:
+    """
+    Apply directory changes to the group summaries.
+
+    Changes are (op, table, item) like record_changes takes, but must only
+    include writes that took effect: a put of a new row or a delete of an
+    existing one. Memberships and permissions move a group's counts, creating
+    its summary the first time; contacts only touch groups that already have
+    one, since a contact target may as well be a user. Failures are logged
+    rather than raised because the directory write itself has succeeded;
+    rebuild_group_summaries() puts drifted counts right.
+    """
+    counts, added, deleted = {}, {}, {}
+    for op, table, item in changes:
+        step = 1 if op == 'put' else -1
+        if table == 'users':
+            counts.setdefault(item['group_name'], [0, 0])[0] += step
+        elif table == 'permissions':
+            counts.setdefault(item['group_name'], [0, 0])[1] += step
+        elif table == 'contacts':
+            (added if op == 'put' else deleted).setdefault(item['target'], set()).add(item['type'])
+
+    summaries = get_table(GROUP_SUMMARY_TABLE)
+
+    def update_group(group_name: str) -> None:
+        if group_name in counts:
+            members, permissions = counts[group_name]
+            response = summaries.update_item(
+                Key={'group_name': group_name},
+                UpdateExpression='ADD member_count :members, permission_count :permissions',
+                ExpressionAttributeValues={':members': members, ':permissions': permissions},
+                ReturnValues='ALL_OLD'
+            )
+            if 'Attributes' not in response:
+                # A new summary: pick up the contacts the group already had
+                backfill_contact_types(group_name)
+        # DynamoDB will not ADD and DELETE the same set in one update, so each gets its own
+        for expression, types in (('ADD', added.get(group_name)), ('DELETE', deleted.get(group_name))):
+            if not types:
+                continue
+            try:
+                summaries.update_item(
+                    Key={'group_name': group_name},
+                    UpdateExpression=f'{expression} contact_types :types',
+                    ConditionExpression='attribute_exists(group_name)',
+                    ExpressionAttributeValues={':types': types}
+                )
+            except ConditionalCheckFailedException:
+                # Not a group, or not one yet
+                pass
+
+    try:
+        parallel_map(update_group, set(counts) | set(added) | set(deleted))
+    except Exception as e:
+        logger.warning(f"Error updating group summaries: {e}")
+
+def backfill_contact_types(group_name: str) -> None:
+    """Copy a group's existing contact types into its summary"""
+    contacts, _ = read_items(
+        get_table(CONTACT_INFO_TABLE).query,
+        KeyConditionExpression='target = :target',
+        ExpressionAttributeValues={':target': group_name},
+        **projection(['type'])
+    )
+    types = {contact['type'] for contact in contacts}
+    if types:
+        get_table(GROUP_SUMMARY_TABLE).update_item(
+            Key={'group_name': group_name},
+            UpdateExpression='ADD contact_types :types',
+            ExpressionAttributeValues={':types': types}
+        )
+
+def rebuild_group_summaries() -> int:
+    """
+    Recompute every group summary from full scans of the directory tables.
+
+    Run it once to seed the summaries of an existing directory, or to repair
+    them after logged update failures. Writes that land during the rebuild
+    may be counted twice or not at all, so run it while the directory is
+    quiet. Returns the number of groups written.
+    """
+    memberships, permissions, contacts, stale = scan_tables(
+        [USER_GROUPS_TABLE, GROUP_PERMISSIONS_TABLE, CONTACT_INFO_TABLE, GROUP_SUMMARY_TABLE]
+    )
+    summaries = {}
+    for item in memberships:
+        summaries.setdefault(item['group_name'], {'member_count': 0, 'permission_count': 0})['member_count'] += 1
+    for item in permissions:
+        summaries.setdefault(item['group_name'], {'member_count': 0, 'permission_count': 0})['permission_count'] += 1
+    for item in contacts:
+        if item['target'] in summaries:
+            summaries[item['target']].setdefault('contact_types', set()).add(item['type'])
+
+    requests = [
+        (GROUP_SUMMARY_TABLE, {'PutRequest': {'Item': {'group_name': group_name, **summary}}})
+        for group_name, summary in summaries.items()
+    ] + [
+        (GROUP_SUMMARY_TABLE, {'DeleteRequest': {'Key': {'group_name': item['group_name']}}})
+        for item in stale if item['group_name'] not in summaries
+    ]
+    failures = run_batch_write(requests)
+    if failures:
+        raise RuntimeError(f'{len(failures)} group summaries could not be written')
+    read_cache.clear()
+    return len(summaries)
+
+def group_entry(item: Dict) -> Dict:
+    """Shape a group summary item for the API"""
+    return {
+        'group_name': item['group_name'],
+        'member_count': int(item.get('member_count', 0)),
+        'permission_count': int(item.get('permission_count', 0)),
+        'contact_types': sorted(item.get('contact_types', []))
+    }
+
+@cached_read
+def get_groups(params: Optional[Dict]) -> Dict:
+    """List groups with their member and permission counts and contact types"""
+    try:
+        limit, start_key = parse_page_params(params)
+    except ValueError as e:
+        return bad_request(str(e))
+    paged = is_paged(params)
+
+    try:
+        items, last_key = read_items(get_table(GROUP_SUMMARY_TABLE).scan, limit, start_key)
+        # A group whose last member and permission are gone keeps a zeroed summary; leave it out
+        groups = [group_entry(item) for item in items]
+        groups = [group for group in groups if group['member_count'] > 0 or group['permission_count'] > 0]
+        if not paged:
+            groups.sort(key=lambda group: group['group_name'])
+        return list_response(groups, last_key, paged)
+    except Exception as e:
+        logger.error(f"Error getting groups: {e}")
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'error': str(e)})
+        }
+
+# Prefix search. Every user, group and contact target has an entry in the
+# search table, partitioned by kind and the first character of its lowercased
+# name and sorted by that name, so a prefix is one begins_with query that
+# reads only the matches, in order. Entries count the rows that mention the
+# name and are deleted when the count drops to zero.
+SEARCH_KINDS = ('user', 'group', 'target')
+SEARCH_DEFAULT_LIMIT = 10
+SEARCH_MAX_LIMIT = int(os.environ.get('SEARCH_MAX_LIMIT', '50'))
+
+def search_key(kind: str, name: str) -> Dict:
+    """Key of the search entry for a name; the original spelling follows the lowercased one"""
+    term = name.lower()
+    return {'bucket': f'{kind}#{term[:1]}', 'term': f'{term}#{name}'}
+
+def search_names(table: str, item: Dict) -> List[Tuple[str, str]]:
+    """(kind, name) pairs a directory row makes searchable"""
+    if table == 'users':
+        return [('user', item['user_id']), ('group', item['group_name'])]
+    if table == 'permissions':
+        return [('group', item['group_name'])]
+    return [('target', item['target'])]
+
+def update_search_index(changes: List[Tuple[str, str, Dict]]) -> None:
+    """Move the reference counts of the search entries named by changes that took effect"""
+    deltas = {}
+    for op, table, item in changes:
+        for name in search_names(table, item):
+            deltas[name] = deltas.get(name, 0) + (1 if op == 'put' else -1)
+
+    index = get_table(SEARCH_INDEX_TABLE)
+
+    def update_entry(entry: Tuple[Tuple[str, str], int]) -> None:
+        (kind, name), step = entry
+        key = search_key(kind, name)
+        response = index.update_item(
+            Key=key,
+            UpdateExpression='SET #kind = :kind, #name = :name ADD #refs :step',
+            ExpressionAttributeNames={'#kind': 'kind', '#name': 'name', '#refs': 'refs'},
+            ExpressionAttributeValues={':kind': kind, ':name': name, ':step': step},
+            ReturnValues='UPDATED_NEW'
+        )
+        if response['Attributes']['refs'] <= 0:
+            try:
+                # Conditional, in case a concurrent write has referenced the name again
+                index.delete_item(
+                    Key=key,
+                    ConditionExpression='#refs <= :zero',
+                    ExpressionAttributeNames={'#refs': 'refs'},
+                    ExpressionAttributeValues={':zero': 0}
+                )
+            except ConditionalCheckFailedException:
+                pass
+
+    try:
+        parallel_map(update_entry, [entry for entry in deltas.items() if entry[1]])
+    except Exception as e:
+        logger.warning(f"Error updating search index: {e}")
+
+def update_derived_items(changes: List[Tuple[str, str, Dict]]) -> None:
+    """Bring the group summaries and search index in line with directory writes that took effect"""
+    update_group_summaries(changes)
+    update_search_index(changes)
+
+def rebuild_search_index() -> int:
+    """
+    Recompute every search entry from full scans of the directory tables.
+
+    Like rebuild_group_summaries(), it seeds an existing directory or repairs
+    drift and should run while the directory is quiet. Returns the number of
+    entries written.
+    """
+    memberships, permissions, contacts, stale = scan_tables(
+        [USER_GROUPS_TABLE, GROUP_PERMISSIONS_TABLE, CONTACT_INFO_TABLE, SEARCH_INDEX_TABLE]
+    )
+    refs = {}
+    for table, items in (('users', memberships), ('permissions', permissions), ('contacts', contacts)):
+        for item in items:
+            for name in search_names(table, item):
+                refs[name] = refs.get(name, 0) + 1
+
+    entries = {}
+    for (kind, name), count in refs.items():
+        key = search_key(kind, name)
+        entries[(key['bucket'], key['term'])] = {**key, 'kind': kind, 'name': name, 'refs': count}
+    requests = [(SEARCH_INDEX_TABLE, {'PutRequest': {'Item': entry}}) for entry in entries.values()] + [
+        (SEARCH_INDEX_TABLE, {'DeleteRequest': {'Key': {'bucket': item['bucket'], 'term': item['term']}}})
+        for item in stale if (item['bucket'], item['term']) not in entries
+    ]
+    failures = run_batch_write(requests)
+    if failures:
+        raise RuntimeError(f'{len(failures)} search entries could not be written')
+    read_cache.clear()
+    return len(entries)
+
+@cached_read
+def search(params: Dict) -> Dict:
+    """Names of one kind starting with a prefix, ignoring case, in name order"""
+    prefix = params['prefix'].lower()
+    limit = params.get('limit', SEARCH_DEFAULT_LIMIT)
+    if not prefix:
+        return bad_request('prefix must not be empty')
+    if limit < 1 or limit > SEARCH_MAX_LIMIT:
+        return bad_request(f'limit must be between 1 and {SEARCH_MAX_LIMIT}')
+
+    try:
+        response = get_table(SEARCH_INDEX_TABLE).query(
+            # bucket, name and others are DynamoDB reserved words, hence the placeholders
+            KeyConditionExpression='#bucket = :bucket AND begins_with(#term, :prefix)',
+            ExpressionAttributeValues={':bucket': f"{params['kind']}#{prefix[:1]}", ':prefix': prefix},
+            ProjectionExpression='#kind, #name',
+            ExpressionAttributeNames={'#bucket': 'bucket', '#term': 'term', '#kind': 'kind', '#name': 'name'},
+            Limit=limit
+        )
+        return {
+            'statusCode': 200,
+            'body': json.dumps(response.get('Items', []))
+        }
+    except Exception as e:
+        logger.error(f"Error searching: {e}")
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'error': str(e)})
+        }
+
+# Routing table
+class Param:
+    """A typed query or path parameter, checked before the handler runs"""
+
+    def __init__(self, name: str, kind: type = str, required: bool = False, description: Optional[str] = None,
+                 location: str = 'query', repeated: bool = False, **schema):
+        self.name = name
+        self.kind = kind
+        self.required = required or location == 'path'
+        self.description = description
+        self.location = location
+        # Repeated parameters (?target=a&target=b) are folded into one comma separated value
+        self.repeated = repeated
+        self.schema = {'type': 'integer' if kind is int else 'string', **schema}
+
+    def convert(self, raw: str) -> Any:
+        if self.kind is int:
+            try:
+                return int(raw)
+            except (TypeError, ValueError):
+                raise ValueError(f'{self.name} must be an integer')
+        if 'enum' in self.schema and raw not in self.schema['enum']:
+            raise ValueError(f"{self.name} must be one of {', '.join(self.schema['enum'])}")
+        return raw
+
+    def openapi(self) -> Dict:
+        spec = {'name': self.name, 'in': self.location, 'schema': self.schema}
+        if self.required:
+            spec['required'] = True
+        if self.description:
+            spec['description'] = self.description
+        return spec
+
+class Request:
+    """What a route handler receives: the event plus its checked parameters and body"""
+
+    def __init__(self, event: Dict, path_params: Dict, query: Dict, body: Any = None):
+        self.event = event
+        self.path_params = path_params
+        self.query = query
+        self.body = body
+
+    def header(self, name: str) -> Optional[str]:
+        return request_header(self.event, name)
+
+class Route:
+    """A method and path template bound to a handler, plus what the docs say about it"""
+
+    def __init__(self, method: str, template: str, handler: Callable[[Request], Dict], summary: str,
+                 params: Iterable[Param] = (), body: Optional[Dict] = None, responses: Optional[Dict] = None):
+        self.method = method
+        self.template = template
+        self.handler = handler
+        self.summary = summary
+        names = re.findall(r'{(\w+)}', template)
+        self.params = [Param(name, location='path') for name in names] + list(params)
+        self.body = body
+        self.responses = responses or {'200': {'description': 'Successful response'}}
+        self.pattern = re.compile('^' + re.sub(r'{(\w+)}', r'(?P<\1>[^/]+)', template) + '$') if names else None
+
+    def bind(self, event: Dict, path_values: Dict[str, str]) -> Request:
+        """Check and convert the request's parameters, raising ValueError with a client-facing message"""
+        query = dict(event.get('queryStringParameters') or {})
+        multi = event.get('multiValueQueryStringParameters') or {}
+        path_params = {}
+        missing = []
+        for param in self.params:
+            if param.location == 'path':
+                value = path_values[param.name]
+                # Decode once: only a raw path still holds the percent encoding
+                path_params[param.name] = param.convert(urllib.parse.unquote(value) if 'rawPath' in event else value)
+                continue
+            if param.repeated and len(multi.get(param.name) or []) > 1:
+                query[param.name] = ','.join(multi[param.name])
+            if param.name in query:
+                query[param.name] = param.convert(query[param.name])
+            elif param.required:
+                missing.append(param.name)
+        if missing:
+            raise ValueError(f"Missing required parameters: {', '.join(missing)}")
+
+        body = None
+        if self.body is not None:
+            try:
+                body = parse_body(event)
+            except (ValueError, binascii.Error):
+                raise ValueError('Request body must be valid JSON')
+        return Request(event, path_params, query, body)
+
+    def openapi(self) -> Dict:
+        operation = {
+            'summary': self.summary,
+            'tags': ['admin' if self.template.startswith('/v1/admin/') else 'directory'],
+            'security': [{'apiKeyAuth': []}],
+            'responses': self.responses
+        }
+        if self.params:
+            operation['parameters'] = [param.openapi() for param in self.params]
+        if self.body is not None:
+            operation['requestBody'] = {
+                'required': True,
+                'content': {'application/json': {'schema': self.body}}
+            }
+        return operation
+
+class Router:
+    """The routing table compiled for lookup: fixed paths by dict, templated paths by regex"""
+
+    def __init__(self, routes: List[Route]):
+        self.routes = routes
+        self._fixed: Dict[str, Dict[str, Route]] = {}
+        self._templated: List[Tuple[Any, Dict[str, Route]]] = []
+        templated = {}
+        for route in routes:
+            if route.pattern is None:
+                self._fixed.setdefault(route.template, {})[route.method] = route
+            else:
+                if route.template not in templated:
+                    templated[route.template] = {}
+                    self._templated.append((route.pattern, templated[route.template]))
+                templated[route.template][route.method] = route
+
+    def match(self, path: str) -> Tuple[Dict[str, Route], Dict[str, str]]:
+        """Routes for a path keyed by method, plus the raw path parameter values"""
+        methods = self._fixed.get(path)
+        if methods:
+            return methods, {}
+        for pattern, methods in self._templated:
+            match = pattern.match(path)
+            if match:
+                return methods, match.groupdict()
+        return {}, {}
+
+def json_content(description: str, schema: Dict) -> Dict:
+    """OpenAPI response with a JSON body"""
+    return {'description': description, 'content': {'application/json': {'schema': schema}}}
+
+def object_schema(*names: str, required: bool = True) -> Dict:
+    """OpenAPI schema of an object with string attributes"""
+    schema = {'type': 'object', 'properties': {name: {'type': 'string'} for name in names}}
+    if required:
+        schema['required'] = list(names)
+    return schema
+
+PERMISSION_SCHEMA = object_schema('group_name', 'service', 'action')
+MEMBERSHIP_SCHEMA = object_schema('user_id', 'group_name')
+CONTACT_SCHEMA = object_schema('target', 'type', 'data')
+
+PAGE_PARAMS = [
+    Param('limit', int, minimum=1, maximum=MAX_PAGE_LIMIT,
+          description='Return a single page of at most this many items as {items, next_cursor}'),
+    Param('cursor', description="Continuation token from a previous page's next_cursor")
+]
+
+def fields_param(table_name: str) -> Param:
+    """The fields= parameter of a listing over table_name"""
+    return Param('fields', description='Only return these attributes (comma separated): '
+                 + ', '.join(FIELD_ATTRIBUTES[table_name]))
+
+def listing(description: str, item_schema: Dict) -> Dict:
+    """Responses of a list endpoint: a bare array, or a page envelope when limit or cursor is given"""
+    return {
+        '200': json_content(description, {
+            'oneOf': [
+                {'type': 'array', 'items': item_schema},
+                {
+                    'type': 'object',
+                    'properties': {
+                        'items': {'type': 'array', 'items': item_schema},
+                        'next_cursor': {'type': 'string', 'nullable': True}
+                    }
+                }
+            ]
+        }),
+        '400': {'description': 'Invalid parameters'}
+    }
+
+ROUTES = [
+    Route('GET', '/v1/docs', lambda request: generate_openapi_docs(), 'Get this OpenAPI document'),
+    Route(
+        'GET', '/v1/permissions', lambda request: get_permissions(request.query), 'Get permissions',
+        params=[
+            Param('group_name', description='Permissions granted to a group'),
+            Param('service', description='Groups with permissions on a service, including service "all"'),
+            Param('action', description='With service, groups granted the action, including wildcard grants'),
+            fields_param(GROUP_PERMISSIONS_TABLE),
+            *PAGE_PARAMS
+        ],
+        responses=listing('Permissions', PERMISSION_SCHEMA)
+    ),
+    Route(
+        'GET', '/v1/users', lambda request: get_user_groups(request.query), 'Get group memberships',
+        params=[
+            Param('user_id', description="A user's groups"),
+            Param('group_name', description="A group's members"),
+            *PAGE_PARAMS
+        ],
+        responses=listing('Memberships', MEMBERSHIP_SCHEMA)
+    ),
+    Route(
+        'GET', '/v1/users/{id}/permissions',
+        lambda request: get_user_permissions({**request.query, 'user_id': request.path_params['id']}),
+        "Get a user's effective permissions across all of their groups",
+        params=[Param('service', description='Only permissions on these services or "all" (comma separated)')],
+        responses={
+            '200': json_content('Groups and de-duplicated permissions, by service and action', {
+                'type': 'object',
+                'properties': {
+                    'user_id': {'type': 'string'},
+                    'groups': {'type': 'array', 'items': {'type': 'string'}},
+                    'permissions': {'type': 'array', 'items': {
+                        'type': 'object',
+                        'properties': {
+                            'service': {'type': 'string'},
+                            'action': {'type': 'string'},
+                            'service_action': {'type': 'string'},
+                            'rule': {'type': 'string', 'enum': ['exact', 'service#all', 'all#action', 'all#all']},
+                            'groups': {'type': 'array', 'items': {'type': 'string'}},
+                            'covered_by': {'type': 'array', 'items': {'type': 'string'}}
+                        }
+                    }}
+                }
+            }),
+            '404': {'description': 'User is not a member of any group'}
+        }
+    ),
+    Route(
+        'GET', '/v1/contacts', lambda request: get_contact(request.query), 'Get contact information',
+        params=[
+            Param('target', repeated=True, description='Target, or a comma separated list of targets'),
+            Param('type', repeated=True, description='Contact type, or a comma separated list of types'),
+            fields_param(CONTACT_INFO_TABLE),
+            *PAGE_PARAMS
+        ],
+        responses={**listing('Contacts', CONTACT_SCHEMA), '404': {'description': 'Contact information not found'}}
+    ),
+    Route(
+        'GET', '/v1/groups', lambda request: get_groups(request.query),
+        'List groups with their member count, permission count and contact types',
+        params=PAGE_PARAMS,
+        responses=listing('Groups, by name unless paged', {
+            'type': 'object',
+            'properties': {
+                'group_name': {'type': 'string'},
+                'member_count': {'type': 'integer'},
+                'permission_count': {'type': 'integer'},
+                'contact_types': {'type': 'array', 'items': {'type': 'string'}}
+            }
+        })
+    ),
+    Route(
+        'GET', '/v1/search', lambda request: search(request.query),
+        'Find users, groups or contact targets whose name starts with a prefix, e.g. for typeahead',
+        params=[
+            Param('prefix', required=True, description='Start of the name, matched without regard to case'),
+            Param('kind', required=True, enum=list(SEARCH_KINDS)),
+            Param('limit', int, minimum=1, maximum=SEARCH_MAX_LIMIT,
+                  description=f'Maximum number of matches (default {SEARCH_DEFAULT_LIMIT})')
+        ],
+        responses={
+            '200': json_content('Matches in name order', {'type': 'array', 'items': object_schema('kind', 'name')}),
+            '400': {'description': 'Invalid parameters'}
+        }
+    ),
+    Route(
+        'GET', '/v1/groups/{name}/roster',
+        lambda request: get_group_roster({**request.query, 'group_name': request.path_params['name']}),
+        "Get a group's contacts and its members with their contacts",
+        params=[Param('contact_type', description='Only return these contact types (comma separated)')],
+        responses={
+            '200': {'description': 'Group roster'},
+            '404': {'description': 'Group has no members, contacts or permissions'}
+        }
+    ),
+    Route(
+        'GET', '/v1/snapshot', lambda request: get_snapshot(request.header('Accept-Encoding')),
+        'Get permissions, memberships and contacts as one document tagged with the directory revision',
+        responses={
+            '200': json_content('Directory snapshot, gzip encoded when the client accepts it', {
+                'type': 'object',
+                'properties': {
+                    'revision': {'type': 'integer'},
+                    'generated_at': {'type': 'string', 'format': 'date-time'},
+                    'permissions': {'type': 'array', 'items': PERMISSION_SCHEMA},
+                    'memberships': {'type': 'array', 'items': MEMBERSHIP_SCHEMA},
+                    'contacts': {'type': 'array', 'items': CONTACT_SCHEMA}
+                }
+            })
+        }
+    ),
+    Route(
+        'GET', '/v1/changes', lambda request: get_changes(request.query),
+        'Get the directory changes made after a revision, oldest first',
+        params=[
+            Param('since', int, required=True, minimum=0,
+                  description="Last revision the caller has applied, e.g. a snapshot's revision"),
+            Param('limit', int, minimum=1, maximum=MAX_PAGE_LIMIT, description='Maximum number of changes to return')
+        ],
+        responses={
+            '200': {'description': 'Changes plus next_since to pass on the following call and has_more'},
+            '410': {'description': 'The log no longer covers the requested revision; reload from /snapshot'}
+        }
+    ),
+    Route(
+        'GET', '/v1/authorize', lambda request: authorize(request.query),
+        'Decide whether a user may perform an action on a service',
+        params=[Param('user_id', required=True), Param('service', required=True), Param('action', required=True)],
+        responses={
+            '200': json_content('Authorization decision', {
+                'type': 'object',
+                'properties': {
+                    'allowed': {'type': 'boolean'},
+                    'user_id': {'type': 'string'},
+                    'service': {'type': 'string'},
+                    'action': {'type': 'string'},
+                    'group_name': {'type': 'string', 'nullable': True},
+                    'rule': {
+                        'type': 'string',
+                        'nullable': True,
+                        'enum': ['exact', 'service#all', 'all#action', 'all#all']
+                    },
+                    'service_action': {'type': 'string', 'nullable': True}
+                }
+            })
+        }
+    ),
+    Route(
+        'POST', '/v1/admin/permissions', lambda request: create_permission(request.body), 'Create permission',
+        body=PERMISSION_SCHEMA,
+        responses={
+            '201': {'description': 'Permission created successfully'},
+            '409': {'description': 'Permission already exists'}
+        }
+    ),
+    Route(
+        'DELETE', '/v1/admin/permissions', lambda request: delete_permission(request.query), 'Delete permission',
+        params=[
+            Param('group_name', required=True),
+            Param('service_action', required=True, description='service#action, as stored')
+        ],
+        responses={
+            '200': {'description': 'Permission deleted successfully'},
+            '404': {'description': 'Permission not found'}
+        }
+    ),
+    Route(
+        'POST', '/v1/admin/users', lambda request: assign_user_to_group(request.body), 'Assign a user to a group',
+        body=MEMBERSHIP_SCHEMA,
+        responses={
+            '201': {'description': 'User assigned to group successfully'},
+            '409': {'description': 'User is already assigned to this group'}
+        }
+    ),
+    Route(
+        'DELETE', '/v1/admin/users', lambda request: remove_user_from_group(request.query), 'Remove a user from a group',
+        params=[Param('user_id', required=True), Param('group_name', required=True)]
+    ),
+    Route(
+        'POST', '/v1/admin/contacts', lambda request: create_contact(request.body), 'Create contact information',
+        body=CONTACT_SCHEMA,
+        responses={
+            '201': {'description': 'Contact information created successfully'},
+            '409': {'description': 'Contact information already exists for this target and type'}
+        }
+    ),
+    Route(
+        'DELETE', '/v1/admin/contacts', lambda request: delete_contact(request.query), 'Delete contact information',
+        params=[Param('target', required=True), Param('type', required=True)]
+    ),
+    Route(
+        'POST', '/v1/admin/groups', lambda request: provision_group(request.body),
+        'Create a group with its members, contacts and permissions in one request',
+        body={
+            'type': 'object',
+            'properties': {
+                'group_name': {'type': 'string'},
+                'members': {'type': 'array', 'items': {'type': 'string'}},
+                'contacts': {'type': 'array', 'items': object_schema('type', 'data')},
+                'permissions': {'type': 'array', 'items': object_schema('service', 'action')}
+            },
+            'required': ['group_name']
+        },
+        responses={
+            '201': {'description': 'Group created; counts of what was written'},
+            '400': {'description': 'Invalid group definition'},
+            '409': {'description': 'The group, or some of its items, already exist; nothing was written'}
+        }
+    ),
+    Route(
+        'PUT', '/v1/admin/groups/{name}/members',
+        lambda request: set_group_members(
+            request.path_params['name'], request.body, request.query.get('dry_run') == 'true'
+        ),
+        "Replace a group's members with the given list, writing only the difference",
+        params=[Param('dry_run', enum=['true', 'false'], description='Report the difference without applying it')],
+        body={
+            'type': 'object',
+            'properties': {'members': {'type': 'array', 'items': {'type': 'string'}, 'maxItems': MAX_GROUP_MEMBERS}},
+            'required': ['members']
+        },
+        responses={
+            '200': json_content('Members added and removed, plus any writes that failed', {
+                'type': 'object',
+                'properties': {
+                    'group_name': {'type': 'string'},
+                    'dry_run': {'type': 'boolean'},
+                    'added': {'type': 'array', 'items': {'type': 'string'}},
+                    'removed': {'type': 'array', 'items': {'type': 'string'}},
+                    'unchanged': {'type': 'integer'},
+                    'failed': {
+                        'type': 'array',
+                        'items': object_schema('user_id', 'op', 'error')
+                    }
+                }
+            }),
+            '400': {'description': 'members is not a list of user ids'}
+        }
+    ),
+    Route(
+        'POST', '/v1/admin/batch', lambda request: batch_write(request.body),
+        'Apply a mixed list of put/delete operations across the directory tables',
+        body={
+            'type': 'object',
+            'properties': {
+                'operations': {
+                    'type': 'array',
+                    'items': {
+                        'type': 'object',
+                        'properties': {
+                            'op': {'type': 'string', 'enum': ['put', 'delete']},
+                            'table': {'type': 'string', 'enum': ['permissions', 'users', 'contacts']},
+                            'item': {'type': 'object'}
+                        },
+                        'required': ['op', 'table', 'item']
+                    }
+                }
+            },
+            'required': ['operations']
+        },
+        responses={'200': {'description': 'Outcome of each operation, in request order'}}
+    )
+]
+
+router = Router(ROUTES)
+
+def build_openapi_spec() -> Dict:
+    """Build the OpenAPI document from the routing table"""
+    paths = {}
+    for route in ROUTES:
+        # Paths are documented relative to the server URL, which carries /v1
+        paths.setdefault(route.template[len('/v1'):], {})[route.method.lower()] = route.openapi()
+
+    return {
         "openapi": "3.0.0",
         "info": {
             "title": "Directory Service API",
-            "version": "1.0.0",
+            "version": API_VERSION,
             "description": "A serverless directory service for managing user groups, permissions, and contact information"
         },
         "servers": [
@@ -662,7 +2999,7 @@ def generate_openapi_docs() -> Dict:
                 "url": "{baseUrl}/v1",
                 "variables": {
                     "baseUrl": {
-                        "default": "https://api.example.com"  # This will be replaced dynamically
+                        "default": "https://api.example.com"
                     }
                 }
             }
@@ -676,88 +3013,32 @@ def generate_openapi_docs() -> Dict:
                 }
             }
         },
-        "paths": {
-            "/permissions": {
-                "get": {
-                    "summary": "Get permissions",
-                    "security": [{"apiKeyAuth": []}],
-                    "parameters": [
-                        {
-                            "name": "group_name",
-                            "in": "query",
-                            "schema": {"type": "string"},
-                            "description": "Filter by group name"
-                        },
-                        {
-                            "name": "service_action",
-                            "in": "query",
-                            "schema": {"type": "string"},
-                            "description": "Filter by service action"
-                        },
-                        {
-                            "name": "service",
-                            "in": "query",
-                            "schema": {"type": "string"},
-                            "description": "Filter by service"
-                        }
-                    ],
-                    "responses": {
-                        "200": {
-                            "description": "Successful response",
-                            "content": {
-                                "application/json": {
-                                    "schema": {
-                                        "type": "array",
-                                        "items": {
-                                            "type": "object",
-                                            "properties": {
-                                                "group_name": {"type": "string"},
-                                                "service": {"type": "string"},
-                                                "action": {"type": "string"}
-                                            }
-                                        }
-                                    }
-                                }
-                            }
-                        }
-                    }
-                }
-            },
-            "/admin/permissions": {
-                "post": {
-                    "summary": "Create permission",
-                    "security": [{"apiKeyAuth": []}],
-                    "requestBody": {
-                        "required": True,
-                        "content": {
-                            "application/json": {
-                                "schema": {
-                                    "type": "object",
-                                    "properties": {
-                                        "group_name": {"type": "string"},
-                                        "service": {"type": "string"},
-                                        "action": {"type": "string"}
-                                    },
-                                    "required": ["group_name", "service", "action"]
-                                }
-                            }
-                        }
-                    },
-                    "responses": {
-                        "200": {
-                            "description": "Permission created successfully"
-                        }
-                    }
-                }
-            }
-            # Add other endpoints similarly...
-        }
+        "paths": paths
     }
-    
+
+@functools.lru_cache(maxsize=None)
+def openapi_document() -> Tuple[str, str]:
+    """The OpenAPI document serialized once per container, with its ETag"""
+    body = json.dumps(build_openapi_spec())
+    return body, compute_etag(body)
+
+def generate_openapi_docs() -> Dict:
+    """Generate OpenAPI documentation"""
+    body, etag = openapi_document()
     return {
         'statusCode': 200,
         'headers': {
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json',
+            'ETag': etag
         },
-        'body': json.dumps(openapi_spec)
-    } 
\ No newline at end of file
+        'body': body
+    }
+
+# Eager mode pays for the storage client, table handles and static payloads
+# during init rather than in the first request
+if not LAZY_INIT:
+    for table_name in TABLE_SCHEMAS:
+        get_table(table_name)
+    openapi_document()
+
+init_report['module_ms'] = round((time.perf_counter() - _init_started) * 1000, 1)
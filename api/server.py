@@ -0,0 +1,306 @@
+"""
+Run the Directory Service as a long-lived HTTP server instead of a Lambda.
+
+`app` is a plain ASGI application. Each request is turned into the API
+Gateway proxy event that lambda_function.lambda_handler already understands
+and runs on a thread pool, so routing, caching, compression, ETags and metrics
+behave exactly as they do behind API Gateway. The table handles and read
+cache live for the whole process and are shared by every request it serves.
+Each request thread, like each of lambda_function's fan-out workers, calls
+DynamoDB through its own boto3 resource and connection pool.
+
+API Gateway checks API keys before the Lambda runs; here the server does it.
+Keys come from PUBLIC_API_KEYS and ADMIN_API_KEYS (comma separated). Admin
+keys may call every route and public keys every route outside /v1/admin.
+/v1/docs and CORS preflight requests need no key.
+
+    pip install -r requirements.txt -r requirements-server.txt
+    PUBLIC_API_KEYS=... ADMIN_API_KEYS=... python server.py --workers 4
+"""
+import argparse
+import asyncio
+import base64
+import hmac
+import os
+import sys
+import urllib.parse
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import lambda_function
+
+# Requests handled at once per worker process; each may fan out further on lambda_function's own pool
+SERVER_THREADS = int(os.environ.get('SERVER_THREADS', '32'))
+SHUTDOWN_TIMEOUT_SECONDS = float(os.environ.get('SHUTDOWN_TIMEOUT_SECONDS', '30'))
+MAX_BODY_BYTES = int(os.environ.get('MAX_BODY_BYTES', str(10 * 1024 * 1024)))  # API Gateway's payload limit
+
+# Routes API Gateway serves without an API key
+OPEN_PATHS = frozenset(['/v1/docs'])
+
+
+def split_keys(value: Optional[str]) -> List[str]:
+    return [key.strip() for key in (value or '').split(',') if key.strip()]
+
+
+class KeyRing:
+    """The public and admin API keys the server accepts"""
+
+    def __init__(self, public: List[str], admin: List[str]):
+        self.public = public
+        self.admin = admin
+
+    @classmethod
+    def from_environment(cls) -> 'KeyRing':
+        return cls(split_keys(os.environ.get('PUBLIC_API_KEYS')), split_keys(os.environ.get('ADMIN_API_KEYS')))
+
+    @staticmethod
+    def _known(key: str, keys: List[str]) -> bool:
+        # Compare against every key so the time taken does not reveal which one was close
+        matched = False
+        for candidate in keys:
+            matched |= hmac.compare_digest(key.encode('utf-8'), candidate.encode('utf-8'))
+        return matched
+
+    def allows(self, method: str, path: str, key: Optional[str]) -> bool:
+        """True when a request may go through, mirroring api_key_required in 00_api_gateway.tf"""
+        path = lambda_function.normalize_path(path)
+        if method == 'OPTIONS' or path in OPEN_PATHS:
+            return True
+        if not key:
+            return False
+        if self._known(key, self.admin):
+            return True
+        return not (path == '/v1/admin' or path.startswith('/v1/admin/')) and self._known(key, self.public)
+
+
+class Context:
+    """LambdaContext stand-in handed to lambda_handler for each request"""
+    function_name = os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'directory-service')
+    memory_limit_in_mb = 0
+    invoked_function_arn = 'server'
+
+    def __init__(self, request_id: str):
+        self.aws_request_id = request_id
+
+    def get_remaining_time_in_millis(self) -> int:
+        return int(SHUTDOWN_TIMEOUT_SECONDS * 1000)
+
+
+def build_event(scope: Dict, body: bytes, request_id: str) -> Dict:
+    """API Gateway REST proxy event for an ASGI HTTP request"""
+    headers, multi_headers = {}, {}
+    for name, value in scope.get('headers', []):
+        name, value = name.decode('latin-1'), value.decode('latin-1')
+        headers[name] = value
+        multi_headers.setdefault(name, []).append(value)
+
+    query, multi_query = {}, {}
+    for name, value in urllib.parse.parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True):
+        query[name] = value
+        multi_query.setdefault(name, []).append(value)
+
+    # API Gateway hands text bodies through as is and anything else base64 encoded
+    try:
+        text, encoded = body.decode('utf-8'), False
+    except UnicodeDecodeError:
+        text, encoded = base64.b64encode(body).decode('ascii'), True
+
+    # The path is decoded as API Gateway passes it; the raw path keeps %2F inside
+    # a path parameter from splitting it and is what the router matches
+    path = scope['path']
+    raw_path = scope.get('raw_path', b'').decode('latin-1') or urllib.parse.quote(path)
+    client = scope.get('client') or ('', 0)
+    return {
+        'httpMethod': scope['method'],
+        'path': path,
+        'rawPath': raw_path,
+        'resource': path,
+        'headers': headers or None,
+        'multiValueHeaders': multi_headers or None,
+        'queryStringParameters': query or None,
+        'multiValueQueryStringParameters': multi_query or None,
+        'pathParameters': None,
+        'body': text or None,
+        'isBase64Encoded': encoded,
+        'requestContext': {
+            'requestId': request_id,
+            'stage': 'server',
+            'httpMethod': scope['method'],
+            'path': path,
+            'identity': {'sourceIp': client[0], 'apiKey': headers.get('x-api-key')}
+        }
+    }
+
+
+def response_parts(response: Dict) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+    """Status, headers and body bytes of a lambda_handler response"""
+    body = response.get('body') or ''
+    data = base64.b64decode(body) if response.get('isBase64Encoded') else body.encode('utf-8')
+    headers = [(name.lower().encode('latin-1'), str(value).encode('latin-1'))
+               for name, value in (response.get('headers') or {}).items()
+               if name.lower() != 'content-length']
+    for name, values in (response.get('multiValueHeaders') or {}).items():
+        headers.extend((name.lower().encode('latin-1'), str(value).encode('latin-1')) for value in values)
+    headers.append((b'content-length', str(len(data)).encode('ascii')))
+    return response['statusCode'], headers, data
+
+
+FORBIDDEN = {
+    'statusCode': 403,
+    'headers': {'Content-Type': 'application/json', **lambda_function.CORS_HEADERS},
+    'body': '{"message": "Forbidden"}'
+}
+TOO_LARGE = {
+    'statusCode': 413,
+    'headers': {'Content-Type': 'application/json', **lambda_function.CORS_HEADERS},
+    'body': '{"message": "Request too long"}'
+}
+UNAVAILABLE = {
+    'statusCode': 503,
+    'headers': {'Content-Type': 'application/json', 'Connection': 'close', **lambda_function.CORS_HEADERS},
+    'body': '{"message": "Server is shutting down"}'
+}
+
+
+class DirectoryServer:
+    """ASGI application serving lambda_handler, with startup warm-up and draining shutdown"""
+
+    def __init__(self, keys: Optional[KeyRing] = None, handler: Optional[Callable[[Dict, Context], Dict]] = None):
+        self.keys = keys
+        self.handler = handler or lambda_function.lambda_handler
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.in_flight = 0
+        self.idle: Optional[asyncio.Event] = None
+        self.stopping = False
+
+    async def __call__(self, scope: Dict, receive: Callable, send: Callable) -> None:
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+
+    def start(self) -> None:
+        """Load the keys and pay the storage and OpenAPI set-up before the first request"""
+        if self.keys is None:
+            self.keys = KeyRing.from_environment()
+        if not self.keys.public and not self.keys.admin:
+            raise RuntimeError('Set PUBLIC_API_KEYS and/or ADMIN_API_KEYS before starting the server')
+        self.executor = ThreadPoolExecutor(max_workers=SERVER_THREADS, thread_name_prefix='request')
+        self.idle = asyncio.Event()
+        self.idle.set()
+        for table_name in lambda_function.TABLE_SCHEMAS:
+            lambda_function.get_table(table_name)
+        lambda_function.openapi_document()
+
+    async def stop(self) -> None:
+        """Refuse new requests, let the ones in progress finish, then release the thread pools"""
+        self.stopping = True
+        try:
+            await asyncio.wait_for(self.idle.wait(), SHUTDOWN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            lambda_function.logger.warning(f"Shutting down with {self.in_flight} requests still running")
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if lambda_function._executor is not None:
+            lambda_function._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    self.start()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive: Callable) -> Optional[bytes]:
+        """The request body, or None when it is larger than MAX_BODY_BYTES"""
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return b''.join(chunks)
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                return None
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    async def http(self, scope: Dict, receive: Callable, send: Callable) -> None:
+        if self.executor is None:
+            # Servers that skip the lifespan protocol get the same set-up on first use
+            self.start()
+        if self.stopping:
+            return await self.respond(send, UNAVAILABLE)
+
+        self.in_flight += 1
+        self.idle.clear()
+        try:
+            body = await self.read_body(receive)
+            if body is None:
+                return await self.respond(send, TOO_LARGE)
+
+            request_id = str(uuid.uuid4())
+            event = build_event(scope, body, request_id)
+            if not self.keys.allows(event['httpMethod'], event['path'], (event['headers'] or {}).get('x-api-key')):
+                return await self.respond(send, FORBIDDEN)
+
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(self.executor, self.handler, event, Context(request_id))
+            await self.respond(send, response)
+        finally:
+            self.in_flight -= 1
+            if not self.in_flight:
+                self.idle.set()
+
+    @staticmethod
+    async def respond(send: Callable, response: Dict) -> None:
+        status, headers, data = response_parts(response)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': data})
+
+
+app = DirectoryServer()
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', '8080')))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', '1')),
+                        help='worker processes, each with its own storage clients and read cache')
+    args = parser.parse_args(argv)
+
+    try:
+        import uvicorn
+    except ImportError:
+        parser.error('uvicorn is not installed; pip install -r requirements-server.txt')
+
+    # Only the keys are checked here; each worker loads them again when it starts
+    keys = KeyRing.from_environment()
+    if not keys.public and not keys.admin:
+        parser.error('set PUBLIC_API_KEYS and/or ADMIN_API_KEYS')
+
+    uvicorn.run(
+        'server:app',
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        lifespan='on',
+        proxy_headers=True,
+        timeout_graceful_shutdown=int(SHUTDOWN_TIMEOUT_SECONDS),
+        app_dir=os.path.dirname(os.path.abspath(__file__))
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
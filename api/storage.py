@@ -0,0 +1,459 @@
+"""
+Local storage backend for the Directory Service.
+
+SQLiteBackend stands in for the boto3 DynamoDB service resource. Its
+Table(name) objects offer the get_item, put_item, delete_item, update_item,
+query and scan calls the handlers make, and the backend itself offers
+batch_write_item, batch_get_item and transact_write_items. When asked with
+ReturnConsumedCapacity they report an estimate of the capacity DynamoDB would
+charge, from the JSON size of the items touched.
+
+Each DynamoDB table becomes a SQLite table whose key attributes and global
+secondary index keys are real columns with SQL indexes, so the handlers' index
+queries stay key lookups. Use ':memory:' for a throwaway in-memory directory.
+
+Only the expression forms the handlers use are understood; anything else
+raises NotImplementedError rather than silently returning wrong results.
+"""
+import contextlib
+import json
+import re
+import sqlite3
+import threading
+import zlib
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ConditionalCheckFailedException(Exception):
+    """Raised when a ConditionExpression does not hold, like DynamoDB's error of the same name"""
+
+
+class TransactionCanceledException(Exception):
+    """Raised when any condition in a transaction fails; carries botocore's response shape"""
+
+    def __init__(self, reasons: List[Dict]):
+        super().__init__('Transaction cancelled')
+        self.response = {
+            'Error': {'Code': 'TransactionCanceledException', 'Message': 'Transaction cancelled'},
+            'CancellationReasons': reasons
+        }
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, set):
+        return sorted(value)
+    raise TypeError(f"Cannot store {type(value).__name__}")
+
+
+def _split_and(expression: str) -> List[str]:
+    return [clause.strip() for clause in re.split(r'\s+AND\s+', expression.strip(), flags=re.IGNORECASE)]
+
+
+def _item_size(item: Optional[Dict]) -> int:
+    return len(json.dumps(item, default=_json_default)) if item else 0
+
+
+def _read_units(sizes: List[int], consistent: bool) -> float:
+    """One unit per started 4 KB read (at least one), halved for eventually consistent reads"""
+    units = max(1, -(-sum(sizes) // 4096))
+    return float(units) if consistent else units / 2
+
+
+def _write_units(sizes: List[int]) -> float:
+    """One unit per started 1 KB of every item written"""
+    return float(sum(max(1, -(-size // 1024)) for size in sizes) or 1)
+
+
+def _consumed(mode: Optional[str], capacity: Dict[str, float], batch: bool = False) -> Dict:
+    """ConsumedCapacity for a response when the caller asked for it; batch calls report a list"""
+    if not mode or mode == 'NONE':
+        return {}
+    entries = [{'TableName': name, 'CapacityUnits': units} for name, units in capacity.items()]
+    return {'ConsumedCapacity': entries if batch else entries[0]}
+
+
+_COMPARISON = re.compile(r'^([#\w]+)\s*(=|<=|>=|<|>)\s*(:\w+)$')
+_BEGINS_WITH = re.compile(r'^begins_with\(\s*([#\w]+)\s*,\s*(:\w+)\s*\)$', re.IGNORECASE)
+_COMPARE = {
+    '=': lambda a, b: a == b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b
+}
+_ATTRIBUTE_CHECK = re.compile(r'^(attribute_not_exists|attribute_exists)\(\s*([#\w]+)\s*\)$', re.IGNORECASE)
+
+
+class SQLiteTable:
+    """One DynamoDB table and its global secondary indexes"""
+
+    def __init__(self, backend: 'SQLiteBackend', name: str, schema: Dict):
+        self.backend = backend
+        self.name = name
+        self.hash_key, self.range_key = schema['key']
+        self.indexes = schema.get('indexes', {})
+        self._sql_name = '"' + name.replace('"', '""') + '"'
+
+    # Schema -----------------------------------------------------------------
+
+    def _key_columns(self) -> Dict[str, str]:
+        """attribute -> column for every attribute that is a table or index key"""
+        columns = {self.hash_key: 'pk'}
+        if self.range_key:
+            columns[self.range_key] = 'sk'
+        for position, (hash_key, range_key) in enumerate(self.indexes.values()):
+            for attribute in (hash_key, range_key):
+                if attribute and attribute not in columns:
+                    columns[attribute] = f'a{position}_{len(columns)}'
+        return columns
+
+    def create(self, connection: sqlite3.Connection) -> None:
+        columns = self._key_columns()
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self._sql_name} ("
+            + ', '.join(f'{column}' for column in columns.values())
+            + ", item TEXT NOT NULL, PRIMARY KEY (pk" + (", sk" if self.range_key else "") + "))"
+        )
+        for index_name, (hash_key, range_key) in self.indexes.items():
+            index_columns = [columns[hash_key]] + ([columns[range_key]] if range_key else [])
+            sql_index = '"' + f'{self.name}__{index_name}'.replace('"', '""') + '"'
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {sql_index} ON {self._sql_name} ({', '.join(index_columns)})"
+            )
+
+    # Helpers ----------------------------------------------------------------
+
+    def _key_of(self, item: Dict) -> Dict:
+        key = {self.hash_key: item[self.hash_key]}
+        if self.range_key:
+            key[self.range_key] = item[self.range_key]
+        return key
+
+    def _where_key(self, key: Dict) -> Tuple[str, List]:
+        if self.range_key:
+            return 'pk = ? AND sk = ?', [key[self.hash_key], key[self.range_key]]
+        return 'pk = ?', [key[self.hash_key]]
+
+    def _load(self, key: Dict) -> Optional[Dict]:
+        where, args = self._where_key(key)
+        rows = self.backend.execute(f"SELECT item FROM {self._sql_name} WHERE {where}", args)
+        return json.loads(rows[0][0]) if rows else None
+
+    def _store(self, item: Dict) -> None:
+        columns = self._key_columns()
+        names = list(columns.values()) + ['item']
+        values = [item.get(attribute) for attribute in columns] + [json.dumps(item, default=_json_default)]
+        self.backend.execute(
+            f"INSERT OR REPLACE INTO {self._sql_name} ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)})",
+            values
+        )
+
+    def _remove(self, key: Dict) -> None:
+        where, args = self._where_key(key)
+        self.backend.execute(f"DELETE FROM {self._sql_name} WHERE {where}", args)
+
+    @staticmethod
+    def _name(token: str, names: Optional[Dict]) -> str:
+        return (names or {}).get(token, token) if token.startswith('#') else token
+
+    def _check_condition(self, expression: Optional[str], existing: Optional[Dict], names: Optional[Dict],
+                         values: Optional[Dict] = None) -> None:
+        if not expression:
+            return
+        for clause in _split_and(expression):
+            match = _ATTRIBUTE_CHECK.match(clause)
+            if match:
+                present = existing is not None and self._name(match.group(2), names) in existing
+                holds = present != (match.group(1).lower() == 'attribute_not_exists')
+            else:
+                match = _COMPARISON.match(clause)
+                if not match:
+                    raise NotImplementedError(f"Unsupported ConditionExpression: {expression}")
+                attribute = self._name(match.group(1), names)
+                # Like DynamoDB, a comparison against a missing attribute does not hold
+                holds = existing is not None and attribute in existing and _COMPARE[match.group(2)](
+                    existing[attribute], (values or {})[match.group(3)]
+                )
+            if not holds:
+                raise ConditionalCheckFailedException('The conditional request failed')
+
+    @staticmethod
+    def _project(item: Dict, projection: Optional[str], names: Optional[Dict]) -> Dict:
+        if not projection:
+            return item
+        wanted = [SQLiteTable._name(token.strip(), names) for token in projection.split(',')]
+        return {attribute: item[attribute] for attribute in wanted if attribute in item}
+
+    # Item operations --------------------------------------------------------
+
+    def get_item(self, Key: Dict, ConsistentRead: bool = False, ProjectionExpression: Optional[str] = None,
+                 ExpressionAttributeNames: Optional[Dict] = None, ReturnConsumedCapacity: Optional[str] = None) -> Dict:
+        item = self._load(Key)
+        response = _consumed(ReturnConsumedCapacity, {self.name: _read_units([_item_size(item)], ConsistentRead)})
+        if item is not None:
+            response['Item'] = self._project(item, ProjectionExpression, ExpressionAttributeNames)
+        return response
+
+    def put_item(self, Item: Dict, ConditionExpression: Optional[str] = None,
+                 ExpressionAttributeNames: Optional[Dict] = None, ExpressionAttributeValues: Optional[Dict] = None,
+                 ReturnConsumedCapacity: Optional[str] = None) -> Dict:
+        with self.backend.lock:
+            self._check_condition(ConditionExpression, self._load(self._key_of(Item)), ExpressionAttributeNames,
+                                  ExpressionAttributeValues)
+            self._store(Item)
+        return _consumed(ReturnConsumedCapacity, {self.name: _write_units([_item_size(Item)])})
+
+    def delete_item(self, Key: Dict, ReturnValues: str = 'NONE', ConditionExpression: Optional[str] = None,
+                    ExpressionAttributeNames: Optional[Dict] = None, ExpressionAttributeValues: Optional[Dict] = None,
+                    ReturnConsumedCapacity: Optional[str] = None) -> Dict:
+        with self.backend.lock:
+            existing = self._load(Key)
+            self._check_condition(ConditionExpression, existing, ExpressionAttributeNames, ExpressionAttributeValues)
+            self._remove(Key)
+        response = _consumed(ReturnConsumedCapacity, {self.name: _write_units([_item_size(existing)])})
+        if ReturnValues == 'ALL_OLD' and existing is not None:
+            response['Attributes'] = existing
+        return response
+
+    def update_item(self, Key: Dict, UpdateExpression: str, ExpressionAttributeValues: Optional[Dict] = None,
+                    ExpressionAttributeNames: Optional[Dict] = None, ConditionExpression: Optional[str] = None,
+                    ReturnValues: str = 'NONE', ReturnConsumedCapacity: Optional[str] = None) -> Dict:
+        values = ExpressionAttributeValues or {}
+        with self.backend.lock:
+            existing = self._load(Key)
+            self._check_condition(ConditionExpression, existing, ExpressionAttributeNames, ExpressionAttributeValues)
+            item = dict(existing or Key)
+            updated = {}
+            for action, body in re.findall(r'(SET|ADD|REMOVE|DELETE)\s+(.+?)(?=\s+(?:SET|ADD|REMOVE|DELETE)\s+|$)',
+                                           UpdateExpression.strip(), re.IGNORECASE):
+                action = action.upper()
+                for part in [p.strip() for p in body.split(',')]:
+                    if action == 'REMOVE':
+                        item.pop(self._name(part, ExpressionAttributeNames), None)
+                        continue
+                    if action == 'SET':
+                        attribute, value = [p.strip() for p in part.split('=', 1)]
+                        attribute = self._name(attribute, ExpressionAttributeNames)
+                        if value not in values:
+                            raise NotImplementedError(f"Unsupported UpdateExpression: {UpdateExpression}")
+                        item[attribute] = values[value]
+                    elif action == 'DELETE':
+                        attribute, value = part.split()
+                        attribute = self._name(attribute, ExpressionAttributeNames)
+                        remaining = set(item.get(attribute, set())) - values[value]
+                        # DynamoDB drops a set attribute once its last element is deleted
+                        if remaining:
+                            item[attribute] = remaining
+                        else:
+                            item.pop(attribute, None)
+                            continue
+                    else:
+                        attribute, value = part.split()
+                        attribute = self._name(attribute, ExpressionAttributeNames)
+                        if isinstance(values[value], set):
+                            item[attribute] = set(item.get(attribute, set())) | values[value]
+                        else:
+                            item[attribute] = item.get(attribute, 0) + values[value]
+                    updated[attribute] = item[attribute]
+            self._store(item)
+        response = _consumed(ReturnConsumedCapacity, {self.name: _write_units([_item_size(item)])})
+        if ReturnValues == 'UPDATED_NEW':
+            response['Attributes'] = updated
+        elif ReturnValues == 'ALL_NEW':
+            response['Attributes'] = item
+        elif ReturnValues == 'ALL_OLD' and existing is not None:
+            response['Attributes'] = existing
+        return response
+
+    # Reads ------------------------------------------------------------------
+
+    def _key_condition(self, expression: str, names: Optional[Dict], values: Dict,
+                       hash_key: str, range_key: Optional[str]) -> Tuple[List[str], List]:
+        columns = self._key_columns()
+        conditions, args = [], []
+        for clause in _split_and(expression):
+            match = _COMPARISON.match(clause)
+            if match:
+                attribute = self._name(match.group(1), names)
+                if attribute not in (hash_key, range_key):
+                    raise NotImplementedError(f"{attribute} is not a key of this table or index")
+                conditions.append(f"{columns[attribute]} {match.group(2)} ?")
+                args.append(values[match.group(3)])
+                continue
+            match = _BEGINS_WITH.match(clause)
+            if match and self._name(match.group(1), names) == range_key:
+                prefix = values[match.group(2)]
+                conditions.append(f"substr({columns[range_key]}, 1, ?) = ?")
+                args.extend([len(prefix), prefix])
+                continue
+            raise NotImplementedError(f"Unsupported KeyConditionExpression: {expression}")
+        return conditions, args
+
+    def _page(self, conditions: List[str], args: List, order: List[str], Limit: Optional[int],
+              ExclusiveStartKey: Optional[Dict], forward: bool, index_keys: Tuple[str, ...]) -> Dict:
+        columns = self._key_columns()
+        order_columns = [columns[attribute] for attribute in order]
+        if ExclusiveStartKey:
+            comparison = '>' if forward else '<'
+            conditions = conditions + [f"({', '.join(order_columns)}) {comparison} ({', '.join('?' for _ in order_columns)})"]
+            args = args + [ExclusiveStartKey[attribute] for attribute in order]
+        direction = 'ASC' if forward else 'DESC'
+        sql = f"SELECT item FROM {self._sql_name}"
+        if conditions:
+            sql += " WHERE " + ' AND '.join(conditions)
+        sql += " ORDER BY " + ', '.join(f"{column} {direction}" for column in order_columns)
+        if Limit:
+            sql += f" LIMIT {int(Limit)}"
+        items = [json.loads(row[0]) for row in self.backend.execute(sql, args)]
+
+        response = {'Items': items, 'Count': len(items), 'ScannedCount': len(items)}
+        if Limit and len(items) == Limit:
+            response['LastEvaluatedKey'] = {attribute: items[-1][attribute] for attribute in dict.fromkeys(index_keys + tuple(order))}
+        return response
+
+    def query(self, KeyConditionExpression: str, ExpressionAttributeValues: Dict,
+              ExpressionAttributeNames: Optional[Dict] = None, IndexName: Optional[str] = None,
+              Limit: Optional[int] = None, ExclusiveStartKey: Optional[Dict] = None,
+              ScanIndexForward: bool = True, ConsistentRead: bool = False,
+              ProjectionExpression: Optional[str] = None, ReturnConsumedCapacity: Optional[str] = None) -> Dict:
+        if IndexName:
+            hash_key, range_key = self.indexes[IndexName]
+        else:
+            hash_key, range_key = self.hash_key, self.range_key
+        conditions, args = self._key_condition(
+            KeyConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues, hash_key, range_key
+        )
+        # Order like DynamoDB: by the index sort key, then the table key as a tie breaker
+        order = [a for a in dict.fromkeys([range_key, self.hash_key, self.range_key]) if a]
+        index_keys = tuple(a for a in (hash_key, range_key) if a)
+        response = self._page(conditions, args, order, Limit, ExclusiveStartKey, ScanIndexForward, index_keys)
+        return self._finish_read(response, ProjectionExpression, ExpressionAttributeNames, ConsistentRead, ReturnConsumedCapacity)
+
+    def scan(self, Limit: Optional[int] = None, ExclusiveStartKey: Optional[Dict] = None,
+             Segment: Optional[int] = None, TotalSegments: Optional[int] = None, ConsistentRead: bool = False,
+             ProjectionExpression: Optional[str] = None, ExpressionAttributeNames: Optional[Dict] = None,
+             ReturnConsumedCapacity: Optional[str] = None) -> Dict:
+        conditions, args = [], []
+        if TotalSegments:
+            conditions.append("segment_of(pk, ?) = ?")
+            args.extend([TotalSegments, Segment])
+        order = [a for a in (self.hash_key, self.range_key) if a]
+        response = self._page(conditions, args, order, Limit, ExclusiveStartKey, True, ())
+        return self._finish_read(response, ProjectionExpression, ExpressionAttributeNames, ConsistentRead, ReturnConsumedCapacity)
+
+    def _finish_read(self, response: Dict, projection: Optional[str], names: Optional[Dict],
+                     consistent: bool, return_consumed: Optional[str]) -> Dict:
+        """Charge for the whole items read, then apply the projection"""
+        response.update(_consumed(return_consumed, {
+            self.name: _read_units([_item_size(item) for item in response['Items']], consistent)
+        }))
+        response['Items'] = [self._project(item, projection, names) for item in response['Items']]
+        return response
+
+
+class SQLiteBackend:
+    """SQLite stand-in for boto3.resource('dynamodb')"""
+
+    def __init__(self, path: str, schemas: Dict[str, Dict]):
+        self.lock = threading.RLock()
+        self.deferred = 0
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.create_function(
+            'segment_of', 2, lambda value, total: zlib.crc32(str(value).encode('utf-8')) % total, deterministic=True
+        )
+        self.tables = {name: SQLiteTable(self, name, schema) for name, schema in schemas.items()}
+        with self.lock:
+            for table in self.tables.values():
+                table.create(self.connection)
+            self.connection.commit()
+
+    def execute(self, sql: str, args: List[Any] = ()) -> List[Tuple]:
+        """Run a statement and return its rows, fetched before the connection is handed to another thread"""
+        args = [_json_default(arg) if isinstance(arg, Decimal) else arg for arg in args]
+        with self.lock:
+            rows = self.connection.execute(sql, args).fetchall()
+            if not self.deferred:
+                self.connection.commit()
+            return rows
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Hold the connection and commit once for every statement run inside"""
+        with self.lock:
+            self.deferred += 1
+            try:
+                yield
+            finally:
+                self.deferred -= 1
+                if not self.deferred:
+                    self.connection.commit()
+
+    def Table(self, name: str) -> SQLiteTable:
+        return self.tables[name]
+
+    def batch_write_item(self, RequestItems: Dict[str, List[Dict]], ReturnConsumedCapacity: Optional[str] = None) -> Dict:
+        capacity = {}
+        with self.batch():
+            for table_name, requests in RequestItems.items():
+                table = self.tables[table_name]
+                sizes = []
+                for request in requests:
+                    if 'PutRequest' in request:
+                        table._store(request['PutRequest']['Item'])
+                        sizes.append(_item_size(request['PutRequest']['Item']))
+                    else:
+                        sizes.append(_item_size(table._load(request['DeleteRequest']['Key'])))
+                        table._remove(request['DeleteRequest']['Key'])
+                capacity[table_name] = _write_units(sizes)
+        return {'UnprocessedItems': {}, **_consumed(ReturnConsumedCapacity, capacity, batch=True)}
+
+    def batch_get_item(self, RequestItems: Dict[str, Dict], ReturnConsumedCapacity: Optional[str] = None) -> Dict:
+        responses, capacity = {}, {}
+        for table_name, request in RequestItems.items():
+            table = self.tables[table_name]
+            found = [item for item in (table._load(key) for key in request['Keys']) if item is not None]
+            capacity[table_name] = sum(
+                _read_units([_item_size(item)], request.get('ConsistentRead', False)) for item in found
+            )
+            responses[table_name] = [
+                table._project(item, request.get('ProjectionExpression'), request.get('ExpressionAttributeNames'))
+                for item in found
+            ]
+        return {'Responses': responses, 'UnprocessedKeys': {}, **_consumed(ReturnConsumedCapacity, capacity, batch=True)}
+
+    def transact_write_items(self, TransactItems: List[Dict], ReturnConsumedCapacity: Optional[str] = None) -> Dict:
+        """Apply Put and Delete actions all together, or none of them if any condition fails"""
+        capacity = {}
+        with self.batch():
+            actions = []
+            for entry in TransactItems:
+                (action, spec), = entry.items()
+                if action not in ('Put', 'Delete'):
+                    raise NotImplementedError(f"Unsupported transaction action: {action}")
+                table = self.tables[spec['TableName']]
+                key = table._key_of(spec['Item']) if action == 'Put' else spec['Key']
+                actions.append((action, spec, table, key, table._load(key)))
+
+            reasons = []
+            for action, spec, table, key, existing in actions:
+                try:
+                    table._check_condition(spec.get('ConditionExpression'), existing,
+                                           spec.get('ExpressionAttributeNames'), spec.get('ExpressionAttributeValues'))
+                    reasons.append({'Code': 'None'})
+                except ConditionalCheckFailedException:
+                    reasons.append({'Code': 'ConditionalCheckFailed', 'Message': 'The conditional request failed'})
+            if any(reason['Code'] != 'None' for reason in reasons):
+                raise TransactionCanceledException(reasons)
+
+            for action, spec, table, key, existing in actions:
+                if action == 'Put':
+                    table._store(spec['Item'])
+                else:
+                    table._remove(key)
+                # Transactional writes cost twice as much as plain ones
+                units = 2 * _write_units([_item_size(spec['Item'] if action == 'Put' else existing)])
+                capacity[table.name] = capacity.get(table.name, 0.0) + units
+        return _consumed(ReturnConsumedCapacity, capacity, batch=True)
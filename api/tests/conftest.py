@@ -0,0 +1,59 @@
+"""
+Run the handlers against a fresh in-memory SQLite stand-in per test.
+
+    cd api && python -m pytest -q tests
+"""
+import importlib
+import json
+import os
+import sys
+import uuid
+
+import pytest
+
+os.environ['STORAGE_BACKEND'] = 'sqlite'
+os.environ.pop('SQLITE_PATH', None)
+os.environ.setdefault('POWERTOOLS_TRACE_DISABLED', 'true')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lambda_function  # noqa: E402
+
+
+@pytest.fixture
+def lf():
+    yield importlib.reload(lambda_function)
+
+
+def call(lf, method, path, params=None, body=None):
+    """Send a request through the router and return (status, decoded body)"""
+    event = {
+        'httpMethod': method,
+        'path': path,
+        'queryStringParameters': params,
+        'body': json.dumps(body) if body is not None else None,
+        'headers': {}
+    }
+    response = lf.handle_request(method, path, event)
+    return response['statusCode'], json.loads(response['body']) if response.get('body') else None
+
+
+class Context:
+    """LambdaContext stand-in for invoking lambda_handler"""
+    function_name = 'directory-service'
+    memory_limit_in_mb = 128
+    invoked_function_arn = 'arn:aws:lambda:us-east-1:000000000000:function:directory-service'
+
+    def __init__(self):
+        self.aws_request_id = str(uuid.uuid4())
+
+
+def invoke(lf, method, path, params=None, headers=None, body=None):
+    """Send a request through lambda_handler, compression and ETags included, and return the raw response"""
+    event = {
+        'httpMethod': method,
+        'path': path,
+        'queryStringParameters': params,
+        'body': json.dumps(body) if body is not None else None,
+        'headers': headers or {}
+    }
+    return lf.lambda_handler(event, Context())
@@ -0,0 +1,52 @@
+import pytest
+
+from conftest import call
+
+
+@pytest.fixture
+def directory(lf):
+    for user_id, group_name in [('exact', 'deployers'), ('service', 'svc-admins'), ('action', 'releasers'),
+                                ('god', 'root'), ('nobody', 'readers'), ('many', 'deployers'), ('many', 'root')]:
+        lf.assign_user_to_group({'user_id': user_id, 'group_name': group_name})
+    for group_name, service, action in [('deployers', 'svc', 'deploy'), ('svc-admins', 'svc', 'all'),
+                                        ('releasers', 'all', 'deploy'), ('root', 'all', 'all'),
+                                        ('readers', 'svc', 'read'), ('outsiders', 'svc', 'deploy')]:
+        lf.create_permission({'group_name': group_name, 'service': service, 'action': action})
+
+
+@pytest.mark.parametrize('user_id, service, action, group_name, rule', [
+    ('exact', 'svc', 'deploy', 'deployers', 'exact'),
+    ('service', 'svc', 'deploy', 'svc-admins', 'service#all'),
+    ('action', 'svc', 'deploy', 'releasers', 'all#action'),
+    ('action', 'other', 'deploy', 'releasers', 'all#action'),
+    ('god', 'other', 'anything', 'root', 'all#all'),
+    # The most specific rule wins when several grant the action
+    ('many', 'svc', 'deploy', 'deployers', 'exact'),
+    ('many', 'other', 'deploy', 'root', 'all#all'),
+])
+def test_allowed(lf, directory, user_id, service, action, group_name, rule):
+    status, body = call(lf, 'GET', '/v1/authorize', {'user_id': user_id, 'service': service, 'action': action})
+
+    assert status == 200, body
+    assert body['allowed'] is True
+    assert (body['group_name'], body['rule']) == (group_name, rule)
+
+
+@pytest.mark.parametrize('user_id, service, action', [
+    ('exact', 'svc', 'build'),
+    ('exact', 'other', 'deploy'),
+    ('service', 'other', 'deploy'),
+    ('action', 'svc', 'build'),
+    ('nobody', 'svc', 'deploy'),
+    ('stranger', 'svc', 'deploy'),
+])
+def test_denied(lf, directory, user_id, service, action):
+    status, body = call(lf, 'GET', '/v1/authorize', {'user_id': user_id, 'service': service, 'action': action})
+
+    assert status == 200, body
+    assert body == {'allowed': False, 'user_id': user_id, 'service': service, 'action': action,
+                    'group_name': None, 'rule': None, 'service_action': None}
+
+
+def test_all_three_parameters_are_needed(lf):
+    assert call(lf, 'GET', '/v1/authorize', {'user_id': 'jane', 'service': 'svc'})[0] == 400
@@ -0,0 +1,119 @@
+import gzip
+import importlib
+import json
+
+import pytest
+
+import backup
+from conftest import call
+
+
+def populate(lf):
+    status, body = call(lf, 'POST', '/v1/admin/groups', body={
+        'group_name': 'ops',
+        'members': ['a', 'b'],
+        'contacts': [{'type': 'slack', 'data': '#ops'}],
+        'permissions': [{'service': 'svc', 'action': 'deploy'}, {'service': 'svc', 'action': 'read'}]
+    })
+    assert status == 201, body
+    for index in range(60):
+        lf.create_permission({'group_name': f'team-{index:02d}', 'service': 'svc', 'action': 'read'})
+
+
+def contents(lf):
+    """Every item of the backed up tables, by backup table name"""
+    return {
+        name: sorted(lf.get_table(table_name).scan()['Items'],
+                     key=lambda item: json.dumps(item, sort_keys=True, default=str))
+        for name, table_name in backup.backup_tables().items()
+    }
+
+
+def read_lines(path):
+    with gzip.open(path, 'rt') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_export_then_import_restores_every_item(lf, tmp_path):
+    populate(lf)
+    original = contents(lf)
+    path = str(tmp_path / 'directory.ndjson.gz')
+
+    report = backup.export(path, backup.backup_tables(), segments=4, workers=4)
+
+    assert report['counts'] == {'permissions': 62, 'users': 2, 'contacts': 1}
+    lines = read_lines(path)
+    assert lines[0]['format'] == backup.BACKUP_FORMAT
+    assert lines[-1] == {'counts': report['counts']}
+    assert len(lines) == 2 + 65
+
+    lf = importlib.reload(lf)
+    assert contents(lf)['permissions'] == []
+    report = backup.restore(path, backup.backup_tables(), workers=4, checkpoint_path=None, rebuild=True)
+
+    assert report['counts'] == {'permissions': 62, 'users': 2, 'contacts': 1}
+    assert contents(lf) == original
+    status, body = call(lf, 'GET', '/v1/groups/ops/roster')
+    assert status == 200, body
+    assert sorted(member['user_id'] for member in body['members']) == ['a', 'b']
+
+
+def test_tables_limits_what_is_exported(lf, tmp_path):
+    populate(lf)
+    path = str(tmp_path / 'users.ndjson.gz')
+
+    assert backup.main(['export', '--output', path, '--tables', 'users,contacts', '--segments', '2']) == 0
+
+    lines = read_lines(path)
+    assert {line['table'] for line in lines[1:-1]} == {'users', 'contacts'}
+    assert lines[-1] == {'counts': {'users': 2, 'contacts': 1}}
+
+
+def test_unknown_table_is_rejected(lf, tmp_path):
+    with pytest.raises(SystemExit):
+        backup.main(['export', '--output', str(tmp_path / 'x.gz'), '--tables', 'groups'])
+
+
+def test_interrupted_import_resumes_from_its_checkpoint(lf, tmp_path, monkeypatch):
+    populate(lf)
+    original = contents(lf)
+    path = str(tmp_path / 'directory.ndjson.gz')
+    checkpoint = str(tmp_path / 'restore.json')
+    backup.export(path, backup.backup_tables(), segments=1, workers=1)
+
+    lf = importlib.reload(lf)
+    write_batch = backup.write_batch
+    calls = []
+
+    def failing_second_batch(requests, throttle):
+        calls.append(requests)
+        if len(calls) == 2:
+            raise RuntimeError('connection lost')
+        return write_batch(requests, throttle)
+
+    monkeypatch.setattr(backup, 'write_batch', failing_second_batch)
+    with pytest.raises(RuntimeError, match='connection lost'):
+        backup.restore(path, backup.backup_tables(), workers=1, checkpoint_path=checkpoint, rebuild=False)
+    with open(checkpoint) as f:
+        assert json.load(f)['items'] == lf.BATCH_WRITE_SIZE
+
+    monkeypatch.setattr(backup, 'write_batch', write_batch)
+    report = backup.restore(path, backup.backup_tables(), workers=1, checkpoint_path=checkpoint, rebuild=True)
+
+    assert report['resumed_after_items'] == lf.BATCH_WRITE_SIZE
+    assert contents(lf) == original
+    assert not (tmp_path / 'restore.json').exists()
+
+
+def test_backup_cut_short_is_reported(lf, tmp_path):
+    populate(lf)
+    path = str(tmp_path / 'directory.ndjson.gz')
+    backup.export(path, backup.backup_tables(), segments=1, workers=1)
+    lines = read_lines(path)
+    with gzip.open(path, 'wt') as f:
+        for line in lines[:-1]:
+            f.write(json.dumps(line) + '\n')
+
+    lf = importlib.reload(lf)
+    with pytest.raises(RuntimeError, match='cut short'):
+        backup.restore(path, backup.backup_tables(), workers=1, checkpoint_path=None, rebuild=False)
@@ -0,0 +1,126 @@
+import pytest
+
+from conftest import call
+
+
+class FlakyBackend:
+    """Storage wrapper that records BatchWriteItem calls and leaves some items unprocessed"""
+
+    def __init__(self, backend, unprocessed_rounds=0):
+        self.backend = backend
+        self.unprocessed_rounds = unprocessed_rounds
+        self.calls = []
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        self.calls.append({table: len(requests) for table, requests in RequestItems.items()})
+        held = {}
+        if self.unprocessed_rounds:
+            self.unprocessed_rounds -= 1
+            # Hold back the first request of every table, as DynamoDB does under throttling
+            held = {table: requests[:1] for table, requests in RequestItems.items()}
+            RequestItems = {table: requests[1:] for table, requests in RequestItems.items() if requests[1:]}
+        response = self.backend.batch_write_item(RequestItems=RequestItems, **kwargs) if RequestItems else {}
+        return {**response, 'UnprocessedItems': held}
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+@pytest.fixture
+def flaky(lf, monkeypatch):
+    monkeypatch.setattr(lf, 'BATCH_BACKOFF_SECONDS', 0)
+    backend = FlakyBackend(lf.get_storage().target)
+    lf.use_storage(backend)
+    return backend
+
+
+def batch(lf, *operations):
+    return call(lf, 'POST', '/v1/admin/batch', body={'operations': list(operations)})
+
+
+def test_mixed_operations_across_tables(lf):
+    lf.assign_user_to_group({'user_id': 'old', 'group_name': 'ops'})
+
+    status, body = batch(
+        lf,
+        {'op': 'put', 'table': 'users', 'item': {'user_id': 'jane', 'group_name': 'ops'}},
+        {'op': 'delete', 'table': 'users', 'item': {'user_id': 'old', 'group_name': 'ops'}},
+        {'op': 'put', 'table': 'permissions', 'item': {'group_name': 'ops', 'service': 'svc', 'action': 'deploy'}},
+        {'op': 'put', 'table': 'contacts', 'item': {'target': 'ops', 'type': 'slack', 'data': '#ops'}},
+    )
+
+    assert status == 200, body
+    assert body == {'succeeded': 4, 'failed': 0, 'results': [{'index': i, 'status': 'ok'} for i in range(4)]}
+    assert call(lf, 'GET', '/v1/users', {'group_name': 'ops'})[1] == [{'user_id': 'jane', 'group_name': 'ops'}]
+    assert call(lf, 'GET', '/v1/permissions', {'group_name': 'ops'})[1][0]['service_action'] == 'svc#deploy'
+    assert call(lf, 'GET', '/v1/contacts', {'target': 'ops'})[1][0]['data'] == '#ops'
+
+
+def test_bad_operations_are_reported_and_the_rest_applied(lf):
+    status, body = batch(
+        lf,
+        {'op': 'put', 'table': 'users', 'item': {'user_id': 'jane', 'group_name': 'ops'}},
+        {'op': 'put', 'table': 'groups', 'item': {'group_name': 'ops'}},
+        {'op': 'upsert', 'table': 'users', 'item': {'user_id': 'john', 'group_name': 'ops'}},
+        {'op': 'put', 'table': 'contacts', 'item': {'target': 'ops', 'type': 'slack'}},
+        {'op': 'delete', 'table': 'users', 'item': {'user_id': 'jane', 'group_name': 'ops'}},
+    )
+
+    assert status == 200, body
+    assert (body['succeeded'], body['failed']) == (1, 4)
+    assert [result['status'] for result in body['results']] == ['ok', 'invalid', 'invalid', 'invalid', 'invalid']
+    assert body['results'][4]['error'] == 'Duplicate of operation 0'
+    assert call(lf, 'GET', '/v1/users', {'group_name': 'ops'})[1] == [{'user_id': 'jane', 'group_name': 'ops'}]
+
+
+def test_writes_go_out_in_chunks_of_25(lf, flaky):
+    status, body = batch(lf, *[
+        {'op': 'put', 'table': 'users', 'item': {'user_id': f'user{i:02d}', 'group_name': 'ops'}} for i in range(60)
+    ])
+
+    assert status == 200 and body['succeeded'] == 60, body
+    assert [sizes[lf.USER_GROUPS_TABLE] for sizes in flaky.calls if lf.USER_GROUPS_TABLE in sizes] == [25, 25, 10]
+    assert len(call(lf, 'GET', '/v1/users', {'group_name': 'ops'})[1]) == 60
+
+
+def test_unprocessed_items_are_retried(lf, flaky):
+    flaky.unprocessed_rounds = 2
+
+    status, body = batch(lf, *[
+        {'op': 'put', 'table': 'users', 'item': {'user_id': f'user{i}', 'group_name': 'ops'}} for i in range(3)
+    ])
+
+    assert status == 200 and body['succeeded'] == 3, body
+    assert [sizes[lf.USER_GROUPS_TABLE] for sizes in flaky.calls if lf.USER_GROUPS_TABLE in sizes] == [3, 1, 1]
+    assert len(call(lf, 'GET', '/v1/users', {'group_name': 'ops'})[1]) == 3
+
+
+def test_items_left_unprocessed_are_reported_failed(lf, flaky, monkeypatch):
+    monkeypatch.setattr(lf, 'BATCH_MAX_ATTEMPTS', 2)
+    flaky.unprocessed_rounds = 2
+
+    status, body = batch(
+        lf,
+        {'op': 'put', 'table': 'users', 'item': {'user_id': 'jane', 'group_name': 'ops'}},
+        {'op': 'put', 'table': 'users', 'item': {'user_id': 'john', 'group_name': 'ops'}},
+    )
+
+    assert status == 200, body
+    assert body['results'] == [
+        {'index': 0, 'status': 'failed', 'error': 'Unprocessed after retries'},
+        {'index': 1, 'status': 'ok'},
+    ]
+    changes = call(lf, 'GET', '/v1/changes', {'since': '0'})[1]['changes']
+    assert [change['item']['user_id'] for change in changes] == ['john']
+
+
+@pytest.mark.parametrize('body', [{}, {'operations': []}, {'operations': 'put'}])
+def test_operations_must_be_a_non_empty_list(lf, body):
+    assert call(lf, 'POST', '/v1/admin/batch', body=body)[0] == 400
+
+
+def test_operation_count_is_capped(lf, monkeypatch):
+    monkeypatch.setattr(lf, 'BATCH_MAX_OPERATIONS', 2)
+    operations = [{'op': 'put', 'table': 'users', 'item': {'user_id': f'u{i}', 'group_name': 'ops'}} for i in range(3)]
+
+    assert batch(lf, *operations)[0] == 400
@@ -0,0 +1,70 @@
+import pytest
+
+from conftest import call
+
+
+@pytest.mark.parametrize('path, params', [
+    ('/v1/admin/users', {'user_id': 'nobody', 'group_name': 'ops'}),
+    ('/v1/admin/contacts', {'target': 'nobody', 'type': 'slack'}),
+    ('/v1/admin/permissions', {'group_name': 'ops', 'service_action': 'svc#deploy'}),
+])
+def test_deleting_a_missing_row_changes_nothing(lf, path, params):
+    lf.assign_user_to_group({'user_id': 'jane', 'group_name': 'ops'})
+    revision = lf.read_revision(consistent=True)
+
+    call(lf, 'DELETE', path, params)
+
+    assert lf.read_revision(consistent=True) == revision
+    assert [change['revision'] for change in call(lf, 'GET', '/v1/changes', {'since': '0'})[1]['changes']] == [1]
+
+
+def test_deleting_a_row_is_logged(lf):
+    lf.assign_user_to_group({'user_id': 'jane', 'group_name': 'ops'})
+
+    call(lf, 'DELETE', '/v1/admin/users', {'user_id': 'jane', 'group_name': 'ops'})
+
+    changes = call(lf, 'GET', '/v1/changes', {'since': '1'})[1]['changes']
+    assert [(change['op'], change['item']) for change in changes] == [('delete', {'user_id': 'jane', 'group_name': 'ops'})]
+
+
+def test_page_cut_short_at_a_gap_is_not_cached(lf):
+    lf.record_change('put', 'users', {'user_id': 'a', 'group_name': 'ops'})
+    # Revision 2 is claimed by a write whose log entry has not landed yet
+    lf.bump_revision()
+    lf.record_change('put', 'users', {'user_id': 'c', 'group_name': 'ops'})
+
+    first = call(lf, 'GET', '/v1/changes', {'since': '0'})[1]
+    assert [change['revision'] for change in first['changes']] == [1] and first['has_more']
+
+    lf.get_table(lf.DIRECTORY_CHANGES_TABLE).put_item(Item={
+        'log': lf.CHANGE_LOG_KEY,
+        'revision': 2,
+        'op': 'put',
+        'table': 'users',
+        'item': {'user_id': 'b', 'group_name': 'ops'},
+        'changed_at': first_changed_at(lf)
+    })
+    second = call(lf, 'GET', '/v1/changes', {'since': '0'})[1]
+    assert [change['revision'] for change in second['changes']] == [1, 2, 3] and not second['has_more']
+
+
+def first_changed_at(lf):
+    return call(lf, 'GET', '/v1/changes', {'since': '0'})[1]['changes'][0]['changed_at']
+
+
+def test_batch_delete_of_a_missing_row_is_not_logged(lf):
+    lf.assign_user_to_group({'user_id': 'jane', 'group_name': 'ops'})
+
+    status, body = call(lf, 'POST', '/v1/admin/batch', body={'operations': [
+        {'op': 'delete', 'table': 'users', 'item': {'user_id': 'nobody', 'group_name': 'ops'}},
+        {'op': 'delete', 'table': 'users', 'item': {'user_id': 'jane', 'group_name': 'ops'}},
+        {'op': 'put', 'table': 'users', 'item': {'user_id': 'john', 'group_name': 'ops'}},
+    ]})
+
+    assert status == 200 and body['succeeded'] == 3, body
+    changes = call(lf, 'GET', '/v1/changes', {'since': '1'})[1]['changes']
+    assert [(change['revision'], change['op'], change['item']['user_id']) for change in changes] == [
+        (2, 'delete', 'jane'),
+        (3, 'put', 'john'),
+    ]
+    assert lf.read_revision(consistent=True) == 3
@@ -0,0 +1,66 @@
+import base64
+import gzip
+import json
+
+import pytest
+
+from conftest import call, invoke
+
+
+@pytest.fixture
+def listing(lf, monkeypatch):
+    monkeypatch.setattr(lf, 'GZIP_MIN_BYTES', 512)
+    for index in range(20):
+        lf.create_permission({'group_name': 'ops', 'service': f'service-{index:02d}', 'action': 'deploy'})
+    lf.create_contact({'target': 'ops', 'type': 'slack', 'data': '#ops'})
+
+
+@pytest.mark.parametrize('path, params, expected', [
+    ('/v1/permissions', {'group_name': 'ops', 'fields': 'service'}, {'service': 'service-00'}),
+    ('/v1/permissions', {'service': 'service-00', 'action': 'deploy', 'fields': 'action'}, {'action': 'deploy'}),
+    ('/v1/contacts', {'target': 'ops', 'fields': 'type,data'}, {'type': 'slack', 'data': '#ops'}),
+])
+def test_fields_limit_the_attributes_returned(lf, listing, path, params, expected):
+    status, body = call(lf, 'GET', path, params)
+
+    assert status == 200, body
+    assert body[0] == expected
+
+
+def test_unknown_field_is_rejected(lf, listing):
+    status, body = call(lf, 'GET', '/v1/permissions', {'group_name': 'ops', 'fields': 'service,password'})
+
+    assert status == 400
+    assert 'password' in body['error']
+
+
+def test_large_response_is_gzipped_for_clients_that_accept_it(lf, listing):
+    plain = invoke(lf, 'GET', '/v1/permissions', {'group_name': 'ops'})
+    zipped = invoke(lf, 'GET', '/v1/permissions', {'group_name': 'ops'}, headers={'Accept-Encoding': 'br, gzip'})
+
+    assert 'Content-Encoding' not in plain['headers']
+    assert zipped['headers']['Content-Encoding'] == 'gzip' and zipped['isBase64Encoded']
+    assert gzip.decompress(base64.b64decode(zipped['body'])).decode('utf-8') == plain['body']
+    assert zipped['headers']['ETag'] == plain['headers']['ETag'][:-1] + '-gzip"'
+    assert plain['headers']['Vary'] == zipped['headers']['Vary'] == 'Accept-Encoding'
+
+
+@pytest.mark.parametrize('path, params, accept_encoding', [
+    ('/v1/contacts', {'target': 'ops'}, 'gzip'),
+    ('/v1/permissions', {'group_name': 'ops'}, 'gzip;q=0'),
+])
+def test_small_responses_and_refusals_stay_plain(lf, listing, path, params, accept_encoding):
+    response = invoke(lf, 'GET', path, params, headers={'Accept-Encoding': accept_encoding})
+
+    assert response['statusCode'] == 200
+    assert 'Content-Encoding' not in response['headers']
+    json.loads(response['body'])
+
+
+def test_gzip_etag_round_trips_to_a_304(lf, listing):
+    headers = {'Accept-Encoding': 'gzip'}
+    etag = invoke(lf, 'GET', '/v1/permissions', {'group_name': 'ops'}, headers=headers)['headers']['ETag']
+
+    response = invoke(lf, 'GET', '/v1/permissions', {'group_name': 'ops'}, headers={**headers, 'If-None-Match': etag})
+
+    assert response['statusCode'] == 304 and response['body'] == ''
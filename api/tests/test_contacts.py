@@ -0,0 +1,39 @@
+import pytest
+
+from conftest import call
+
+
+@pytest.fixture
+def contacts(lf):
+    lf.create_contact({'target': 'ops', 'type': 'slack', 'data': '#ops'})
+    lf.create_contact({'target': 'ops', 'type': 'email', 'data': 'ops@example.com'})
+
+
+@pytest.mark.parametrize('params, types', [
+    ({'target': 'ops,'}, ['email', 'slack']),
+    ({'target': ' ops '}, ['email', 'slack']),
+    ({'target': 'ops', 'type': 'slack,'}, ['slack']),
+    ({'target': 'ops,ops', 'type': ','}, ['email', 'slack']),
+])
+def test_single_target_is_read_from_the_split_list(lf, contacts, params, types):
+    status, body = call(lf, 'GET', '/v1/contacts', params)
+
+    assert status == 200, body
+    assert sorted(item['type'] for item in body) == types
+
+
+def test_several_targets_and_types(lf, contacts):
+    lf.create_contact({'target': 'jane', 'type': 'slack', 'data': '@jane'})
+
+    status, body = call(lf, 'GET', '/v1/contacts', {'target': 'ops,jane,nobody', 'type': 'slack'})
+
+    assert status == 200, body
+    assert sorted((item['target'], item['data']) for item in body) == [('jane', '@jane'), ('ops', '#ops')]
+
+
+def test_blank_target_is_rejected(lf, contacts):
+    assert call(lf, 'GET', '/v1/contacts', {'target': ','})[0] == 400
+
+
+def test_missing_contact_is_not_found(lf, contacts):
+    assert call(lf, 'GET', '/v1/contacts', {'target': 'ops,', 'type': 'pager'})[0] == 404
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from conftest import invoke
+
+
+@pytest.fixture
+def etag(lf):
+    lf.assign_user_to_group({'user_id': 'jane', 'group_name': 'ops'})
+    response = invoke(lf, 'GET', '/v1/users', {'group_name': 'ops'})
+    assert response['statusCode'] == 200
+    return response['headers']['ETag']
+
+
+def test_get_is_tagged_with_a_strong_etag(lf, etag):
+    assert etag.startswith('"') and etag.endswith('"')
+    assert invoke(lf, 'GET', '/v1/users', {'group_name': 'ops'})['headers']['ETag'] == etag
+
+
+@pytest.mark.parametrize('if_none_match', ['{etag}', 'W/{etag}', '"other", {etag}', '*'])
+def test_matching_if_none_match_gets_an_empty_304(lf, etag, if_none_match):
+    response = invoke(lf, 'GET', '/v1/users', {'group_name': 'ops'}, headers={'If-None-Match': if_none_match.format(etag=etag)})
+
+    assert response['statusCode'] == 304
+    assert response['body'] == ''
+    assert response['headers']['ETag'] == etag
+    assert response['headers']['Access-Control-Allow-Origin'] == '*'
+
+
+def test_changed_listing_gets_a_new_etag(lf, etag):
+    lf.assign_user_to_group({'user_id': 'john', 'group_name': 'ops'})
+
+    response = invoke(lf, 'GET', '/v1/users', {'group_name': 'ops'}, headers={'If-None-Match': etag})
+
+    assert response['statusCode'] == 200
+    assert response['headers']['ETag'] != etag
+    assert len(json.loads(response['body'])) == 2
+
+
+def test_only_successful_gets_are_tagged(lf, etag):
+    missing = invoke(lf, 'GET', '/v1/contacts', {'target': 'nobody'}, headers={'If-None-Match': '*'})
+    write = invoke(lf, 'POST', '/v1/admin/users', headers={'If-None-Match': '*'}, body={'user_id': 'john', 'group_name': 'ops'})
+
+    assert missing['statusCode'] == 404 and 'ETag' not in missing['headers']
+    assert write['statusCode'] == 201 and 'ETag' not in write['headers']
@@ -0,0 +1,38 @@
+import threading
+
+import pytest
+
+
+def test_nested_parallel_map_runs_inline_on_a_single_worker(lf, monkeypatch):
+    monkeypatch.setattr(lf, 'FANOUT_WORKERS', 1)
+    results = []
+
+    def outer(value):
+        return lf.parallel_map(lambda inner: (value, inner), range(3))
+
+    # On the old code the one worker waits on tasks queued behind itself forever
+    worker = threading.Thread(target=lambda: results.append(lf.parallel_map(outer, 'ab')), daemon=True)
+    worker.start()
+    worker.join(timeout=10)
+    deadlocked = worker.is_alive()
+    if deadlocked:
+        # Cancelling the queued tasks frees the worker so the test run can exit
+        lf.get_executor().shutdown(wait=False, cancel_futures=True)
+
+    assert not deadlocked, 'nested parallel_map deadlocked the pool'
+    assert results == [[[('a', 0), ('a', 1), ('a', 2)], [('b', 0), ('b', 1), ('b', 2)]]]
+
+
+@pytest.mark.parametrize('total_segments', [1, 3])
+def test_scan_tables_returns_each_table_in_the_order_asked(lf, total_segments):
+    for index in range(10):
+        lf.assign_user_to_group({'user_id': f'user{index}', 'group_name': 'ops'})
+        lf.create_permission({'group_name': f'group{index}', 'service': 'svc', 'action': 'deploy'})
+    lf.create_contact({'target': 'ops', 'type': 'slack', 'data': '#ops'})
+
+    names = [lf.CONTACT_INFO_TABLE, lf.USER_GROUPS_TABLE, lf.GROUP_PERMISSIONS_TABLE]
+    contacts, memberships, permissions = lf.scan_tables(names, total_segments)
+
+    assert [item['target'] for item in contacts] == ['ops']
+    assert sorted(item['user_id'] for item in memberships) == [f'user{index}' for index in range(10)]
+    assert sorted(item['group_name'] for item in permissions) == [f'group{index}' for index in range(10)]
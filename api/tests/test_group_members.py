@@ -0,0 +1,91 @@
+import pytest
+
+from conftest import call
+
+
+class CountingBackend:
+    """Storage wrapper that counts the items sent through BatchWriteItem per table"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.written = {}
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        for table, requests in RequestItems.items():
+            self.written[table] = self.written.get(table, 0) + len(requests)
+        return self.backend.batch_write_item(RequestItems=RequestItems, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+@pytest.fixture
+def writes(lf):
+    for user_id in ('alice', 'bob', 'carol'):
+        lf.assign_user_to_group({'user_id': user_id, 'group_name': 'ops'})
+    lf.assign_user_to_group({'user_id': 'alice', 'group_name': 'dev'})
+    backend = CountingBackend(lf.get_storage().target)
+    lf.use_storage(backend)
+    return backend.written
+
+
+def sync(lf, members, **params):
+    return call(lf, 'PUT', '/v1/admin/groups/ops/members', params or None, {'members': members})
+
+
+def members(lf, group_name='ops'):
+    return sorted(item['user_id'] for item in call(lf, 'GET', '/v1/users', {'group_name': group_name})[1])
+
+
+def test_only_the_difference_is_written(lf, writes):
+    status, body = sync(lf, ['bob', 'carol', 'dave', 'erin', 'dave'])
+
+    assert status == 200, body
+    assert body == {'group_name': 'ops', 'dry_run': False, 'added': ['dave', 'erin'], 'removed': ['alice'],
+                    'unchanged': 2, 'failed': []}
+    assert writes[lf.USER_GROUPS_TABLE] == 3
+    assert members(lf) == ['bob', 'carol', 'dave', 'erin']
+    # Other groups are left alone
+    assert members(lf, 'dev') == ['alice']
+
+
+def test_matching_list_writes_nothing(lf, writes):
+    status, body = sync(lf, ['carol', 'alice', 'bob'])
+
+    assert status == 200, body
+    assert (body['added'], body['removed'], body['unchanged']) == ([], [], 3)
+    assert writes == {}
+
+
+def test_dry_run_reports_without_writing(lf, writes):
+    status, body = sync(lf, ['alice', 'zed'], dry_run='true')
+
+    assert status == 200, body
+    assert (body['dry_run'], body['added'], body['removed']) == (True, ['zed'], ['bob', 'carol'])
+    assert writes == {}
+    assert members(lf) == ['alice', 'bob', 'carol']
+
+
+def test_changes_are_logged_and_counted(lf, writes):
+    revision = lf.read_revision(consistent=True)
+
+    sync(lf, ['alice', 'dave'])
+
+    changes = call(lf, 'GET', '/v1/changes', {'since': str(revision)})[1]['changes']
+    assert sorted((change['op'], change['item']['user_id']) for change in changes) == [
+        ('delete', 'bob'), ('delete', 'carol'), ('put', 'dave')
+    ]
+    summary = next(item for item in call(lf, 'GET', '/v1/groups')[1] if item['group_name'] == 'ops')
+    assert summary['member_count'] == 2
+
+
+def test_empty_list_removes_everyone(lf, writes):
+    assert sync(lf, [])[1]['removed'] == ['alice', 'bob', 'carol']
+    assert members(lf) == []
+
+
+@pytest.mark.parametrize('members', [None, 'alice', ['alice', 7], ['']])
+def test_member_list_must_be_user_ids(lf, members):
+    body = {} if members is None else {'members': members}
+
+    assert call(lf, 'PUT', '/v1/admin/groups/ops/members', body=body)[0] == 400
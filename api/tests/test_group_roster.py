@@ -0,0 +1,33 @@
+from conftest import call
+
+
+def test_group_with_only_permissions_has_an_empty_roster(lf):
+    lf.create_permission({'group_name': 'auditors', 'service': 'svc', 'action': 'read'})
+
+    status, body = call(lf, 'GET', '/v1/groups/auditors/roster')
+
+    assert status == 200, body
+    assert body == {'group_name': 'auditors', 'contacts': [], 'members': []}
+
+
+def test_group_without_a_summary_is_found_from_its_permissions(lf):
+    lf.create_permission({'group_name': 'auditors', 'service': 'svc', 'action': 'read'})
+    lf.get_table(lf.GROUP_SUMMARY_TABLE).delete_item(Key={'group_name': 'auditors'})
+
+    status, body = call(lf, 'GET', '/v1/groups/auditors/roster')
+
+    assert status == 200, body
+    assert body['members'] == []
+
+
+def test_unknown_group_is_not_found(lf):
+    assert call(lf, 'GET', '/v1/groups/nobody/roster')[0] == 404
+
+
+def test_path_decoded_by_api_gateway_is_not_decoded_again(lf):
+    lf.create_permission({'group_name': 'x%25', 'service': 'svc', 'action': 'read'})
+
+    status, body = call(lf, 'GET', '/v1/groups/x%25/roster')
+
+    assert status == 200, body
+    assert body['group_name'] == 'x%25'
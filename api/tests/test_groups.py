@@ -0,0 +1,84 @@
+import pytest
+
+from conftest import call
+
+
+@pytest.fixture
+def directory(lf):
+    lf.assign_user_to_group({'user_id': 'jane', 'group_name': 'ops'})
+    lf.assign_user_to_group({'user_id': 'john', 'group_name': 'ops'})
+    lf.assign_user_to_group({'user_id': 'jane', 'group_name': 'dev'})
+    lf.create_permission({'group_name': 'ops', 'service': 'svc', 'action': 'deploy'})
+    lf.create_permission({'group_name': 'auditors', 'service': 'svc', 'action': 'read'})
+    lf.create_contact({'target': 'ops', 'type': 'slack', 'data': '#ops'})
+    lf.create_contact({'target': 'ops', 'type': 'email', 'data': 'ops@example.com'})
+    # A user's contact does not make the user a group
+    lf.create_contact({'target': 'jane', 'type': 'slack', 'data': '@jane'})
+
+
+def group(name, members, permissions, contact_types=()):
+    return {'group_name': name, 'member_count': members, 'permission_count': permissions, 'contact_types': list(contact_types)}
+
+
+class NoScans:
+    def __init__(self, table):
+        self.table = table
+
+    def scan(self, **kwargs):
+        raise AssertionError(f'{self.table.name} was scanned')
+
+    def __getattr__(self, name):
+        return getattr(self.table, name)
+
+
+def test_groups_are_listed_from_their_summaries(lf, directory):
+    for name in (lf.USER_GROUPS_TABLE, lf.GROUP_PERMISSIONS_TABLE, lf.CONTACT_INFO_TABLE):
+        lf._tables[name] = NoScans(lf.get_table(name))
+
+    status, body = call(lf, 'GET', '/v1/groups')
+
+    assert status == 200, body
+    assert body == [
+        group('auditors', 0, 1),
+        group('dev', 1, 0),
+        group('ops', 2, 1, ['email', 'slack']),
+    ]
+
+
+def test_counts_follow_removals(lf, directory):
+    call(lf, 'DELETE', '/v1/admin/users', {'user_id': 'john', 'group_name': 'ops'})
+    call(lf, 'DELETE', '/v1/admin/contacts', {'target': 'ops', 'type': 'email'})
+    call(lf, 'DELETE', '/v1/admin/users', {'user_id': 'jane', 'group_name': 'dev'})
+    # Removing what is not there moves nothing
+    call(lf, 'DELETE', '/v1/admin/users', {'user_id': 'john', 'group_name': 'ops'})
+
+    # dev has no members or permissions left, so it is no longer a group
+    assert call(lf, 'GET', '/v1/groups')[1] == [group('auditors', 0, 1), group('ops', 1, 1, ['slack'])]
+
+
+def test_groups_page_through_the_summaries(lf, directory):
+    first = call(lf, 'GET', '/v1/groups', {'limit': '2'})[1]
+    second = call(lf, 'GET', '/v1/groups', {'limit': '2', 'cursor': first['next_cursor']})[1]
+
+    names = [item['group_name'] for item in first['items'] + second['items']]
+    assert sorted(names) == ['auditors', 'dev', 'ops']
+
+
+def test_rebuild_repairs_drifted_summaries(lf, directory):
+    summaries = lf.get_table(lf.GROUP_SUMMARY_TABLE)
+    summaries.delete_item(Key={'group_name': 'ops'})
+    summaries.put_item(Item={'group_name': 'ghost', 'member_count': 3, 'permission_count': 0})
+
+    assert lf.rebuild_group_summaries() == 3
+    assert call(lf, 'GET', '/v1/groups')[1] == [
+        group('auditors', 0, 1),
+        group('dev', 1, 0),
+        group('ops', 2, 1, ['email', 'slack']),
+    ]
+
+
+def test_adding_an_existing_member_again_counts_once(lf, directory):
+    status, _ = call(lf, 'POST', '/v1/admin/users', body={'user_id': 'jane', 'group_name': 'ops'})
+
+    assert status == 409
+    assert call(lf, 'GET', '/v1/groups')[1][2] == group('ops', 2, 1, ['email', 'slack'])
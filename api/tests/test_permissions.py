@@ -0,0 +1,106 @@
+import pytest
+
+from conftest import call
+
+
+@pytest.fixture
+def grants(lf):
+    for group_name, service, action in [
+        ('c', 'svc', 'deploy'),
+        ('a', 'svc', 'all'),
+        ('d', 'all', 'deploy'),
+        ('b', 'svc', 'deploy'),
+        ('e', 'other', 'deploy'),
+    ]:
+        lf.create_permission({'group_name': group_name, 'service': service, 'action': action})
+
+
+@pytest.mark.parametrize('params, groups', [
+    ({'service': 'svc', 'action': 'deploy'}, ['a', 'b', 'c', 'd']),
+    ({'service': 'svc'}, ['a', 'b', 'c', 'd']),
+])
+def test_service_lookups_page_in_group_name_order(lf, grants, params, groups):
+    seen, cursor = [], None
+    while True:
+        status, body = call(lf, 'GET', '/v1/permissions', {**params, 'limit': '1', **({'cursor': cursor} if cursor else {})})
+        assert status == 200, body
+        seen += [item['group_name'] for item in body['items']]
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+
+    assert seen == groups
+    assert sorted(item['group_name'] for item in call(lf, 'GET', '/v1/permissions', params)[1]) == groups
+
+
+def test_service_lookup_page_keeps_fields(lf, grants):
+    status, body = call(lf, 'GET', '/v1/permissions', {'service': 'svc', 'action': 'deploy', 'limit': '2', 'fields': 'action'})
+
+    assert status == 200, body
+    assert body['items'] == [{'action': 'all'}, {'action': 'deploy'}]
+    assert body['next_cursor']
+
+
+def test_service_lookup_rejects_a_cursor_without_a_group_name(lf, grants):
+    status, _ = call(lf, 'GET', '/v1/permissions', {'service': 'svc', 'cursor': lf.encode_cursor({'revision': 3})})
+
+    assert status == 400
+
+
+class NoScans:
+    """Table wrapper that fails the test if the table is scanned"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def scan(self, **kwargs):
+        raise AssertionError('permissions table was scanned')
+
+    def __getattr__(self, name):
+        return getattr(self.table, name)
+
+
+@pytest.fixture
+def wildcards(lf):
+    for group_name, service, action in [
+        ('exact', 'svc', 'deploy'),
+        ('any-action', 'svc', 'all'),
+        ('any-service', 'all', 'deploy'),
+        ('godmode', 'all', 'all'),
+        ('other-service', 'other', 'deploy'),
+        ('other-action', 'svc', 'build'),
+        ('both', 'svc', 'deploy'),
+        ('both', 'all', 'all'),
+    ]:
+        lf.create_permission({'group_name': group_name, 'service': service, 'action': action})
+    lf._tables[lf.GROUP_PERMISSIONS_TABLE] = NoScans(lf.get_table(lf.GROUP_PERMISSIONS_TABLE))
+
+
+def test_action_lookup_resolves_every_wildcard_without_scanning(lf, wildcards):
+    status, body = call(lf, 'GET', '/v1/permissions', {'service': 'svc', 'action': 'deploy'})
+
+    assert status == 200, body
+    rows = {item['group_name']: item['service_action'] for item in body}
+    assert rows == {
+        'exact': 'svc#deploy',
+        'both': 'svc#deploy',
+        'any-action': 'svc#all',
+        'any-service': 'all#deploy',
+        'godmode': 'all#all',
+    }
+    # Most specific rule first
+    assert [item['service_action'] for item in body] == sorted(rows.values(), key=['svc#deploy', 'svc#all', 'all#deploy', 'all#all'].index)
+
+
+def test_service_lookup_includes_service_all_without_scanning(lf, wildcards):
+    status, body = call(lf, 'GET', '/v1/permissions', {'service': 'svc'})
+
+    assert status == 200, body
+    assert sorted(item['group_name'] for item in body) == ['any-action', 'any-service', 'both', 'exact', 'godmode', 'other-action']
+
+
+def test_all_all_lookup_finds_only_godmode_grants(lf, wildcards):
+    status, body = call(lf, 'GET', '/v1/permissions', {'service': 'all', 'action': 'all'})
+
+    assert status == 200, body
+    assert sorted(item['group_name'] for item in body) == ['both', 'godmode']
@@ -0,0 +1,56 @@
+import pytest
+
+from conftest import call
+
+
+@pytest.mark.parametrize('field, value', [
+    ('members', 'abc'),
+    ('members', ['ok', 7]),
+    ('members', {'a': 1}),
+    ('contacts', 'slack'),
+    ('contacts', [{'type': 'slack'}]),
+    ('contacts', ['slack']),
+    ('permissions', 'deploy'),
+    ('permissions', [{'service': 'svc', 'action': ''}]),
+    ('permissions', [['svc', 'deploy']]),
+])
+def test_malformed_lists_are_rejected(lf, field, value):
+    status, body = call(lf, 'POST', '/v1/admin/groups', body={'group_name': 'ops', field: value})
+
+    assert status == 400, body
+    assert call(lf, 'GET', '/v1/users', {'group_name': 'ops'})[1] == []
+
+
+def test_group_is_provisioned(lf):
+    status, body = call(lf, 'POST', '/v1/admin/groups', body={
+        'group_name': 'ops',
+        'members': ['a', 'b', 'a'],
+        'contacts': [{'type': 'slack', 'data': '#ops'}],
+        'permissions': [{'service': 'svc', 'action': 'deploy'}]
+    })
+
+    assert status == 201, body
+    assert body == {'group_name': 'ops', 'members': 2, 'contacts': 1, 'permissions': 1, 'transactions': 1}
+    assert sorted(item['user_id'] for item in call(lf, 'GET', '/v1/users', {'group_name': 'ops'})[1]) == ['a', 'b']
+
+
+@pytest.mark.parametrize('existing', [
+    lambda lf: lf.assign_user_to_group({'user_id': 'a', 'group_name': 'ops'}),
+    lambda lf: lf.create_permission({'group_name': 'ops', 'service': 'svc', 'action': 'read'}),
+])
+def test_existing_group_is_found_without_its_summary(lf, existing):
+    existing(lf)
+    lf.get_table(lf.GROUP_SUMMARY_TABLE).delete_item(Key={'group_name': 'ops'})
+
+    status, body = call(lf, 'POST', '/v1/admin/groups', body={'group_name': 'ops', 'members': ['b']})
+
+    assert status == 409, body
+    assert 'b' not in [item['user_id'] for item in call(lf, 'GET', '/v1/users', {'group_name': 'ops'})[1]]
+
+
+def test_group_with_only_contacts_can_be_provisioned(lf):
+    lf.create_contact({'target': 'ops', 'type': 'slack', 'data': '#ops'})
+
+    status, body = call(lf, 'POST', '/v1/admin/groups', body={'group_name': 'ops', 'members': ['a']})
+
+    assert status == 201, body
@@ -0,0 +1,60 @@
+import pytest
+
+from conftest import call
+
+
+@pytest.fixture
+def directory(lf):
+    for user_id, group_name in [('Joan', 'ops'), ('john', 'ops'), ('jo', 'Journalists'), ('jane', 'ops'), ('john', 'dev')]:
+        lf.assign_user_to_group({'user_id': user_id, 'group_name': group_name})
+    lf.create_permission({'group_name': 'jobs', 'service': 'svc', 'action': 'run'})
+    lf.create_contact({'target': 'john', 'type': 'slack', 'data': '@john'})
+
+
+def names(lf, prefix, kind, **params):
+    status, body = call(lf, 'GET', '/v1/search', {'prefix': prefix, 'kind': kind, **params})
+    assert status == 200, body
+    return [item['name'] for item in body]
+
+
+def test_prefix_matches_ignore_case_in_name_order(lf, directory):
+    assert names(lf, 'JO', 'user') == ['jo', 'Joan', 'john']
+    assert names(lf, 'jo', 'group') == ['jobs', 'Journalists']
+    assert names(lf, 'jo', 'target') == ['john']
+    assert names(lf, 'x', 'user') == []
+
+
+def test_limit_returns_the_first_matches(lf, directory):
+    assert names(lf, 'j', 'user', limit='2') == ['jane', 'jo']
+
+
+def test_entries_go_when_the_last_row_naming_them_does(lf, directory):
+    call(lf, 'DELETE', '/v1/admin/users', {'user_id': 'john', 'group_name': 'ops'})
+    assert 'john' in names(lf, 'john', 'user')
+
+    call(lf, 'DELETE', '/v1/admin/users', {'user_id': 'john', 'group_name': 'dev'})
+    assert names(lf, 'john', 'user') == []
+    assert names(lf, 'd', 'group') == []
+    # Still a contact target
+    assert names(lf, 'john', 'target') == ['john']
+
+
+@pytest.mark.parametrize('params', [
+    {'prefix': 'jo', 'kind': 'contact'},
+    {'prefix': '', 'kind': 'user'},
+    {'prefix': 'jo', 'kind': 'user', 'limit': '0'},
+    {'prefix': 'jo', 'kind': 'user', 'limit': '51'},
+])
+def test_bad_parameters_are_rejected(lf, params):
+    assert call(lf, 'GET', '/v1/search', params)[0] == 400
+
+
+def test_rebuild_repairs_the_index(lf, directory):
+    index = lf.get_table(lf.SEARCH_INDEX_TABLE)
+    index.delete_item(Key=lf.search_key('user', 'jane'))
+    index.put_item(Item={**lf.search_key('user', 'ghost'), 'kind': 'user', 'name': 'ghost', 'refs': 1})
+
+    lf.rebuild_search_index()
+
+    assert names(lf, 'jane', 'user') == ['jane']
+    assert names(lf, 'ghost', 'user') == []
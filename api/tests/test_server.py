@@ -0,0 +1,114 @@
+import asyncio
+import json
+import threading
+import urllib.parse
+
+import pytest
+
+import server
+
+
+def keys():
+    return server.KeyRing(public=['public-key'], admin=['admin-key'])
+
+
+@pytest.mark.parametrize('method, path, key, allowed', [
+    ('GET', '/v1/permissions', 'public-key', True),
+    ('GET', '/v1/permissions', 'admin-key', True),
+    ('GET', '/v1/permissions', 'wrong-key', False),
+    ('GET', '/v1/permissions', None, False),
+    ('POST', '/v1/admin/users', 'public-key', False),
+    ('POST', '/v1//admin/users/', 'public-key', False),
+    ('POST', '/v1/admin', 'public-key', False),
+    ('POST', '/v1/admin/users', 'admin-key', True),
+    ('GET', '/v1/administrators', 'public-key', True),
+    ('GET', '/v1/docs', None, True),
+    ('OPTIONS', '/v1/admin/users', None, True),
+])
+def test_key_ring(lf, method, path, key, allowed):
+    assert keys().allows(method, path, key) is allowed
+
+
+async def request(app, method, path, key=None, body=b'', query=b''):
+    """Send one request through the ASGI app and return (status, headers, body)"""
+    headers = [(b'x-api-key', key.encode())] if key else []
+    scope = {'type': 'http', 'method': method, 'path': urllib.parse.unquote(path), 'raw_path': path.encode(),
+             'query_string': query, 'headers': headers}
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]['status'], dict(sent[0]['headers']), sent[1]['body']
+
+
+def test_requests_reach_the_handlers(lf):
+    lf.assign_user_to_group({'user_id': 'jane', 'group_name': 'ops'})
+    app = server.DirectoryServer(keys())
+
+    status, headers, body = asyncio.run(request(app, 'GET', '/v1/users', 'public-key', query=b'group_name=ops'))
+
+    assert status == 200
+    assert headers[b'content-length'] == str(len(body)).encode()
+    assert json.loads(body) == [{'user_id': 'jane', 'group_name': 'ops'}]
+
+
+def test_encoded_path_parameters_are_decoded_once(lf):
+    lf.create_permission({'group_name': 'a/b%25', 'service': 'svc', 'action': 'read'})
+    app = server.DirectoryServer(keys())
+
+    status, _, body = asyncio.run(request(app, 'GET', '/v1/groups/a%2Fb%2525/roster', 'public-key'))
+
+    assert status == 200, body
+    assert json.loads(body)['group_name'] == 'a/b%25'
+
+
+def test_public_key_is_refused_on_admin_routes(lf):
+    app = server.DirectoryServer(keys())
+    body = json.dumps({'user_id': 'jane', 'group_name': 'ops'}).encode()
+
+    status, _, _ = asyncio.run(request(app, 'POST', '/v1/admin/users', 'public-key', body=body))
+
+    assert status == 403
+    assert lf.read_revision(consistent=True) == 0
+
+
+def test_oversized_body_is_refused(lf, monkeypatch):
+    monkeypatch.setattr(server, 'MAX_BODY_BYTES', 16)
+    app = server.DirectoryServer(keys())
+    body = json.dumps({'user_id': 'jane', 'group_name': 'ops'}).encode()
+
+    status, _, _ = asyncio.run(request(app, 'POST', '/v1/admin/users', 'admin-key', body=body))
+
+    assert status == 413
+
+
+def test_draining_server_refuses_new_requests_and_finishes_running_ones(lf):
+    release = threading.Event()
+
+    def slow_handler(event, context):
+        release.wait(5)
+        return {'statusCode': 200, 'body': '{}'}
+
+    app = server.DirectoryServer(keys(), handler=slow_handler)
+
+    async def scenario():
+        running = asyncio.create_task(request(app, 'GET', '/v1/permissions', 'public-key'))
+        while not app.in_flight:
+            await asyncio.sleep(0.01)
+        stopping = asyncio.create_task(app.stop())
+        await asyncio.sleep(0.01)
+        refused = await request(app, 'GET', '/v1/permissions', 'public-key')
+        assert not stopping.done()
+        release.set()
+        return refused, await running, await stopping
+
+    refused, finished, _ = asyncio.run(scenario())
+
+    assert refused[0] == 503 and refused[1][b'connection'] == b'close'
+    assert finished[0] == 200
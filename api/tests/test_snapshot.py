@@ -0,0 +1,24 @@
+import base64
+import gzip
+import json
+
+import pytest
+
+from conftest import invoke
+
+
+@pytest.mark.parametrize('accept_encoding', ['gzip', 'identity'])
+def test_snapshot_varies_on_accept_encoding(lf, accept_encoding):
+    lf.assign_user_to_group({'user_id': 'jane', 'group_name': 'ops'})
+
+    response = invoke(lf, 'GET', '/v1/snapshot', headers={'Accept-Encoding': accept_encoding})
+
+    assert response['statusCode'] == 200
+    assert response['headers']['Vary'] == 'Accept-Encoding'
+    body = response['body']
+    if accept_encoding == 'gzip':
+        assert response['headers']['Content-Encoding'] == 'gzip'
+        body = gzip.decompress(base64.b64decode(body)).decode('utf-8')
+    else:
+        assert 'Content-Encoding' not in response['headers']
+    assert json.loads(body)['memberships'] == [{'user_id': 'jane', 'group_name': 'ops'}]
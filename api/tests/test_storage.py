@@ -0,0 +1,182 @@
+import threading
+
+import pytest
+
+import storage
+
+
+class FakeSession:
+    """Records which thread built each client and resource"""
+
+    def __init__(self):
+        self.clients = []
+        self.resources = []
+
+    def client(self, service, config=None):
+        self.clients.append(threading.current_thread().name)
+        return type('Client', (), {'exceptions': type('Exceptions', (), {'ConditionalCheckFailedException': KeyError})})()
+
+    def resource(self, service, config=None):
+        self.resources.append(threading.current_thread().name)
+        return FakeResource(threading.current_thread().name)
+
+
+class FakeResource:
+    def __init__(self, owner):
+        self.owner = owner
+
+    def Table(self, name):
+        return FakeTable(self, name)
+
+
+class FakeTable:
+    def __init__(self, resource, name):
+        self.resource = resource
+        self.name = name
+
+    def get_item(self, **kwargs):
+        return {'Item': {'resource': self.resource.owner, 'thread': threading.current_thread().name}}
+
+
+def test_each_thread_gets_its_own_resource(lf):
+    session = FakeSession()
+    backend = lf.ThreadLocalResource(session, config=None)
+
+    assert backend.exceptions.ConditionalCheckFailedException is KeyError
+    assert session.resources == []
+
+    table = backend.Table('t')
+    seen = {}
+
+    def read(name):
+        seen[name] = [table.get_item(Key={})['Item'] for _ in range(2)]
+
+    threads = [threading.Thread(target=read, args=(name,), name=name) for name in ('one', 'two')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(session.resources) == ['one', 'two']
+    for name, items in seen.items():
+        assert [(item['thread'], item['resource']) for item in items] == [(name, name), (name, name)]
+    assert table.name == 't'
+
+
+@pytest.fixture
+def backend(lf):
+    return storage.SQLiteBackend(':memory:', lf.TABLE_SCHEMAS)
+
+
+@pytest.fixture
+def permissions(lf, backend):
+    table = backend.Table(lf.GROUP_PERMISSIONS_TABLE)
+    for group_name, service, action in [('a', 'svc', 'deploy'), ('b', 'svc', 'deploy'), ('c', 'svc', 'build'),
+                                        ('d', 'other', 'deploy'), ('e', 'svc', 'all')]:
+        table.put_item(Item=lf.permission_record({'group_name': group_name, 'service': service, 'action': action}))
+    return table
+
+
+def test_handlers_use_the_backend_named_by_the_environment(lf, monkeypatch):
+    assert isinstance(lf.get_storage().target, storage.SQLiteBackend)
+    assert lf.ConditionalCheckFailedException is storage.ConditionalCheckFailedException
+
+    monkeypatch.setenv('STORAGE_BACKEND', 'cassandra')
+    with pytest.raises(ValueError):
+        lf.create_storage()
+
+
+@pytest.mark.parametrize('index, condition, values, groups', [
+    ('ServiceActionIndex', 'service_action = :sa', {':sa': 'svc#deploy'}, ['a', 'b']),
+    ('ServiceIndex', 'service = :s', {':s': 'svc'}, ['e', 'c', 'a', 'b']),
+    ('ServiceIndex', 'service = :s AND action = :a', {':s': 'svc', ':a': 'deploy'}, ['a', 'b']),
+])
+def test_index_queries(permissions, index, condition, values, groups):
+    response = permissions.query(IndexName=index, KeyConditionExpression=condition, ExpressionAttributeValues=values)
+
+    # Ordered by the index sort key, then the table key, as DynamoDB does
+    assert [item['group_name'] for item in response['Items']] == groups
+
+
+def test_group_name_index(lf, backend):
+    table = backend.Table(lf.USER_GROUPS_TABLE)
+    for user_id, group_name in [('jane', 'ops'), ('john', 'ops'), ('jane', 'dev')]:
+        table.put_item(Item={'user_id': user_id, 'group_name': group_name})
+
+    response = table.query(IndexName='GroupNameIndex', KeyConditionExpression='group_name = :g',
+                           ExpressionAttributeValues={':g': 'ops'})
+
+    assert [item['user_id'] for item in response['Items']] == ['jane', 'john']
+
+
+def test_paged_index_query_continues_from_last_evaluated_key(permissions):
+    seen, start = [], None
+    while True:
+        kwargs = {'ExclusiveStartKey': start} if start else {}
+        response = permissions.query(IndexName='ServiceIndex', KeyConditionExpression='service = :s',
+                                     ExpressionAttributeValues={':s': 'svc'}, Limit=2, **kwargs)
+        seen += [item['group_name'] for item in response['Items']]
+        start = response.get('LastEvaluatedKey')
+        if not start:
+            break
+
+    assert seen == ['e', 'c', 'a', 'b']
+
+
+def test_segmented_scans_cover_the_table_once(permissions):
+    items = [item['group_name'] for segment in range(3)
+             for item in permissions.scan(Segment=segment, TotalSegments=3)['Items']]
+
+    assert sorted(items) == ['a', 'b', 'c', 'd', 'e']
+
+
+def test_conditions_and_projection(lf, permissions):
+    item = lf.permission_record({'group_name': 'a', 'service': 'svc', 'action': 'deploy'})
+    with pytest.raises(storage.ConditionalCheckFailedException):
+        permissions.put_item(Item=item, ConditionExpression='attribute_not_exists(group_name)')
+    with pytest.raises(storage.ConditionalCheckFailedException):
+        permissions.delete_item(Key={'group_name': 'z', 'service_action': 'svc#deploy'},
+                                ConditionExpression='attribute_exists(group_name)')
+
+    response = permissions.get_item(Key={'group_name': 'a', 'service_action': 'svc#deploy'},
+                                    ProjectionExpression='#f0', ExpressionAttributeNames={'#f0': 'action'})
+    assert response['Item'] == {'action': 'deploy'}
+    with pytest.raises(NotImplementedError):
+        permissions.put_item(Item=item, ConditionExpression='size(action) > :n', ExpressionAttributeValues={':n': 1})
+
+
+def test_update_counters_and_sets(lf, backend):
+    table = backend.Table(lf.GROUP_SUMMARY_TABLE)
+    key = {'group_name': 'ops'}
+    table.update_item(Key=key, UpdateExpression='ADD member_count :n, contact_types :t',
+                      ExpressionAttributeValues={':n': 2, ':t': {'slack'}})
+    table.update_item(Key=key, UpdateExpression='ADD member_count :n', ExpressionAttributeValues={':n': -1})
+    assert table.get_item(Key=key)['Item'] == {'group_name': 'ops', 'member_count': 1, 'contact_types': ['slack']}
+
+    table.update_item(Key=key, UpdateExpression='DELETE contact_types :t', ExpressionAttributeValues={':t': {'slack'}})
+    assert 'contact_types' not in table.get_item(Key=key)['Item']
+
+
+def test_transactions_are_all_or_nothing(lf, backend):
+    table = backend.Table(lf.USER_GROUPS_TABLE)
+    table.put_item(Item={'user_id': 'jane', 'group_name': 'ops'})
+    put = lambda user_id: {'Put': {'TableName': lf.USER_GROUPS_TABLE, 'Item': {'user_id': user_id, 'group_name': 'ops'},
+                                   'ConditionExpression': 'attribute_not_exists(user_id)'}}
+
+    with pytest.raises(storage.TransactionCanceledException) as cancelled:
+        backend.transact_write_items(TransactItems=[put('john'), put('jane')])
+
+    assert [reason['Code'] for reason in cancelled.value.response['CancellationReasons']] == ['None', 'ConditionalCheckFailed']
+    assert 'Item' not in table.get_item(Key={'user_id': 'john', 'group_name': 'ops'})
+
+
+def test_consumed_capacity_is_reported_when_asked(lf, permissions, backend):
+    read = permissions.query(KeyConditionExpression='group_name = :g', ExpressionAttributeValues={':g': 'a'},
+                             ReturnConsumedCapacity='TOTAL', ConsistentRead=True)
+    write = backend.batch_write_item(RequestItems={lf.GROUP_PERMISSIONS_TABLE: [
+        {'DeleteRequest': {'Key': {'group_name': 'a', 'service_action': 'svc#deploy'}}}
+    ]}, ReturnConsumedCapacity='TOTAL')
+
+    assert read['ConsumedCapacity'] == {'TableName': lf.GROUP_PERMISSIONS_TABLE, 'CapacityUnits': 1.0}
+    assert write['ConsumedCapacity'] == [{'TableName': lf.GROUP_PERMISSIONS_TABLE, 'CapacityUnits': 1.0}]
+    assert 'ConsumedCapacity' not in permissions.get_item(Key={'group_name': 'b', 'service_action': 'svc#deploy'})
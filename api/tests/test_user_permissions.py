@@ -0,0 +1,32 @@
+from conftest import call
+
+
+def test_wildcard_grant_is_not_covered_by_itself(lf):
+    lf.assign_user_to_group({'user_id': 'jane', 'group_name': 'deployers'})
+    lf.create_permission({'group_name': 'deployers', 'service': 'all', 'action': 'deploy'})
+
+    status, body = call(lf, 'GET', '/v1/users/jane/permissions')
+
+    assert status == 200
+    assert body['permissions'] == [{
+        'service': 'all',
+        'action': 'deploy',
+        'service_action': 'all#deploy',
+        'rule': 'all#action',
+        'groups': ['deployers'],
+        'covered_by': []
+    }]
+
+
+def test_covered_by_lists_wider_grants_most_specific_first(lf):
+    lf.assign_user_to_group({'user_id': 'jane', 'group_name': 'a'})
+    lf.assign_user_to_group({'user_id': 'jane', 'group_name': 'b'})
+    lf.create_permission({'group_name': 'a', 'service': 'svc', 'action': 'deploy'})
+    lf.create_permission({'group_name': 'b', 'service': 'svc', 'action': 'all'})
+    lf.create_permission({'group_name': 'b', 'service': 'all', 'action': 'deploy'})
+
+    permissions = {entry['service_action']: entry for entry in call(lf, 'GET', '/v1/users/jane/permissions')[1]['permissions']}
+
+    assert permissions['svc#deploy']['covered_by'] == ['svc#all', 'all#deploy']
+    assert permissions['svc#all']['covered_by'] == []
+    assert permissions['all#deploy']['covered_by'] == []
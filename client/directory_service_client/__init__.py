@@ -0,0 +1,10 @@
+from .client import AsyncDirectoryClient, DirectoryClient, DirectoryServiceError
+from .index import DirectoryIndex, wildcard_rules
+
+__all__ = [
+    'AsyncDirectoryClient',
+    'DirectoryClient',
+    'DirectoryIndex',
+    'DirectoryServiceError',
+    'wildcard_rules',
+]
@@ -0,0 +1,242 @@
+import asyncio
+import threading
+import time
+import urllib.parse
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from .index import DirectoryIndex
+
+CHANGES_PAGE_SIZE = 1000
+
+
+class DirectoryServiceError(Exception):
+    """Raised when the directory service answers with an error status"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"{status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+def _error_message(response: httpx.Response) -> str:
+    try:
+        return response.json().get('error', response.text)
+    except ValueError:
+        return response.text
+
+
+def _clean(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in params.items() if v is not None}
+
+
+class _ClientBase:
+    """Settings and local-index bookkeeping shared by the sync and async clients"""
+
+    def __init__(self, base_url: str, api_key: str, timeout: float, max_connections: int,
+                 cache_ttl: Optional[float]):
+        self._client_kwargs = {
+            'base_url': base_url.rstrip('/'),
+            'headers': {'x-api-key': api_key, 'Accept-Encoding': 'gzip'},
+            'timeout': timeout,
+            'limits': httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        }
+        self.cache_ttl = cache_ttl
+        self.index = DirectoryIndex()
+        self._refreshed_at = 0.0
+
+    @property
+    def local(self) -> bool:
+        """True when decisions are answered from the local copy of the directory"""
+        return self.cache_ttl is not None
+
+    def _is_stale(self) -> bool:
+        return self.index.revision is None or time.monotonic() - self._refreshed_at >= self.cache_ttl
+
+    @staticmethod
+    def _check(response: httpx.Response) -> httpx.Response:
+        if response.status_code >= 400:
+            raise DirectoryServiceError(response.status_code, _error_message(response))
+        return response
+
+
+class DirectoryClient(_ClientBase):
+    """
+    Blocking client for the directory service.
+
+    Connections are pooled and kept alive across calls. With cache_ttl set, a
+    local copy of the directory is loaded from /v1/snapshot, brought up to date
+    from /v1/changes once it is cache_ttl seconds old, and used to answer can()
+    and authorize() without a round trip.
+    """
+
+    def __init__(self, base_url: str, api_key: str, timeout: float = 10.0, max_connections: int = 10,
+                 cache_ttl: Optional[float] = None):
+        super().__init__(base_url, api_key, timeout, max_connections, cache_ttl)
+        self._http = httpx.Client(**self._client_kwargs)
+        self._refresh_lock = threading.Lock()
+
+    def __enter__(self) -> 'DirectoryClient':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close pooled connections"""
+        self._http.close()
+
+    def _get(self, path: str, **params) -> Any:
+        return self._check(self._http.get(path, params=_clean(params))).json()
+
+    def get_permissions(self, group_name: Optional[str] = None, service: Optional[str] = None,
+                        action: Optional[str] = None) -> List[Dict]:
+        """Permissions for a group, or the groups allowed on a service (and action)"""
+        return self._get('/v1/permissions', group_name=group_name, service=service, action=action)
+
+    def get_user_groups(self, user_id: Optional[str] = None, group_name: Optional[str] = None) -> List[Dict]:
+        """Memberships of a user, or members of a group"""
+        return self._get('/v1/users', user_id=user_id, group_name=group_name)
+
+    def get_contacts(self, target: Optional[str] = None, contact_type: Optional[str] = None) -> List[Dict]:
+        """Contacts of a target, optionally of one type; an unknown target has none"""
+        try:
+            return self._get('/v1/contacts', target=target, type=contact_type)
+        except DirectoryServiceError as e:
+            if e.status_code == 404:
+                return []
+            raise
+
+    def get_roster(self, group_name: str, contact_type: Optional[str] = None) -> Dict:
+        """A group's contacts plus each member and their contacts"""
+        return self._get(f'/v1/groups/{urllib.parse.quote(group_name, safe="")}/roster', contact_type=contact_type)
+
+    def get_user_permissions(self, user_id: str, service: Optional[str] = None) -> Dict:
+        """A user's groups and effective permissions, optionally only those on a service"""
+        return self._get(f'/v1/users/{urllib.parse.quote(user_id, safe="")}/permissions', service=service)
+
+    def search(self, prefix: str, kind: str, limit: Optional[int] = None) -> List[Dict]:
+        """Users, groups or contact targets (kind) whose name starts with prefix, ignoring case"""
+        return self._get('/v1/search', prefix=prefix, kind=kind, limit=limit)
+
+    def authorize(self, user_id: str, service: str, action: str) -> Dict:
+        """Authorization decision, from the local copy when caching is enabled"""
+        if self.local:
+            self.refresh_if_stale()
+            return self.index.authorize(user_id, service, action)
+        return self._get('/v1/authorize', user_id=user_id, service=service, action=action)
+
+    def can(self, user_id: str, service: str, action: str) -> bool:
+        """True when the user belongs to a group allowed to perform the action on the service"""
+        return self.authorize(user_id, service, action)['allowed']
+
+    def refresh_if_stale(self) -> None:
+        """Refresh the local copy once it is older than cache_ttl"""
+        if self._is_stale():
+            with self._refresh_lock:
+                if self._is_stale():
+                    self.refresh()
+
+    def refresh(self) -> None:
+        """Bring the local copy up to date, falling back to a full snapshot when the change log cannot"""
+        if self.index.revision is not None:
+            while True:
+                response = self._http.get('/v1/changes', params={'since': self.index.revision, 'limit': CHANGES_PAGE_SIZE})
+                if response.status_code == 410:
+                    break
+                page = self._check(response).json()
+                self.index.apply_changes(page['changes'])
+                if not page['has_more'] or not page['changes']:
+                    self._refreshed_at = time.monotonic()
+                    return
+
+        self.index.load_snapshot(self._get('/v1/snapshot'))
+        self._refreshed_at = time.monotonic()
+
+
+class AsyncDirectoryClient(_ClientBase):
+    """asyncio counterpart of DirectoryClient with the same methods as coroutines"""
+
+    def __init__(self, base_url: str, api_key: str, timeout: float = 10.0, max_connections: int = 10,
+                 cache_ttl: Optional[float] = None):
+        super().__init__(base_url, api_key, timeout, max_connections, cache_ttl)
+        self._http = httpx.AsyncClient(**self._client_kwargs)
+        self._refresh_lock = asyncio.Lock()
+
+    async def __aenter__(self) -> 'AsyncDirectoryClient':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close pooled connections"""
+        await self._http.aclose()
+
+    async def _get(self, path: str, **params) -> Any:
+        return self._check(await self._http.get(path, params=_clean(params))).json()
+
+    async def get_permissions(self, group_name: Optional[str] = None, service: Optional[str] = None,
+                              action: Optional[str] = None) -> List[Dict]:
+        """Permissions for a group, or the groups allowed on a service (and action)"""
+        return await self._get('/v1/permissions', group_name=group_name, service=service, action=action)
+
+    async def get_user_groups(self, user_id: Optional[str] = None, group_name: Optional[str] = None) -> List[Dict]:
+        """Memberships of a user, or members of a group"""
+        return await self._get('/v1/users', user_id=user_id, group_name=group_name)
+
+    async def get_contacts(self, target: Optional[str] = None, contact_type: Optional[str] = None) -> List[Dict]:
+        """Contacts of a target, optionally of one type; an unknown target has none"""
+        try:
+            return await self._get('/v1/contacts', target=target, type=contact_type)
+        except DirectoryServiceError as e:
+            if e.status_code == 404:
+                return []
+            raise
+
+    async def get_roster(self, group_name: str, contact_type: Optional[str] = None) -> Dict:
+        """A group's contacts plus each member and their contacts"""
+        return await self._get(f'/v1/groups/{urllib.parse.quote(group_name, safe="")}/roster', contact_type=contact_type)
+
+    async def get_user_permissions(self, user_id: str, service: Optional[str] = None) -> Dict:
+        """A user's groups and effective permissions, optionally only those on a service"""
+        return await self._get(f'/v1/users/{urllib.parse.quote(user_id, safe="")}/permissions', service=service)
+
+    async def search(self, prefix: str, kind: str, limit: Optional[int] = None) -> List[Dict]:
+        """Users, groups or contact targets (kind) whose name starts with prefix, ignoring case"""
+        return await self._get('/v1/search', prefix=prefix, kind=kind, limit=limit)
+
+    async def authorize(self, user_id: str, service: str, action: str) -> Dict:
+        """Authorization decision, from the local copy when caching is enabled"""
+        if self.local:
+            await self.refresh_if_stale()
+            return self.index.authorize(user_id, service, action)
+        return await self._get('/v1/authorize', user_id=user_id, service=service, action=action)
+
+    async def can(self, user_id: str, service: str, action: str) -> bool:
+        """True when the user belongs to a group allowed to perform the action on the service"""
+        return (await self.authorize(user_id, service, action))['allowed']
+
+    async def refresh_if_stale(self) -> None:
+        """Refresh the local copy once it is older than cache_ttl"""
+        if self._is_stale():
+            async with self._refresh_lock:
+                if self._is_stale():
+                    await self.refresh()
+
+    async def refresh(self) -> None:
+        """Bring the local copy up to date, falling back to a full snapshot when the change log cannot"""
+        if self.index.revision is not None:
+            while True:
+                response = await self._http.get('/v1/changes', params={'since': self.index.revision, 'limit': CHANGES_PAGE_SIZE})
+                if response.status_code == 410:
+                    break
+                page = self._check(response).json()
+                self.index.apply_changes(page['changes'])
+                if not page['has_more'] or not page['changes']:
+                    self._refreshed_at = time.monotonic()
+                    return
+
+        self.index.load_snapshot(await self._get('/v1/snapshot'))
+        self._refreshed_at = time.monotonic()
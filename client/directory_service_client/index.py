@@ -0,0 +1,108 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+def wildcard_rules(service: str, action: str) -> List[Tuple[str, str]]:
+    """(rule, service_action) pairs that grant service/action, most specific first.
+
+    Mirrors the server's resolution order so local decisions match /v1/authorize.
+    """
+    rules = [
+        ('exact', f"{service}#{action}"),
+        ('service#all', f"{service}#all"),
+        ('all#action', f"all#{action}"),
+        ('all#all', "all#all"),
+    ]
+    seen = set()
+    unique_rules = []
+    for rule, key in rules:
+        if key not in seen:
+            seen.add(key)
+            unique_rules.append((rule, key))
+    return unique_rules
+
+
+class DirectoryIndex:
+    """In-memory copy of the directory built from /v1/snapshot and kept current with /v1/changes"""
+
+    def __init__(self):
+        self.revision: Optional[int] = None
+        self.groups_by_user: Dict[str, Set[str]] = {}
+        self.groups_by_service_action: Dict[str, Set[str]] = {}
+        self.contacts: Dict[Tuple[str, str], Dict] = {}
+
+    def load_snapshot(self, snapshot: Dict) -> None:
+        """Replace the index with the contents of a snapshot document"""
+        self.groups_by_user = {}
+        self.groups_by_service_action = {}
+        self.contacts = {}
+        for item in snapshot.get('permissions', []):
+            self._apply('put', 'permissions', item)
+        for item in snapshot.get('memberships', []):
+            self._apply('put', 'users', item)
+        for item in snapshot.get('contacts', []):
+            self._apply('put', 'contacts', item)
+        self.revision = int(snapshot['revision'])
+
+    def apply_changes(self, changes: Iterable[Dict]) -> None:
+        """Apply change log entries in revision order"""
+        for change in changes:
+            self._apply(change['op'], change['table'], change['item'])
+            self.revision = int(change['revision'])
+
+    def _apply(self, op: str, table: str, item: Dict) -> None:
+        if table == 'permissions':
+            groups = self.groups_by_service_action.setdefault(item['service_action'], set())
+            if op == 'put':
+                groups.add(item['group_name'])
+            else:
+                groups.discard(item['group_name'])
+        elif table == 'users':
+            groups = self.groups_by_user.setdefault(item['user_id'], set())
+            if op == 'put':
+                groups.add(item['group_name'])
+            else:
+                groups.discard(item['group_name'])
+        elif table == 'contacts':
+            key = (item['target'], item['type'])
+            if op == 'put':
+                self.contacts[key] = item
+            else:
+                self.contacts.pop(key, None)
+
+    def authorize(self, user_id: str, service: str, action: str) -> Dict:
+        """Decide locally, returning the same shape as GET /v1/authorize"""
+        decision = {
+            'allowed': False,
+            'user_id': user_id,
+            'service': service,
+            'action': action,
+            'group_name': None,
+            'rule': None,
+            'service_action': None
+        }
+        groups = self.groups_by_user.get(user_id, set())
+        if not groups:
+            return decision
+
+        for rule, service_action in wildcard_rules(service, action):
+            matches = groups & self.groups_by_service_action.get(service_action, set())
+            if matches:
+                decision.update({
+                    'allowed': True,
+                    'group_name': sorted(matches)[0],
+                    'rule': rule,
+                    'service_action': service_action
+                })
+                break
+        return decision
+
+    def groups_for(self, user_id: str) -> List[str]:
+        """Groups a user belongs to"""
+        return sorted(self.groups_by_user.get(user_id, set()))
+
+    def contacts_for(self, target: str, contact_type: Optional[str] = None) -> List[Dict]:
+        """Contacts of a target, optionally of one type"""
+        return [
+            item for (item_target, item_type), item in sorted(self.contacts.items())
+            if item_target == target and (contact_type is None or item_type == contact_type)
+        ]
@@ -0,0 +1,56 @@
+"""
+Run the client against an httpx.MockTransport standing in for the API.
+
+    cd client && python -m pytest -q tests
+"""
+import json
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def raw_path(request: httpx.Request) -> str:
+    """The request path as sent, percent-encoding included"""
+    return request.url.raw_path.split(b'?')[0].decode('ascii')
+
+
+class FakeApi:
+    """Answers requests from a table of path -> handler and records every request it sees"""
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+
+    def route(self, path, status=200, body=None):
+        self.routes[path] = body if callable(body) else (lambda request: (status, body))
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        handler = self.routes.get(raw_path(request))
+        if handler is None:
+            return httpx.Response(404, json={'error': f'No route for {raw_path(request)}'})
+        status, body = handler(request)
+        return httpx.Response(status, content=json.dumps(body).encode('utf-8'))
+
+    def paths(self):
+        return [raw_path(request) for request in self.requests]
+
+
+@pytest.fixture
+def api():
+    return FakeApi()
+
+
+def mocked(client, api):
+    """Point a client's connection pool at the fake API"""
+    kwargs = dict(client._client_kwargs, transport=httpx.MockTransport(api))
+    if isinstance(client._http, httpx.AsyncClient):
+        client._http = httpx.AsyncClient(**kwargs)
+    else:
+        client._http.close()
+        client._http = httpx.Client(**kwargs)
+    return client
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from conftest import mocked
+from directory_service_client import AsyncDirectoryClient, DirectoryClient, DirectoryServiceError
+
+SNAPSHOT = {
+    'revision': 5,
+    'permissions': [
+        {'group_name': 'deployers', 'service_action': 'svc#deploy'},
+        {'group_name': 'root', 'service_action': 'all#all'},
+    ],
+    'memberships': [
+        {'user_id': 'jane', 'group_name': 'deployers'},
+        {'user_id': 'god', 'group_name': 'root'},
+    ],
+    'contacts': []
+}
+
+
+@pytest.fixture
+def client(api):
+    with mocked(DirectoryClient('https://directory.example.com/', 'key'), api) as client:
+        yield client
+
+
+@pytest.fixture
+def local(api):
+    api.route('/v1/snapshot', body=SNAPSHOT)
+    with mocked(DirectoryClient('https://directory.example.com', 'key', cache_ttl=30), api) as client:
+        yield client
+
+
+def test_requests_carry_the_key_and_drop_unset_params(client, api):
+    api.route('/v1/users', body=[{'user_id': 'jane', 'group_name': 'ops'}])
+
+    assert client.get_user_groups(group_name='ops') == [{'user_id': 'jane', 'group_name': 'ops'}]
+
+    request = api.requests[0]
+    assert request.headers['x-api-key'] == 'key'
+    assert str(request.url) == 'https://directory.example.com/v1/users?group_name=ops'
+
+
+def test_path_parameters_are_quoted(client, api):
+    api.route('/v1/groups/a%2Fb/roster', body={'group_name': 'a/b', 'contacts': [], 'members': []})
+
+    assert client.get_roster('a/b')['group_name'] == 'a/b'
+
+
+def test_unknown_contact_target_has_no_contacts(client, api):
+    api.route('/v1/contacts', status=404, body={'error': 'Contact information not found'})
+
+    assert client.get_contacts(target='nobody') == []
+
+
+def test_errors_are_raised_with_status_and_message(client, api):
+    api.route('/v1/permissions', status=400, body={'error': 'Invalid query parameters'})
+
+    with pytest.raises(DirectoryServiceError) as raised:
+        client.get_permissions(action='deploy')
+
+    assert (raised.value.status_code, raised.value.message) == (400, 'Invalid query parameters')
+
+
+def test_without_a_cache_decisions_come_from_the_server(client, api):
+    api.route('/v1/authorize', body={'allowed': True})
+
+    assert client.can('jane', 'svc', 'deploy') is True
+    assert dict(api.requests[0].url.params) == {'user_id': 'jane', 'service': 'svc', 'action': 'deploy'}
+
+
+def test_local_copy_answers_with_the_server_rules(local, api):
+    assert local.authorize('jane', 'svc', 'deploy')['rule'] == 'exact'
+    assert local.authorize('god', 'other', 'anything')['rule'] == 'all#all'
+    assert not local.can('jane', 'svc', 'build')
+    assert not local.can('stranger', 'svc', 'deploy')
+    assert api.paths() == ['/v1/snapshot']
+
+
+def test_stale_copy_is_brought_up_to_date_from_the_change_log(local, api):
+    local.can('jane', 'svc', 'deploy')
+    pages = iter([
+        {'changes': [{'revision': 6, 'op': 'delete', 'table': 'users', 'item': {'user_id': 'jane', 'group_name': 'deployers'}}],
+         'has_more': True},
+        {'changes': [{'revision': 7, 'op': 'put', 'table': 'users', 'item': {'user_id': 'john', 'group_name': 'deployers'}}],
+         'has_more': False},
+    ])
+    api.route('/v1/changes', body=lambda request: (200, next(pages)))
+    local._refreshed_at -= 30
+
+    assert not local.can('jane', 'svc', 'deploy')
+    assert local.can('john', 'svc', 'deploy')
+    assert api.paths() == ['/v1/snapshot', '/v1/changes', '/v1/changes']
+    assert [request.url.params['since'] for request in api.requests[1:]] == ['5', '6']
+    assert local.index.revision == 7
+
+
+def test_copy_reloads_the_snapshot_when_the_change_log_is_gone(local, api):
+    local.can('jane', 'svc', 'deploy')
+    api.route('/v1/changes', status=410, body={'error': 'Changes since 5 are no longer kept'})
+    api.route('/v1/snapshot', body={**SNAPSHOT, 'revision': 9, 'memberships': []})
+    local._refreshed_at -= 30
+
+    assert not local.can('jane', 'svc', 'deploy')
+    assert api.paths() == ['/v1/snapshot', '/v1/changes', '/v1/snapshot']
+    assert local.index.revision == 9
+
+
+def test_async_client_matches_the_blocking_one(api):
+    api.route('/v1/snapshot', body=SNAPSHOT)
+    api.route('/v1/contacts', status=404, body={'error': 'Contact information not found'})
+
+    async def scenario():
+        async with mocked(AsyncDirectoryClient('https://directory.example.com', 'key', cache_ttl=30), api) as client:
+            decisions = await asyncio.gather(*[client.can('jane', 'svc', 'deploy') for _ in range(5)])
+            return decisions, await client.get_contacts(target='nobody')
+
+    decisions, contacts = asyncio.run(scenario())
+
+    assert decisions == [True] * 5
+    assert contacts == []
+    # Concurrent checks share one refresh
+    assert api.paths() == ['/v1/snapshot', '/v1/contacts']
@@ -0,0 +1,33 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { getServerSession } from 'next-auth';
+
+const API_URL = process.env.API_URL;
+const API_KEY = process.env.ADMIN_API_KEY;
+
+export async function GET(request: NextRequest) {
+  const session = await getServerSession();
+  if (!session) {
+    return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+  }
+
+  const { searchParams } = new URL(request.url);
+  const params = new URLSearchParams();
+  for (const name of ['prefix', 'kind', 'limit']) {
+    const value = searchParams.get(name);
+    if (value) {
+      params.set(name, value);
+    }
+  }
+
+  try {
+    const response = await fetch(`${API_URL}/v1/search?${params}`, {
+      headers: {
+        'x-api-key': API_KEY!,
+      },
+    });
+    const data = await response.json();
+    return NextResponse.json(data, { status: response.status });
+  } catch (error) {
+    return NextResponse.json({ error: 'Failed to search the directory', details: error }, { status: 500 });
+  }
+}
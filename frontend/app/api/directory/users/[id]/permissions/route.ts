@@ -0,0 +1,30 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { getServerSession } from 'next-auth';
+
+const API_URL = process.env.API_URL;
+const API_KEY = process.env.ADMIN_API_KEY;
+
+export async function GET(request: NextRequest, { params }: { params: { id: string } }) {
+  const session = await getServerSession();
+  if (!session) {
+    return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+  }
+
+  const { searchParams } = new URL(request.url);
+  const service = searchParams.get('service');
+
+  try {
+    const response = await fetch(
+      `${API_URL}/v1/users/${encodeURIComponent(params.id)}/permissions${service ? `?service=${encodeURIComponent(service)}` : ''}`,
+      {
+        headers: {
+          'x-api-key': API_KEY!,
+        },
+      }
+    );
+    const data = await response.json();
+    return NextResponse.json(data, { status: response.status });
+  } catch (error) {
+    return NextResponse.json({ error: 'Failed to fetch user permissions', details: error }, { status: 500 });
+  }
+}
@@ -22,7 +22,34 @@ export interface Contact {
   data: string;
 }
 
+export interface EffectivePermission {
+  service: string;
+  action: string;
+  service_action: string;
+  rule: 'exact' | 'service#all' | 'all#action' | 'all#all';
+  groups: string[];
+  covered_by: string[];
+}
+
+export interface EffectivePermissions {
+  user_id: string;
+  groups: string[];
+  permissions: EffectivePermission[];
+}
+
+export interface SearchMatch {
+  kind: 'user' | 'group' | 'target';
+  name: string;
+}
+
 export const DirectoryService = {
+  search: async (prefix: string, kind: SearchMatch['kind'], limit?: number): Promise<SearchMatch[]> => {
+    const response = await api.get('/search', {
+      params: { prefix, kind, limit }
+    });
+    return response.data;
+  },
+
   getUserGroups: async (userId?: string) => {
     const response = await api.get('/users', {
       params: { user_id: userId }
@@ -30,6 +57,13 @@ export const DirectoryService = {
     return response.data;
   },
 
+  getUserPermissions: async (userId: string, service?: string): Promise<EffectivePermissions> => {
+    const response = await api.get(`/users/${encodeURIComponent(userId)}/permissions`, {
+      params: { service }
+    });
+    return response.data;
+  },
+
   getGroupUsers: async (groupName: string) => {
     const response = await api.get('/users', {
       params: { group_name: groupName }